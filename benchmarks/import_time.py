@@ -0,0 +1,81 @@
+"""Measures the startup import time of the command line and enforces a budget.
+
+Every entry point is imported in a fresh interpreter with -X importtime, the best of a few
+runs, less the imports of an empty interpreter, is compared with its budget and modules that
+must stay lazy are checked to be absent. The script exits with status 1 when a budget is exceeded, run it from the repository root:
+
+    python benchmarks/import_time.py
+"""
+import argparse
+import subprocess
+import sys
+
+# entry point, python statement run by the entry point, import time budget in milliseconds
+# and modules it must not import, validate runs on benchmarks/validate.json
+ENTRY_POINTS = [("help", "import datagen.cli", 100,
+                 ("numpy", "pyarrow", "pandas", "faker", "s3fs")),
+                ("validate", "import datagen.cli; datagen.cli.execute_from_command_line("
+                 "['datagen', 'validate', 'benchmarks/validate.json'])", 400,
+                 ("pandas", "faker", "s3fs", "pyarrow.dataset")),
+                ("package", "import datagen", 20,
+                 ("numpy", "pyarrow", "pandas", "faker", "s3fs"))
+               ]
+DEFAULT_RUNS = 5
+
+def measure(statement, forbidden):
+    """Imports a statement in a fresh interpreter.
+    Args:
+        statement: python statement to run
+        forbidden: module names to look for once the statement has run
+    Returns:
+        tuple of the cumulative import time in milliseconds and the list of imported
+        forbidden modules
+    """
+    check = "{0}; import sys; print(','.join(m for m in {1!r} if m in sys.modules))".format(
+        statement, tuple(forbidden))
+    completed = subprocess.run([sys.executable, "-X", "importtime", "-c", check],
+        capture_output=True, text=True, check=True)
+    total = 0
+    for line in completed.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package, top level imports aren't indented
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        (_, cumulative, name) = line.split("|")
+        if cumulative.strip().isdigit() and not name.startswith("  "):
+            total += int(cumulative)
+    imported = [module for module in completed.stdout.strip().split(",") if module]
+    return (total / 1000.0, imported)
+
+def best_of(statement, forbidden, runs=DEFAULT_RUNS, baseline=0.0):
+    """Best import time of a statement over a few runs, less the baseline.
+    Args:
+        statement: python statement to run
+        forbidden: module names to look for once the statement has run
+        runs: number of fresh interpreters the statement is run in
+        baseline: import time in milliseconds of an empty interpreter
+    Returns:
+        tuple of the best import time in milliseconds and the list of imported forbidden
+        modules
+    """
+    results = [measure(statement, forbidden) for _ in range(runs)]
+    best = max(min(elapsed for (elapsed, _) in results) - baseline, 0.0)
+    return (best, results[0][1])
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=DEFAULT_RUNS,
+        help="number of runs of every entry point, the best one is kept")
+    arguments = parser.parse_args(argv)
+    (baseline, _) = best_of("pass", (), arguments.runs)
+    failed = False
+    for (name, statement, budget, forbidden) in ENTRY_POINTS:
+        (best, imported) = best_of(statement, forbidden, arguments.runs, baseline)
+        status = "ok"
+        if best > budget or imported:
+            (failed, status) = (True, "FAILED")
+        print("{0:<10} {1:8.1f} ms  budget {2:5d} ms  {3}{4}".format(name, best, budget, status,
+            "  imports " + ", ".join(imported) if imported else ""))
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,184 @@
+"""Benchmarks the generation of every data type and the writer of every output format.
+
+Every case runs in a fresh process so its peak RSS is its own:
+
+    type cases generate a single field of every entry of VALID_DATA_TYPES with every engine
+    format cases generate cif_cust.json, a realistic mixed workload, and write it with
+    every output format
+
+Results are written as json and compared with a baseline written by an earlier run, a case
+slower than the baseline by more than the tolerance is a regression and the script exits
+with status 1. Run it from the repository root:
+
+    python benchmarks/run.py --output results.json
+    python benchmarks/run.py --scales 1e4 --baseline results.json
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from datagen import VERSION
+from datagen.constants import VALID_DATA_TYPES
+from datagen.constants import VALID_ENGINES
+from datagen.constants import VALID_OUTPUT_FORMATS
+
+WORKLOAD = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "cif_cust.json")
+DEFAULT_SCALES = "1e4,1e6,1e7"
+# the record engine calls faker once per value, it is only run up to this number of rows
+MAX_RECORD_ENGINE_ROWS = 10000
+# maximum number of records held in memory by a case
+BATCH_SIZE = 1000000
+DEFAULT_TOLERANCE = 0.2
+# extra keys of the field of data types which need them
+FIELD_OPTIONS = {"cat": {"values": ["retail", "business", "private"], "weights": [70, 20, 10]},
+                 "expr": {"expr": "key * 2 + 1"},
+                 "lorem": {"min_length": 1, "max_length": 3},
+                 "ref": {"references": "benchmark.key"},
+                 "str": {"min_length": 5, "max_length": 20}
+                }
+
+def type_cases(scales, data_types, engines):
+    """Cases generating a single field of every data type with every engine."""
+    cases = []
+    for rows in scales:
+        for engine in engines:
+            if engine == "record" and rows > MAX_RECORD_ENGINE_ROWS:
+                continue
+            for data_type in data_types:
+                cases.append({"kind": "type", "data_type": data_type, "engine": engine, "rows": rows})
+    return cases
+
+def format_cases(scales, output_formats):
+    """Cases generating the cif_cust.json workload with every output format."""
+    return [{"kind": "format", "output_format": output_format, "rows": rows}
+        for rows in scales for output_format in output_formats]
+
+def case_key(case):
+    """Key of a case, stable across runs so results can be compared with a baseline."""
+    if case["kind"] == "type":
+        return "type/{0}/{1}/{2}".format(case["data_type"], case["engine"], case["rows"])
+    return "format/{0}/{1}".format(case["output_format"], case["rows"])
+
+def _type_config(case):
+    fields = [dict(FIELD_OPTIONS.get(case["data_type"], {}), name="value", type=case["data_type"])]
+    if case["data_type"] in ("expr", "ref"):
+        # the key the values are computed from or reference, generated along with them
+        fields.insert(0, {"name": "key", "type": "int"})
+    return {"name": "benchmark", "output_format": "csv", "output_rec_cnt": case["rows"],
+            "source": "fake", "seed": 100, "output_file": "benchmark.csv",
+            "engine": case["engine"], "fields": fields}
+
+def run_case(case, output_dir):
+    """Runs a single case, called in a fresh worker process.
+    Args:
+        case: dict describing the case
+        output_dir: directory of the files written by format cases
+    Returns:
+        dict of the case with its wall time, rows/s, bytes written and peak rss
+    """
+    from datagen import config_parser
+    from datagen.cli import generate_fake_batches, persist_batches
+    from datagen.metrics import Metrics, peak_rss
+    metrics = Metrics()
+    started = time.perf_counter()
+    if case["kind"] == "type":
+        schema_parsed = config_parser.make_config_object(_type_config(case))
+        size = sum(batch.nbytes for batch in generate_fake_batches(schema_parsed, metrics))
+    else:
+        with open(WORKLOAD, encoding="utf-8") as f:
+            config = json.load(f)
+        config.update(output_rec_cnt=case["rows"], output_format=case["output_format"],
+            batch_size=min(case["rows"], BATCH_SIZE),
+            output_file=os.path.join(output_dir, "cif_cust." + case["output_format"]))
+        schema_parsed = config_parser.make_config_object(config)
+        with contextlib.redirect_stdout(io.StringIO()):
+            persist_batches(schema_parsed, generate_fake_batches(schema_parsed, metrics), metrics)
+        size = metrics.total("write").bytes
+        os.remove(config["output_file"])
+    seconds = time.perf_counter() - started
+    result = dict(case, key=case_key(case), seconds=round(seconds, 6),
+        rows_per_second=round(case["rows"] / seconds, 1), bytes=size, peak_rss_bytes=peak_rss())
+    result["stages"] = {stage: record["seconds"]
+        for stage, record in metrics.report()["stages"].items() if record["seconds"]}
+    return result
+
+def compare(results, baseline):
+    """Compares the rows/s of every case with the baseline.
+    Returns:
+        list of (key, baseline rows/s, rows/s, ratio) of the cases found in the baseline
+    """
+    previous = {result["key"]: result for result in baseline["results"]}
+    comparisons = []
+    for result in results:
+        if result["key"] in previous:
+            before = previous[result["key"]]["rows_per_second"]
+            comparisons.append((result["key"], before, result["rows_per_second"],
+                result["rows_per_second"] / before))
+    return comparisons
+
+def _parse_list(value, valid):
+    values = [item.strip() for item in value.split(",") if item.strip()]
+    unknown = [item for item in values if item not in valid]
+    if unknown:
+        raise argparse.ArgumentTypeError("invalid values: {0}".format(", ".join(unknown)))
+    return values
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scales", default=DEFAULT_SCALES,
+        help="comma separated numbers of rows, default {0}".format(DEFAULT_SCALES))
+    parser.add_argument("--types", default=",".join(VALID_DATA_TYPES),
+        type=lambda value: _parse_list(value, VALID_DATA_TYPES),
+        help="comma separated data types of the type cases, all by default, none if empty")
+    parser.add_argument("--engines", default=",".join(VALID_ENGINES),
+        type=lambda value: _parse_list(value, VALID_ENGINES),
+        help="comma separated engines of the type cases, all by default")
+    parser.add_argument("--formats", default=",".join(VALID_OUTPUT_FORMATS),
+        type=lambda value: _parse_list(value, VALID_OUTPUT_FORMATS),
+        help="comma separated output formats of the format cases, all by default, none if empty")
+    parser.add_argument("--output", help="json file the results are written to")
+    parser.add_argument("--baseline", help="json results of an earlier run to compare with")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+        help="relative slowdown reported as a regression, default {0}".format(DEFAULT_TOLERANCE))
+    arguments = parser.parse_args(argv)
+    scales = [int(float(scale)) for scale in arguments.scales.split(",")]
+    cases = (type_cases(scales, arguments.types, arguments.engines)
+        + format_cases(scales, arguments.formats))
+    results = []
+    with tempfile.TemporaryDirectory() as output_dir:
+        for case in cases:
+            # a fresh process per case, so peak rss and caches aren't shared between cases
+            with ProcessPoolExecutor(max_workers=1, mp_context=get_context("spawn")) as executor:
+                result = executor.submit(run_case, case, output_dir).result()
+            results.append(result)
+            print("{0:<40} {1:>14,.0f} rows/s {2:>10.1f} MB rss".format(result["key"],
+                result["rows_per_second"], (result["peak_rss_bytes"] or 0) / (1 << 20)))
+    if arguments.output:
+        with open(arguments.output, "w", encoding="utf-8") as f:
+            json.dump({"version": VERSION, "python": platform.python_version(),
+                "platform": platform.platform(), "cpu_count": os.cpu_count(),
+                "results": results}, f, indent=2)
+    if not arguments.baseline:
+        return 0
+    with open(arguments.baseline, encoding="utf-8") as f:
+        baseline = json.load(f)
+    regressions = 0
+    for (key, before, after, ratio) in compare(results, baseline):
+        regressed = ratio < 1.0 - arguments.tolerance
+        regressions += regressed
+        print("{0:<40} {1:>14,.0f} -> {2:>14,.0f} rows/s {3:6.2f}x{4}".format(key, before, after,
+            ratio, "  REGRESSION" if regressed else ""))
+    return 1 if regressions else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
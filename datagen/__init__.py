@@ -1,5 +1,20 @@
-from datagen.fake_helper import FakeHelper
-from datagen.io_helper import IOHelper
-from datagen import config_parser
+VERSION = '1.0.0'
 
-VERSION = '1.0.0'
\ No newline at end of file
+# public names and the modules defining them, modules are imported on first access so
+# `import datagen` and the command line don't load faker, pandas or s3fs until needed
+_LAZY_ATTRIBUTES = {"FakeHelper": "datagen.fake_helper",
+                    "IOHelper": "datagen.io_helper",
+                    "config_parser": None
+                   }
+
+def __getattr__(name):
+    if name not in _LAZY_ATTRIBUTES:
+        raise AttributeError("module {0!r} has no attribute {1!r}".format(__name__, name))
+    import importlib
+    module_name = _LAZY_ATTRIBUTES[name]
+    if module_name is None:
+        return importlib.import_module("datagen." + name)
+    return getattr(importlib.import_module(module_name), name)
+
+def __dir__():
+    return sorted(list(globals()) + list(_LAZY_ATTRIBUTES))
@@ -0,0 +1,201 @@
+import hashlib
+import json
+import math
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from datagen.constants import DEFAULT_BOUNDS
+from datagen.io_helper import IOHelper, is_dataset
+from datagen.plan import compile_schema
+from datagen.sharding import Shard, part_location, shard_writer_options, write_shard
+
+# name of the manifest in the output directory, parquet and spark readers skip files
+# starting with _
+MANIFEST_NAME = "_manifest.json"
+MANIFEST_VERSION = 1
+# number of records of a range of a new checkpointed run if the number of shards isn't given
+CHECKPOINT_ROWS = 1000000
+# named types of a config that don't change the records or how they are written
+UNHASHED_NAMES = ("output_rec_cnt", "output_file", "batch_size", "profile", "endpoint_url")
+
+class Error(Exception):
+    """Base class for exceptions in this module."""
+    pass
+
+#
+# Module Methods
+#
+
+def manifest_location(output_location):
+    """Location of the manifest of a checkpointed run, in the directory of its parts."""
+    return "{0}/{1}".format(output_location.rstrip("/"), MANIFEST_NAME)
+
+def _field_props(field):
+    """Props of a field with the default bounds of date and timestamp fields resolved, so a
+    change of the defaults between versions changes the hash."""
+    props = dict(field.props)
+    if field.type in DEFAULT_BOUNDS:
+        (min_value, max_value) = DEFAULT_BOUNDS[field.type]
+        props["min_value"] = min_value if field.min_value is None else field.min_value
+        props["max_value"] = max_value if field.max_value is None else field.max_value
+    return props
+
+def config_hash(schema_parsed):
+    """Hash of everything the records of a table and their files depend on, the config
+    of the table, with the default bounds of its fields resolved, and the referenced
+    fields of parent tables. The number of records and the location of the output aren't
+    hashed, so a dataset can be appended to or moved.
+    Args:
+        schema_parsed: config_parser.Schema of the table
+    Returns:
+        hex sha256 digest
+    """
+    names = {name: value for name, value in schema_parsed.names.props.items()
+        if name not in UNHASHED_NAMES}
+    parents = {}
+    for field in schema_parsed.fields:
+        if field.type == "ref":
+            (table, name) = field.references.rsplit(".", 1)
+            parent = schema_parsed.tables[table]
+            parents[field.references] = {"output_rec_cnt": parent.names.output_rec_cnt,
+                "seed": parent.names.seed, "locale": parent.names.locale,
+                "engine": parent.names.engine, "field": _field_props(parent.field_map[name])}
+    content = {"names": names, "fields": [_field_props(field) for field in schema_parsed.fields],
+               "parents": parents}
+    encoded = json.dumps(content, sort_keys=True, default=str).encode("utf-8")
+    return hashlib.sha256(encoded).hexdigest()
+
+def plan_ranges(start, stop, range_rows, first_part=0):
+    """Splits rows into ranges of range_rows records, the last range may be shorter.
+    Args:
+        start: first row
+        stop: row after the last row
+        range_rows: number of records of a range
+        first_part: number of the part file of the first range
+    Returns:
+        list of dicts of the part, start and stop of every range, not complete
+    """
+    return [{"part": first_part + index, "start": range_start,
+             "stop": min(range_start + range_rows, stop), "complete": False}
+        for index, range_start in enumerate(range(start, stop, range_rows))]
+
+def check_appendable(schema_parsed):
+    """Checks that records can be appended to a table. Fixed cardinality spreads the
+    children over the parents by the number of records, appended records would be spread
+    differently from the ones already written.
+    Args:
+        schema_parsed: config_parser.Schema of the table
+    Raises:
+        Error if the table has a ref field with a fixed cardinality
+    """
+    for field in schema_parsed.fields:
+        if field.type == "ref" and (field.cardinality or {}).get("distribution") == "fixed":
+            raise Error("Cann't append to {0}, its ref field {1} has a fixed cardinality.".format(
+                schema_parsed.names.output_file, field.name))
+
+def load_manifest(schema_parsed, iohelp, num_shards=None, append=None):
+    """Loads the manifest of a checkpointed run, or starts a new one.
+    A new manifest splits output_rec_cnt records into num_shards ranges, or ranges of
+    CHECKPOINT_ROWS records. append adds ranges of the same size after the last row.
+    Args:
+        schema_parsed: config_parser.Schema of the table
+        iohelp: IOHelper of the output location
+        num_shards: number of ranges of a new run
+        append: number of records to add to an existing run
+    Returns:
+        dict of the manifest
+    Raises:
+        Error if append is given without a manifest or to a table with a fixed cardinality
+        ref field, or if the config changed since the manifest was written
+    """
+    names = schema_parsed.names
+    digest = config_hash(schema_parsed)
+    manifest = iohelp.read_json(manifest_location(names.output_file))
+    if manifest is None:
+        if append:
+            raise Error("Cann't append to {0}, it has no {1}, it wasn't written with --checkpoint.".format(
+                names.output_file, MANIFEST_NAME))
+        rows = names.output_rec_cnt
+        range_rows = math.ceil(rows / num_shards) if num_shards else CHECKPOINT_ROWS
+        return {"version": MANIFEST_VERSION, "config_hash": digest, "seed": names.seed,
+                "output_format": names.output_format, "rows": rows,
+                "range_rows": max(range_rows, 1),
+                "ranges": plan_ranges(0, rows, max(range_rows, 1))}
+    if manifest.get("version") != MANIFEST_VERSION or manifest.get("config_hash") != digest:
+        raise Error("Cann't resume {0}, the config changed since its {1} was written.".format(
+            names.output_file, MANIFEST_NAME))
+    if append:
+        check_appendable(schema_parsed)
+        ranges = manifest["ranges"]
+        first_part = ranges[-1]["part"] + 1 if ranges else 0
+        manifest["ranges"] = ranges + plan_ranges(manifest["rows"], manifest["rows"] + append,
+            manifest["range_rows"], first_part)
+        manifest["rows"] += append
+    return manifest
+
+def _range_arguments(plan, schema_parsed, entry, writer_options=None):
+    """Arguments of write_shard writing a range of the manifest to its part file."""
+    names = schema_parsed.names
+    shard = Shard(entry["part"], entry["start"], entry["stop"])
+    # ranges of a parquet dataset write files of their own into the dataset directory
+    if is_dataset(names.output_format, writer_options):
+        output_location = names.output_file
+    else:
+        output_location = part_location(names.output_file, shard.index)
+    return (plan, shard, names.output_format, output_location, names.batch_size, names.profile,
+        shard_writer_options(names.output_format, shard, writer_options), names.endpoint_url)
+
+def run_checkpointed(schema_parsed, workers=1, num_shards=None, append=None, writer_options=None,
+    metrics=None):
+    """Generates the ranges of a checkpointed run that aren't complete yet.
+    Every range is written as a numbered part file in a directory named after output_file
+    and recorded as complete in the manifest as soon as it is written, so an interrupted
+    run resumes from its first incomplete range. Records are a function of the seed and
+    the row index, a resumed or appended run writes the same records as a single run.
+    Args:
+        schema_parsed: config_parser.Schema of the table
+        workers: number of worker processes, ranges are written in the process if 1
+        num_shards: number of ranges of a new run
+        append: number of records to add after the last row of an existing run
+        writer_options: keyword arguments of the writer of the output format
+        metrics: optional Metrics the metrics of the written ranges are added to
+    Returns:
+        tuple of the manifest once every range is complete and the number of ranges
+        written by this run
+    Raises:
+        Error if the run cann't be resumed or appended to
+    """
+    names = schema_parsed.names
+    iohelp = IOHelper(names.profile, names.endpoint_url, metrics)
+    manifest = load_manifest(schema_parsed, iohelp, num_shards, append)
+    iohelp.makedirs(names.output_file)
+    # appended records are compiled with the new total, so unique fields check their range
+    # holds every record before the manifest records the new ranges
+    plan = compile_schema(schema_parsed, manifest["rows"])
+    location = manifest_location(names.output_file)
+    iohelp.write_json(manifest, location)
+    pending = [entry for entry in manifest["ranges"] if not entry["complete"]]
+    if workers == 1:
+        for entry in pending:
+            (_, shard_metrics) = write_shard(*_range_arguments(plan, schema_parsed, entry,
+                writer_options))
+            entry["complete"] = True
+            iohelp.write_json(manifest, location)
+            if metrics is not None:
+                metrics.merge(shard_metrics)
+        return (manifest, len(pending))
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(write_shard, *_range_arguments(plan, schema_parsed, entry,
+            writer_options)): entry for entry in pending}
+        try:
+            for future in as_completed(futures):
+                (_, shard_metrics) = future.result()
+                futures[future]["complete"] = True
+                iohelp.write_json(manifest, location)
+                if metrics is not None:
+                    metrics.merge(shard_metrics)
+        except BaseException:
+            # ranges that haven't started are left to the next run
+            for future in futures:
+                future.cancel()
+            raise
+    return (manifest, len(pending))
@@ -1,57 +1,105 @@
 import argparse
+import json
 import logging
 import os
-import random
 import sys
 import time
-import pandas as pd
 
 from datagen import VERSION
-from datagen.fake_helper import FakeHelper
-from datagen.io_helper import IOHelper
 from datagen import config_parser
+from datagen.constants import DEFAULT_DELIMITER
+from datagen.constants import DEFAULT_TOP_K
+from datagen.metrics import Metrics
 
 __author__ = 'mthummati'
 
-def generate_fake_df(schema_parsed):
-    faker = FakeHelper(schema_parsed.names.output_rec_cnt, 
-        schema_parsed.names.seed)
-    output_df = pd.DataFrame()
-    for field in schema_parsed.fields:
-        start_time = time.time() #degug
-        name = field.name
-        (status, field_list) = faker.fake_it(field.type, field.min_length, 
-            field.max_length, field.min_value, field.max_value, field.format, field.values)
-        if status:
-            output_df[name] = field_list
-        end_time = time.time() #degug
-        print ("Time taken to generate {0}: {1} seconds".format(name, end_time - start_time)) #degug
-    return output_df
-
-def persist_df(schema_parsed, output_df):
-    start_time = time.time() #degug
-    iohelp = IOHelper("codecommit")
-    if schema_parsed.names.output_format == "parquet":
-        status = iohelp.write_as_parquet(output_df, schema_parsed.names.output_file)
-        if status:
-            end_time = time.time() #degug
-            print ("Time taken to persist data: {0} seconds".format(end_time - start_time)) #degug
-            print ("All set! data has been successfully persisted as parquet!")
-    else:
-        kwargs = dict(header=True, index=False, sep="|")
-        status = iohelp.write_as_csv(output_df, schema_parsed.names.output_file, **kwargs)
-        if status:
-            end_time = time.time() #degug
-            print ("Time taken to persist DF: {0} seconds".format(end_time - start_time)) #degug
-            print ("All set! data has been successfully persisted as csv!")
-
-def parse_json_config(input_schema):
-    start_time = time.time() #degug
+logger = logging.getLogger(__name__)
+# number of functions printed by --profile, sorted by cumulative time
+PROFILE_LIMIT = 30
+
+# generation and io modules import numpy, pyarrow, faker and s3fs, they are imported by the
+# actions using them so --help and validate start fast
+EPILOG = """actions:
+  execute   generates the records of inp_json and persists them to its output_file
+  validate  parses and compiles inp_json without generating any record
+  estimate  generates a sample of inp_json and predicts the time, memory and output size
+            of execute, with a recommended batch_size and number of workers
+  profile   reads the parquet or csv file inp_json in a single pass and writes a config
+            generating data of the same shape to --config
+
+examples:
+  {0} validate config.json
+  {0} -w 4 execute config.json
+  {0} --checkpoint execute config.json
+  {0} --append 1000000 execute config.json
+  {0} estimate config.json
+  {0} profile data.csv --config config.json
+
+See README.rst for the keys of the json config and the supported data types.
+"""
+
+def generate_fake_batches(schema_parsed, metrics=None):
+    from datagen.plan import compile_schema
+    plan = compile_schema(schema_parsed)
+    batch_size = schema_parsed.names.batch_size or schema_parsed.names.output_rec_cnt
+    for batch in plan.iter_batches(batch_size, metrics=metrics):
+        yield batch
+
+def persist_batches(schema_parsed, batches, metrics=None):
+    from datagen.io_helper import IOHelper, is_dataset, writer_options
+    names = schema_parsed.names
+    metrics = metrics or Metrics()
+    started = time.perf_counter()
+    iohelp = IOHelper(names.profile, names.endpoint_url, metrics)
+    options = writer_options(schema_parsed)
+    # the dataset writer only replaces the files it writes, a previous dataset is removed
+    if is_dataset(names.output_format, options):
+        iohelp.remove(names.output_file)
+    status = iohelp.write_batches(batches, names.output_file, names.output_format, options)
+    if status:
+        metrics.add_remainder("write", time.perf_counter() - started, names.output_rec_cnt,
+            iohelp.output_size(names.output_file))
+        print ("All set! data has been successfully persisted as {0}!".format(names.output_format))
+
+def persist_sharded(schema_parsed, workers, num_shards=None, merge=True, metrics=None):
+    from datagen.plan import compile_schema
+    from datagen.io_helper import writer_options
+    from datagen.sharding import make_shards, run_shards
+    names = schema_parsed.names
+    plan = compile_schema(schema_parsed)
+    shards = make_shards(names.output_rec_cnt, num_shards or workers)
+    locations = run_shards(plan, shards, names.output_format, names.output_file, workers,
+        names.batch_size, merge, names.profile, writer_options(schema_parsed), names.endpoint_url,
+        metrics)
+    print ("All set! data has been successfully persisted as {0} to {1} file(s)!".format(names.output_format, len(locations)))
+
+def persist_checkpointed(schema_parsed, workers, num_shards=None, append=None, metrics=None):
+    from datagen.checkpoint import run_checkpointed
+    from datagen.io_helper import writer_options
+    names = schema_parsed.names
+    (manifest, written) = run_checkpointed(schema_parsed, workers, num_shards, append,
+        writer_options(schema_parsed), metrics)
+    print ("All set! data has been successfully persisted as {0} to {1} part file(s), {2} written by this run!".format(
+        names.output_format, len(manifest["ranges"]), written))
+    return (manifest, written)
+
+def parse_json_config(input_schema, metrics=None):
+    started = time.perf_counter()
     schema_parsed = config_parser.parse(input_schema)
-    end_time = time.time() #degug
-    print ("Time taken to parse schema: {0} seconds".format(end_time - start_time)) #degug
+    if metrics is not None:
+        metrics.add("parse", seconds=time.perf_counter() - started)
     return schema_parsed
 
+def write_json(data, location):
+    """Writes json, such as a run report or a profiled config, to a file, or to stdout if
+    location is -."""
+    if location == "-":
+        json.dump(data, sys.stdout, indent=2)
+        sys.stdout.write("\n")
+        return
+    with open(location, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2)
+
 class Command:
     def __init__(self, argv=None):
         self.argv = argv or sys.argv[:]
@@ -62,10 +110,7 @@ class Command:
         Given the command-line arguments, this creates a parser appropriate
         to that command, and runs it.
         """
-        here = os.path.normpath(os.path.abspath(os.path.dirname(__file__)) + os.sep + os.pardir)
-        with open(os.path.join(here, 'README.rst'), encoding='utf-8') as fp:
-            README = fp.read()
-        epilog = README
+        epilog = EPILOG.format(self.prog_name)
         formatter_class = argparse.RawDescriptionHelpFormatter
         parser = argparse.ArgumentParser(
             prog=self.prog_name,
@@ -77,14 +122,62 @@ class Command:
         group.add_argument("-v", "--verbose", action="store_true")
         group.add_argument("-q", "--quiet", action="store_true")
         
+        parser.add_argument("-w", "--workers",
+            type=int,
+            default=1,
+            help="number of worker processes generating shards of the output")
+
+        parser.add_argument("--shards",
+            type=int,
+            help="number of row-range shards to split the output into, defaults to --workers")
+
+        parser.add_argument("--parts",
+            action="store_true",
+            help="keep sharded output as part files in a directory named after output_file")
+
+        parser.add_argument("--report",
+            metavar="FILE",
+            help="write a json run report with wall time, rows/s, bytes and peak rss per stage "
+                 "and field to FILE, - for stdout")
+
+        parser.add_argument("--checkpoint",
+            action="store_true",
+            help="write output_file as a directory of numbered part files with a manifest of "
+                 "the completed row ranges, a re-run resumes from the first incomplete range")
+
+        parser.add_argument("--append",
+            type=int,
+            metavar="N",
+            help="add N new records to a dataset written with --checkpoint, implies --checkpoint")
+
+        parser.add_argument("--profile",
+            action="store_true",
+            help="run under cProfile and print the functions with the highest cumulative time "
+                 "to stderr, shard workers aren't profiled")
+
         parser.add_argument("action",
             metavar="action",
-            choices=['execute', 'validate'],
+            choices=['execute', 'validate', 'estimate', 'profile'],
             help="action to execute")
 
         parser.add_argument("inp_json",
             metavar="inp_json",
-            help="input json file")
+            help="input json file, or the parquet or csv file to profile")
+
+        parser.add_argument("--config",
+            metavar="FILE",
+            default="-",
+            help="file the profile action writes the config to, - for stdout (the default)")
+
+        parser.add_argument("--delimiter",
+            default=DEFAULT_DELIMITER,
+            help="delimiter of the csv file to profile, {0!r} by default".format(DEFAULT_DELIMITER))
+
+        parser.add_argument("--top-k",
+            type=int,
+            default=DEFAULT_TOP_K,
+            help="number of most frequent values profiled per column, and maximum number of "
+                 "values of a cat field, {0} by default".format(DEFAULT_TOP_K))
         
         arguments = parser.parse_args(self.argv[1:])
 
@@ -93,14 +186,96 @@ class Command:
         else:
             logging.basicConfig(level=logging.CRITICAL)
 
-        if arguments.action == "execute":
-            schema_parsed = parse_json_config(arguments.inp_json)
-            if schema_parsed.names.source == "fake":
-                output_df = generate_fake_df(schema_parsed)
-                persist_df (schema_parsed, output_df)
-        elif arguments.action == "validate":
-            schema_parsed = parse_json_config(arguments.inp_json)
+        if arguments.workers < 1 or (arguments.shards is not None and arguments.shards < 1):
+            parser.error("--workers and --shards must be positive")
+        if arguments.top_k < 1:
+            parser.error("--top-k must be positive")
+        if arguments.append is not None and (arguments.append < 1 or arguments.action != "execute"):
+            parser.error("--append must be positive and is only valid with execute")
+
+        metrics = Metrics()
+        if arguments.profile:
+            import cProfile
+            import pstats
+            profiler = cProfile.Profile()
+            tables = profiler.runcall(self.run, arguments, metrics)
+            pstats.Stats(profiler, stream=sys.stderr).sort_stats("cumulative").print_stats(PROFILE_LIMIT)
+        else:
+            tables = self.run(arguments, metrics)
+        metrics.log(logger)
+        if arguments.report:
+            info = dict(version=VERSION, action=arguments.action, config=arguments.inp_json,
+                workers=arguments.workers, shards=arguments.shards)
+            if len(tables) == 1:
+                info.update(tables[0])
+            else:
+                info["tables"] = tables
+            write_json(metrics.report(**info), arguments.report)
+
+    def run(self, arguments, metrics):
+        """Runs the action of the parsed command-line arguments on every table of the config.
+        Args:
+            arguments: parsed command-line arguments
+            metrics: Metrics recording every stage of the run, fields of multi-table configs
+                are recorded as table.field
+        Returns:
+            list of dicts describing every table, with the results of the action, added to
+            the run report
+        """
+        if arguments.action == "profile":
+            return [self.profile_file(arguments, metrics)]
+        parsed = parse_json_config(arguments.inp_json, metrics)
+        schemas = parsed.schemas if isinstance(parsed, config_parser.SchemaSet) else (parsed,)
+        if arguments.action == "execute" and arguments.append is not None:
+            # every table is checked before any of them is appended to
+            from datagen.checkpoint import check_appendable
+            for schema_parsed in schemas:
+                check_appendable(schema_parsed)
+        tables = []
+        for schema_parsed in schemas:
+            names = schema_parsed.names
+            table = {"name": names.name, "output_file": names.output_file,
+                     "output_format": names.output_format, "rows": names.output_rec_cnt}
+            table_metrics = metrics if len(schemas) == 1 else Metrics()
+            if arguments.action == "execute":
+                sharded = arguments.workers > 1 or arguments.shards is not None or arguments.parts
+                checkpointed = arguments.checkpoint or arguments.append is not None
+                if names.source == "fake" and checkpointed:
+                    (manifest, written) = persist_checkpointed(schema_parsed, arguments.workers,
+                        arguments.shards, arguments.append, table_metrics)
+                    table.update(rows=manifest["rows"], parts=len(manifest["ranges"]),
+                        parts_written=written)
+                elif names.source == "fake" and sharded:
+                    persist_sharded(schema_parsed, arguments.workers, arguments.shards,
+                        not arguments.parts, table_metrics)
+                elif names.source == "fake":
+                    persist_batches(schema_parsed, generate_fake_batches(schema_parsed, table_metrics),
+                        table_metrics)
+            elif arguments.action == "validate":
+                from datagen.plan import compile_schema
+                compile_schema(schema_parsed)
+            elif arguments.action == "estimate":
+                from datagen.estimate import estimate, format_estimate
+                estimated = estimate(schema_parsed, arguments.workers)
+                table["estimate"] = estimated.to_dict()
+                print (format_estimate(estimated))
+            if table_metrics is not metrics:
+                metrics.merge(table_metrics, names.name + ".")
+            tables.append(table)
+        return tables
 
+    def profile_file(self, arguments, metrics):
+        """Profiles the file of the parsed command-line arguments and writes the config
+        reproducing its shape, the config is validated before it is written.
+        Returns:
+            dict describing the profiled file with the statistics of its columns
+        """
+        from datagen.profiler import profile
+        (config, statistics) = profile(arguments.inp_json, arguments.delimiter, arguments.top_k,
+            metrics)
+        config_parser.make_config_object(config)
+        write_json(config, arguments.config)
+        return {"name": config["name"], "rows": config["output_rec_cnt"], "profile": statistics}
 
 def execute_from_command_line(argv=None):
     """A simple method that runs a Command."""
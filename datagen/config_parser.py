@@ -1,3 +1,4 @@
+import ast
 import json
 from types import MappingProxyType
 from datagen.constants import VALID_DATA_TYPES
@@ -5,6 +6,29 @@ from datagen.constants import VALID_NAMED_TYPES
 from datagen.constants import VALID_FIELD_NAMED_TYPES
 from datagen.constants import VALID_OUTPUT_FORMATS
 from datagen.constants import VALID_SOURCES
+from datagen.constants import VALID_ENGINES
+from datagen.constants import DEFAULT_ENGINE
+from datagen.constants import DEFAULT_PROFILE
+from datagen.constants import ADDRESS_PARTS
+from datagen.constants import VALID_QUOTING_STYLES
+from datagen.constants import VALID_COMPRESSIONS
+from datagen.constants import VALID_PARQUET_VERSIONS
+from datagen.constants import DEFAULT_PARQUET_VERSION
+from datagen.constants import VALID_PARQUET_ENCODINGS
+from datagen.constants import DEFAULT_DELIMITER
+from datagen.constants import DEFAULT_QUOTING_STYLE
+from datagen.constants import VALID_CONFIG_NAMED_TYPES
+from datagen.constants import VALID_CARDINALITIES
+from datagen.constants import VALID_EXPR_FUNCTIONS
+from datagen.constants import VALID_DISTRIBUTIONS
+from datagen.constants import DISTRIBUTION_DATA_TYPES
+from datagen.constants import DEFAULT_ADDRESS_PARTS
+
+# syntax of the expressions of expr fields, python expressions limited to these nodes
+EXPR_NODES = (ast.Expression, ast.BinOp, ast.UnaryOp, ast.BoolOp, ast.Compare, ast.IfExp,
+    ast.Call, ast.Name, ast.Constant, ast.Load, ast.Add, ast.Sub, ast.Mult, ast.Div,
+    ast.FloorDiv, ast.Mod, ast.Pow, ast.USub, ast.UAdd, ast.Not, ast.And, ast.Or, ast.Eq,
+    ast.NotEq, ast.Lt, ast.LtE, ast.Gt, ast.GtE)
 
 def _validate_mandatory_types(field, value, data_type):
     if not value:
@@ -21,6 +45,170 @@ def _validate_names_or_values(given_values, permitted_values):
     if len(invalid_named_types) > 0:
         raise SchemaParseException("Invalid values/types {0} found. Valid values are {1}".format(invalid_named_types, permitted_values))
 
+def _validate_weights(type, values, weights):
+    if type != "cat":
+        raise SchemaParseException("The weights property is only valid for cat fields.")
+    if len(weights) != len(values):
+        raise SchemaParseException("The weights property must have one weight per value.")
+    if not all(isinstance(weight, (int, float)) and not isinstance(weight, bool) and weight >= 0
+        for weight in weights):
+        raise SchemaParseException("The weights property must only hold non-negative numbers.")
+    if sum(weights) <= 0:
+        raise SchemaParseException("The weights property must have a positive sum.")
+
+def _validate_reference(type, references, cardinality):
+    if type != "ref":
+        if references is not None or cardinality is not None:
+            raise SchemaParseException("The references and cardinality properties are only valid for ref fields.")
+        return
+    _validate_mandatory_types("references", references, str)
+    if "." not in references.strip("."):
+        raise SchemaParseException("The references property must be table.field, found {0}.".format(references))
+    _validate_optional_types("cardinality", cardinality, dict)
+    if cardinality:
+        _validate_names_or_values(cardinality.keys(), ["distribution", "exponent"])
+        _validate_names_or_values([cardinality.get("distribution", "uniform")], VALID_CARDINALITIES)
+        exponent = cardinality.get("exponent")
+        if exponent is not None and (cardinality.get("distribution") != "zipf"
+            or not isinstance(exponent, (int, float)) or isinstance(exponent, bool) or exponent <= 0):
+            raise SchemaParseException("The exponent of a cardinality must be a positive number of a zipf distribution.")
+
+def _validate_references(tables):
+    """Checks that every ref field references an existing field of a table of the config,
+    references to ref fields aren't followed and nullable keys aren't referenced."""
+    for schema in tables.values():
+        for field in schema.fields:
+            if field.type != "ref":
+                continue
+            (table, name) = field.references.rsplit(".", 1)
+            if table not in tables or name not in tables[table].field_map:
+                raise SchemaParseException("The field {0} references {1}, which isn't a field of a table of the config.".format(
+                    field.name, field.references))
+            if tables[table].field_map[name].type in ("ref", "expr"):
+                raise SchemaParseException("The field {0} references {1}, which is a ref or expr field.".format(
+                    field.name, field.references))
+            # parent keys are regenerated without the null mask of the parent
+            if tables[table].field_map[name].null_ratio:
+                raise SchemaParseException("The field {0} references {1}, which has a null_ratio.".format(
+                    field.name, field.references))
+
+def _validate_unique(type, unique, format):
+    _validate_optional_types("unique", unique, bool)
+    if unique and type != "int" and not (type == "str" and format):
+        raise SchemaParseException("The unique property is only valid for int fields and str fields with a format.")
+
+def _is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+def _validate_distribution(type, distribution, unique):
+    if distribution is None:
+        return
+    _validate_mandatory_types("distribution", distribution, dict)
+    if type not in DISTRIBUTION_DATA_TYPES:
+        raise SchemaParseException("The distribution property is only valid for {0} fields.".format(
+            ", ".join(DISTRIBUTION_DATA_TYPES)))
+    if unique:
+        raise SchemaParseException("The distribution property isn't valid for unique fields.")
+    _validate_mandatory_types("distribution type", distribution.get("type"), str)
+    _validate_names_or_values([distribution["type"]], list(VALID_DISTRIBUTIONS))
+    parameters = VALID_DISTRIBUTIONS[distribution["type"]]
+    _validate_names_or_values(distribution.keys(), ["type"] + parameters)
+    if distribution["type"] == "histogram":
+        (bins, weights) = (distribution.get("bins"), distribution.get("weights"))
+        if (not isinstance(bins, list) or len(bins) < 2 or not all(_is_number(edge) for edge in bins)
+            or any(low >= high for (low, high) in zip(bins, bins[1:]))):
+            raise SchemaParseException("The bins of a histogram distribution must be at least 2 increasing numbers.")
+        if not isinstance(weights, list) or len(weights) != len(bins) - 1:
+            raise SchemaParseException("The weights of a histogram distribution must have one weight per bin.")
+        if not all(_is_number(weight) and weight >= 0 for weight in weights) or sum(weights) <= 0:
+            raise SchemaParseException("The weights of a histogram distribution must be non-negative numbers with a positive sum.")
+        return
+    for parameter in parameters:
+        value = distribution.get(parameter)
+        if value is not None and (not _is_number(value) or (parameter != "mean" and value <= 0)):
+            raise SchemaParseException("The {0} of a {1} distribution must be a {2}number.".format(
+                parameter, distribution["type"], "" if parameter == "mean" else "positive "))
+
+def _validate_null_ratio(null_ratio):
+    if null_ratio is not None and (not _is_number(null_ratio) or not 0 <= null_ratio <= 1):
+        raise SchemaParseException("The null_ratio property must be a number between 0 and 1.")
+
+def _expression_references(expr):
+    """Checks the syntax of the expression of an expr field.
+    Returns:
+        list of the names of the columns the expression references, by name or with col
+    """
+    try:
+        tree = ast.parse(expr.strip(), mode="eval")
+    except SyntaxError as e:
+        raise SchemaParseException("Invalid expression {0}, {1}.".format(expr, e.msg))
+    functions = set()
+    for node in ast.walk(tree):
+        if not isinstance(node, EXPR_NODES):
+            raise SchemaParseException("Invalid expression {0}, {1} isn't supported.".format(expr, type(node).__name__))
+        if isinstance(node, ast.Call):
+            if (not isinstance(node.func, ast.Name) or node.func.id not in VALID_EXPR_FUNCTIONS
+                or node.keywords):
+                raise SchemaParseException("Invalid expression {0}, valid functions are {1} without keyword arguments.".format(
+                    expr, VALID_EXPR_FUNCTIONS))
+            functions.add(id(node.func))
+        if isinstance(node, ast.Constant) and not isinstance(node.value, (str, int, float, type(None))):
+            raise SchemaParseException("Invalid expression {0}, constants must be strings, numbers, booleans or None.".format(expr))
+    references = []
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Name) and id(node) not in functions:
+            references.append(node.id)
+        elif isinstance(node, ast.Call) and node.func.id == "col":
+            if len(node.args) != 1 or not isinstance(node.args[0], ast.Constant) or not isinstance(node.args[0].value, str):
+                raise SchemaParseException("Invalid expression {0}, col takes the name of a column.".format(expr))
+            references.append(node.args[0].value)
+    return list(dict.fromkeys(references))
+
+def _validate_expression(type, expr):
+    if type != "expr":
+        if expr is not None:
+            raise SchemaParseException("The expr property is only valid for expr fields.")
+        return ()
+    _validate_mandatory_types("expr", expr, str)
+    return tuple(_expression_references(expr))
+
+def _order_fields(fields):
+    """Orders fields so expr fields come after the columns they are computed from.
+    Args:
+        fields: tuple of the fields of a table, in record order
+    Returns:
+        tuple of the fields in generation order, fields keep their record order unless
+        they depend on a later field
+    Raises:
+        SchemaParseException if an expr field references an unknown column or fields
+        depend on each other
+    """
+    # output columns of every field, composite_address fields have a column per part
+    columns = {}
+    for field in fields:
+        columns[field.name] = field
+        if field.type == "composite_address":
+            for part in field.values or DEFAULT_ADDRESS_PARTS:
+                columns["{0}_{1}".format(field.name, part)] = field
+    for field in fields:
+        for name in field.dependencies:
+            if name not in columns:
+                raise SchemaParseException("The field {0} references {1}, which isn't a field of the table.".format(
+                    field.name, name))
+    ordered = []
+    done = set()
+    pending = list(fields)
+    while pending:
+        ready = [field for field in pending
+            if all(columns[name].name in done for name in field.dependencies)]
+        if not ready:
+            raise SchemaParseException("The expr fields {0} reference each other in a cycle.".format(
+                ", ".join(field.name for field in pending)))
+        ordered.extend(ready)
+        done.update(field.name for field in ready)
+        pending = [field for field in pending if field.name not in done]
+    return tuple(ordered)
+
 class Error(Exception):
     """Base class for exceptions in this module."""
     pass
@@ -31,7 +219,9 @@ class SchemaParseException(Error):
 class Field(object):
     """Renders details of a field."""
     def __init__(self, name, type, index, min_length=None, 
-        max_length=None, min_value=None, max_value=None, format=None, values=None):
+        max_length=None, min_value=None, max_value=None, format=None, values=None, weights=None,
+        encoding=None, compression=None, references=None, cardinality=None, unique=None,
+        expr=None, distribution=None, null_ratio=None):
         # Ensure valid mandatory arguments name and type
         _validate_mandatory_types("name", name, str)
         _validate_mandatory_types("type", type, str)
@@ -44,6 +234,29 @@ class Field(object):
         _validate_optional_types("max_value", max_value, (int,str))
         _validate_optional_types("format", format, str)
         _validate_optional_types("values", values, list)
+        _validate_optional_types("weights", weights, list)
+        if type == "cat":
+            _validate_mandatory_types("values", values, list)
+        if weights is not None:
+            _validate_weights(type, values, weights)
+        if type == "composite_address" and values:
+            _validate_names_or_values(values, ADDRESS_PARTS)
+        _validate_optional_types("encoding", encoding, str)
+        if encoding is not None:
+            # validate parquet encoding against permitted values
+            _validate_names_or_values([encoding], VALID_PARQUET_ENCODINGS)
+        _validate_optional_types("compression", compression, str)
+        if compression is not None:
+            # validate parquet compression against permitted values
+            _validate_names_or_values([compression], VALID_COMPRESSIONS["parquet"])
+        # validate the referenced field and the cardinality of a ref field
+        _validate_reference(type, references, cardinality)
+        _validate_unique(type, unique, format)
+        # validate the expression of an expr field and find the columns it references
+        dependencies = _validate_expression(type, expr)
+        # validate the distribution of the values and the ratio of null values
+        _validate_distribution(type, distribution, unique)
+        _validate_null_ratio(null_ratio)
 
         # add members
         self._props = {}
@@ -55,6 +268,16 @@ class Field(object):
         self._props['max_value'] = self._max_value = max_value
         self._props['format'] = self._format = format
         self._props['values'] = self._values = values
+        self._props['weights'] = self._weights = weights
+        self._props['encoding'] = self._encoding = encoding
+        self._props['compression'] = self._compression = compression
+        self._props['references'] = self._references = references
+        self._props['cardinality'] = self._cardinality = cardinality
+        self._props['unique'] = self._unique = bool(unique)
+        self._props['expr'] = self._expr = expr
+        self._props['dependencies'] = self._dependencies = dependencies
+        self._props['distribution'] = self._distribution = distribution
+        self._props['null_ratio'] = self._null_ratio = float(null_ratio or 0)
 
     # read-only properties
     @property
@@ -89,6 +312,46 @@ class Field(object):
     def values(self):
         return self._values
     
+    @property
+    def weights(self):
+        return self._weights
+    
+    @property
+    def encoding(self):
+        return self._encoding
+    
+    @property
+    def compression(self):
+        return self._compression
+    
+    @property
+    def references(self):
+        return self._references
+    
+    @property
+    def cardinality(self):
+        return self._cardinality
+    
+    @property
+    def unique(self):
+        return self._unique
+    
+    @property
+    def expr(self):
+        return self._expr
+    
+    @property
+    def dependencies(self):
+        return self._dependencies
+    
+    @property
+    def distribution(self):
+        return self._distribution
+    
+    @property
+    def null_ratio(self):
+        return self._null_ratio
+    
     @property
     def props(self):
         return self._props
@@ -96,7 +359,11 @@ class Field(object):
 class Names(object):
     """Renders details about named fields."""
     
-    def __init__(self, name, output_format, output_rec_cnt, source, seed, output_file):
+    def __init__(self, name, output_format, output_rec_cnt, source, seed, output_file, engine=None,
+        batch_size=None, locale=None, delimiter=None, quoting=None, header=None, compression=None,
+        compression_level=None, partition_by=None, row_group_size=None, max_rows_per_file=None,
+        parquet_version=None, int96_timestamps=None, statistics=None, profile=None,
+        endpoint_url=None):
         # Ensure valid arguments
         _validate_mandatory_types("name", name, str)
         _validate_mandatory_types("output_format", output_format, str)
@@ -108,6 +375,61 @@ class Names(object):
         _validate_names_or_values([source], VALID_SOURCES)
         _validate_mandatory_types("seed", seed, int)
         _validate_mandatory_types("output_file", output_file, str)
+        _validate_optional_types("engine", engine, str)
+        if engine is None:
+            engine = DEFAULT_ENGINE
+        # validate engine against permitted values
+        _validate_names_or_values([engine], VALID_ENGINES)
+        _validate_optional_types("batch_size", batch_size, int)
+        if batch_size is not None and batch_size <= 0:
+            raise SchemaParseException("The batch_size property must be a positive int.")
+        _validate_optional_types("locale", locale, str)
+        _validate_optional_types("delimiter", delimiter, str)
+        if delimiter is None:
+            delimiter = DEFAULT_DELIMITER
+        if len(delimiter) != 1:
+            raise SchemaParseException("The delimiter property must be a single character.")
+        _validate_optional_types("quoting", quoting, str)
+        if quoting is None:
+            quoting = DEFAULT_QUOTING_STYLE
+        # validate quoting style against permitted values
+        _validate_names_or_values([quoting], VALID_QUOTING_STYLES)
+        _validate_optional_types("header", header, bool)
+        if header is None:
+            header = True
+        _validate_optional_types("compression", compression, str)
+        if compression is not None:
+            # validate compression against the values permitted by the output format
+            _validate_names_or_values([compression], VALID_COMPRESSIONS.get(output_format, []))
+        _validate_optional_types("compression_level", compression_level, int)
+        _validate_optional_types("partition_by", partition_by, list)
+        if partition_by and not all(isinstance(column, str) for column in partition_by):
+            raise SchemaParseException("The partition_by property must be a list of field names.")
+        _validate_optional_types("row_group_size", row_group_size, int)
+        if row_group_size is not None and row_group_size <= 0:
+            raise SchemaParseException("The row_group_size property must be a positive int.")
+        _validate_optional_types("max_rows_per_file", max_rows_per_file, int)
+        if max_rows_per_file is not None and max_rows_per_file <= 0:
+            raise SchemaParseException("The max_rows_per_file property must be a positive int.")
+        if row_group_size and max_rows_per_file and row_group_size > max_rows_per_file:
+            raise SchemaParseException("The row_group_size property must not exceed max_rows_per_file.")
+        if (partition_by or max_rows_per_file) and output_format != "parquet":
+            raise SchemaParseException("The partition_by and max_rows_per_file properties are only valid for parquet.")
+        _validate_optional_types("parquet_version", parquet_version, str)
+        if parquet_version is None:
+            parquet_version = DEFAULT_PARQUET_VERSION
+        # validate parquet version against permitted values
+        _validate_names_or_values([parquet_version], VALID_PARQUET_VERSIONS)
+        _validate_optional_types("int96_timestamps", int96_timestamps, bool)
+        if int96_timestamps is None:
+            int96_timestamps = True
+        _validate_optional_types("statistics", statistics, bool)
+        if statistics is None:
+            statistics = True
+        _validate_optional_types("profile", profile, str)
+        if profile is None:
+            profile = DEFAULT_PROFILE
+        _validate_optional_types("endpoint_url", endpoint_url, str)
 
         # add properties
         self._props = {}
@@ -117,6 +439,22 @@ class Names(object):
         self._props['source'] = self._source = source
         self._props['seed'] = self._seed = seed
         self._props['output_file'] = self._output_file = output_file
+        self._props['engine'] = self._engine = engine
+        self._props['batch_size'] = self._batch_size = batch_size
+        self._props['locale'] = self._locale = locale
+        self._props['delimiter'] = self._delimiter = delimiter
+        self._props['quoting'] = self._quoting = quoting
+        self._props['header'] = self._header = header
+        self._props['compression'] = self._compression = compression
+        self._props['compression_level'] = self._compression_level = compression_level
+        self._props['partition_by'] = self._partition_by = partition_by
+        self._props['row_group_size'] = self._row_group_size = row_group_size
+        self._props['max_rows_per_file'] = self._max_rows_per_file = max_rows_per_file
+        self._props['parquet_version'] = self._parquet_version = parquet_version
+        self._props['int96_timestamps'] = self._int96_timestamps = int96_timestamps
+        self._props['statistics'] = self._statistics = statistics
+        self._props['profile'] = self._profile = profile
+        self._props['endpoint_url'] = self._endpoint_url = endpoint_url
 
     # read-only properties
     @property
@@ -143,6 +481,70 @@ class Names(object):
     def output_file(self):
         return self._output_file
 
+    @property
+    def engine(self):
+        return self._engine
+
+    @property
+    def batch_size(self):
+        return self._batch_size
+
+    @property
+    def locale(self):
+        return self._locale
+
+    @property
+    def delimiter(self):
+        return self._delimiter
+
+    @property
+    def quoting(self):
+        return self._quoting
+
+    @property
+    def header(self):
+        return self._header
+
+    @property
+    def compression(self):
+        return self._compression
+
+    @property
+    def compression_level(self):
+        return self._compression_level
+
+    @property
+    def partition_by(self):
+        return self._partition_by
+
+    @property
+    def row_group_size(self):
+        return self._row_group_size
+
+    @property
+    def max_rows_per_file(self):
+        return self._max_rows_per_file
+
+    @property
+    def parquet_version(self):
+        return self._parquet_version
+
+    @property
+    def int96_timestamps(self):
+        return self._int96_timestamps
+
+    @property
+    def statistics(self):
+        return self._statistics
+
+    @property
+    def profile(self):
+        return self._profile
+
+    @property
+    def endpoint_url(self):
+        return self._endpoint_url
+
     @property
     def props(self):
         return self._props
@@ -169,7 +571,16 @@ class Schema(object):
             min_value = field_data.get('min_value', None),
             max_value = field_data.get('max_value', None),
             format = field_data.get('format', None),
-            values = field_data.get('values', None)
+            values = field_data.get('values', None),
+            weights = field_data.get('weights', None),
+            encoding = field_data.get('encoding', None),
+            compression = field_data.get('compression', None),
+            references = field_data.get('references', None),
+            cardinality = field_data.get('cardinality', None),
+            unique = field_data.get('unique', None),
+            expr = field_data.get('expr', None),
+            distribution = field_data.get('distribution', None),
+            null_ratio = field_data.get('null_ratio', None)
         )
 
     @staticmethod
@@ -202,15 +613,28 @@ class Schema(object):
         return MappingProxyType(field_map)
 
     def __init__(self, name=None, output_format=None, output_rec_cnt=None, 
-        source=None, seed=None, output_file=None, fields_data=None):
+        source=None, seed=None, output_file=None, fields_data=None, engine=None, batch_size=None,
+        locale=None, delimiter=None, quoting=None, header=None, compression=None,
+        compression_level=None, partition_by=None, row_group_size=None, max_rows_per_file=None,
+        parquet_version=None, int96_timestamps=None, statistics=None, profile=None,
+        endpoint_url=None):
         # add members
-        names = Names(name, output_format, output_rec_cnt, source, seed, output_file)
+        names = Names(name, output_format, output_rec_cnt, source, seed, output_file, engine,
+            batch_size, locale, delimiter, quoting, header, compression, compression_level,
+            partition_by, row_group_size, max_rows_per_file, parquet_version, int96_timestamps,
+            statistics, profile, endpoint_url)
         fields = Schema._make_field_list(fields_data)
         self._props = {}
         self._props['names'] = self._names = names
         self._props['fields'] = self._fields = tuple(fields)
         field_map = Schema._make_field_map(self._fields)
         self._props['field_map'] = self._field_map = field_map
+        # expr fields are generated after the columns they are computed from
+        self._props['ordered_fields'] = self._ordered_fields = _order_fields(self._fields)
+        # tables ref fields may reference, replaced by the tables of a multi-table config
+        self._props['tables'] = self._tables = MappingProxyType({names.name: self})
+        # validate partition columns against the fields
+        _validate_names_or_values(names.partition_by or [], field_map.keys())
 
     # read-only properties
     @property
@@ -225,6 +649,53 @@ class Schema(object):
     def field_map(self):
         return self._field_map
     
+    @property
+    def ordered_fields(self):
+        return self._ordered_fields
+    
+    @property
+    def tables(self):
+        return self._tables
+    
+    @property
+    def props(self):
+        return self._props
+
+class SchemaSet(object):
+    """Schemas of the tables of a multi-table config, ref fields of a table can reference
+    fields of any table of the set."""
+    def __init__(self, name=None, schemas=None):
+        _validate_optional_types("name", name, str)
+        schemas = tuple(schemas or ())
+        if not schemas:
+            raise SchemaParseException("Schema must have a non-empty tables.")
+        tables = {}
+        for schema in schemas:
+            if schema.names.name in tables:
+                raise SchemaParseException("Duplicate table name {0}.".format(schema.names.name))
+            tables[schema.names.name] = schema
+        tables = MappingProxyType(tables)
+        for schema in schemas:
+            schema._props['tables'] = schema._tables = tables
+        _validate_references(tables)
+        self._props = {}
+        self._props['name'] = self._name = name
+        self._props['schemas'] = self._schemas = schemas
+        self._props['tables'] = self._tables = tables
+
+    # read-only properties
+    @property
+    def name(self):
+        return self._name
+
+    @property
+    def schemas(self):
+        return self._schemas
+
+    @property
+    def tables(self):
+        return self._tables
+
     @property
     def props(self):
         return self._props
@@ -233,9 +704,9 @@ class Schema(object):
 # Module Methods
 #
 
-def make_config_object(json_data):
-    """Build Input Schema from data parsed out of JSON string."""
-    
+def _make_schema(json_data):
+    """Build the Schema of a single table from data parsed out of JSON string."""
+    _validate_mandatory_types("table", json_data, dict)
     #check if only valid named types are provided
     _validate_names_or_values(json_data.keys(), VALID_NAMED_TYPES)
     name = json_data.get('name')
@@ -245,11 +716,43 @@ def make_config_object(json_data):
     seed = json_data.get('seed')
     output_file = json_data.get('output_file')
     fields_data = json_data.get('fields')
+    engine = json_data.get('engine')
+    batch_size = json_data.get('batch_size')
+    locale = json_data.get('locale')
+    delimiter = json_data.get('delimiter')
+    quoting = json_data.get('quoting')
+    header = json_data.get('header')
+    compression = json_data.get('compression')
+    compression_level = json_data.get('compression_level')
+    partition_by = json_data.get('partition_by')
+    row_group_size = json_data.get('row_group_size')
+    max_rows_per_file = json_data.get('max_rows_per_file')
+    parquet_version = json_data.get('parquet_version')
+    int96_timestamps = json_data.get('int96_timestamps')
+    statistics = json_data.get('statistics')
+    profile = json_data.get('profile')
+    endpoint_url = json_data.get('endpoint_url')
 
-    return Schema(name, output_format, output_rec_cnt, source, seed, output_file, fields_data)
+    return Schema(name, output_format, output_rec_cnt, source, seed, output_file, fields_data, engine,
+        batch_size, locale, delimiter, quoting, header, compression, compression_level, partition_by,
+        row_group_size, max_rows_per_file, parquet_version, int96_timestamps, statistics, profile,
+        endpoint_url)
+
+def make_config_object(json_data):
+    """Build Input Schema from data parsed out of JSON string, or a SchemaSet if the config
+    has tables."""
+    if 'tables' in json_data:
+        _validate_names_or_values(json_data.keys(), VALID_CONFIG_NAMED_TYPES)
+        _validate_mandatory_types("tables", json_data.get('tables'), list)
+        return SchemaSet(json_data.get('name'),
+            [_make_schema(table_data) for table_data in json_data['tables']])
+    schema = _make_schema(json_data)
+    # ref fields of a single table config can only reference the table itself
+    _validate_references(schema.tables)
+    return schema
 
 def parse(input_schema_file):
-    """Constructs the Schema from the JSON file."""
+    """Constructs the Schema, or the SchemaSet of a multi-table config, from the JSON file."""
     # parse the JSON
     try:
         schema_file = open(input_schema_file,"r")
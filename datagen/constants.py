@@ -2,12 +2,14 @@ VALID_DATA_TYPES = ["address",
                     "boolean",
                     "cat",
                     "city",
+                    "composite_address",
                     "country",
                     "currency_code",
                     "currency_name",
                     "date",
                     "decimal",
                     "double",
+                    "expr",
                     "float",
                     "first_name",
                     "int",
@@ -15,6 +17,7 @@ VALID_DATA_TYPES = ["address",
                     "last_name",
                     "lorem",
                     "name",
+                    "ref",
                     "state",
                     "str",
                     "street_address",
@@ -28,6 +31,22 @@ VALID_NAMED_TYPES = ["name",
                      "source",
                      "seed",
                      "output_file",
+                     "engine",
+                     "batch_size",
+                     "locale",
+                     "delimiter",
+                     "quoting",
+                     "header",
+                     "compression",
+                     "compression_level",
+                     "partition_by",
+                     "row_group_size",
+                     "max_rows_per_file",
+                     "parquet_version",
+                     "int96_timestamps",
+                     "statistics",
+                     "profile",
+                     "endpoint_url",
                      "fields"
                     ]
 VALID_FIELD_NAMED_TYPES = ["name",
@@ -37,7 +56,112 @@ VALID_FIELD_NAMED_TYPES = ["name",
                            "min_value",
                            "max_value",
                            "values",
-                           "format"
+                           "weights",
+                           "format",
+                           "encoding",
+                           "compression",
+                           "references",
+                           "cardinality",
+                           "unique",
+                           "expr",
+                           "distribution",
+                           "null_ratio"
                            ]
-VALID_OUTPUT_FORMATS = ["parquet", "csv"]
-VALID_SOURCES = ["fake"]
\ No newline at end of file
+# named types of a multi-table config, every entry of tables is a single table config
+VALID_CONFIG_NAMED_TYPES = ["name", "tables"]
+VALID_OUTPUT_FORMATS = ["parquet", "csv", "arrow", "orc", "ndjson"]
+VALID_SOURCES = ["fake"]
+VALID_ENGINES = ["batch", "record"]
+# csv quoting styles, minimal writes unquoted values unless a value needs quotes, as the
+# pandas writer did, the others are the styles of the arrow csv writer
+VALID_QUOTING_STYLES = ["minimal", "needed", "all_valid", "none"]
+DEFAULT_DELIMITER = "|"
+DEFAULT_QUOTING_STYLE = "minimal"
+# compressions supported by the writer of each output format
+VALID_COMPRESSIONS = {"csv": ["gzip", "zstd"],
+                      "parquet": ["none", "snappy", "gzip", "brotli", "lz4", "zstd"],
+                      "orc": ["uncompressed", "snappy", "zlib", "lz4", "zstd"]
+                     }
+VALID_PARQUET_VERSIONS = ["1.0", "2.4", "2.6"]
+DEFAULT_PARQUET_VERSION = "1.0"
+# parquet encodings of a column, dictionary is the default of every column
+VALID_PARQUET_ENCODINGS = ["dictionary",
+                           "plain",
+                           "byte_stream_split",
+                           "delta_binary_packed",
+                           "delta_length_byte_array",
+                           "delta_byte_array"
+                          ]
+DEFAULT_ENGINE = "batch"
+# default bounds of date and timestamp fields, fixed so the output of a config only depends
+# on its seed and not on the day it is generated
+DEFAULT_BOUNDS = {"date": ("1970-01-01", "2025-12-31"),
+                  "timestamp": ("1996-01-01 00:00:00", "2025-12-31 23:59:59")
+                 }
+DEFAULT_PROFILE = "default"
+# data types the batch engine generates as whole numpy arrays
+VECTORIZED_DATA_TYPES = ["boolean",
+                         "date",
+                         "decimal",
+                         "double",
+                         "float",
+                         "int",
+                         "time",
+                         "timestamp"
+                        ]
+# data types the batch engine samples from per locale vocabulary pools or from given values
+POOLED_DATA_TYPES = ["cat",
+                     "city",
+                     "composite_address",
+                     "country",
+                     "currency_code",
+                     "currency_name",
+                     "first_name",
+                     "job",
+                     "last_name",
+                     "name",
+                     "state"
+                    ]
+# parts of a composite_address field, every part is written as its own column
+ADDRESS_PARTS = ["street_address",
+                 "city",
+                 "state_abbr",
+                 "zip_code",
+                 "address"
+                ]
+DEFAULT_ADDRESS_PARTS = ["street_address", "city", "state_abbr", "zip_code"]
+# distributions of the number of child records per parent record of a ref field
+VALID_CARDINALITIES = ["uniform", "fixed", "zipf"]
+DEFAULT_CARDINALITY = "uniform"
+DEFAULT_ZIPF_EXPONENT = 1.0
+# distributions of the values of numeric and temporal fields, with the parameters of each
+VALID_DISTRIBUTIONS = {"normal": ["mean", "stddev"],
+                       "lognormal": ["mean", "sigma"],
+                       "exponential": ["scale"],
+                       "zipf": ["exponent"],
+                       "histogram": ["bins", "weights"]
+                      }
+DISTRIBUTION_DATA_TYPES = ["date", "decimal", "double", "float", "int", "timestamp"]
+# number of most frequent values profiled per column, and maximum number of values of a
+# column profiled as a cat field
+DEFAULT_TOP_K = 20
+# functions of the expressions of expr fields
+VALID_EXPR_FUNCTIONS = ["abs",
+                        "coalesce",
+                        "col",
+                        "concat",
+                        "day",
+                        "float",
+                        "if_else",
+                        "int",
+                        "length",
+                        "lower",
+                        "max",
+                        "min",
+                        "month",
+                        "round",
+                        "str",
+                        "substr",
+                        "upper",
+                        "year"
+                       ]
@@ -0,0 +1,96 @@
+import zlib
+
+import numpy as np
+
+GOLDEN_GAMMA = np.uint64(0x9E3779B97F4A7C15)
+MIX_MULTIPLIER_1 = np.uint64(0xBF58476D1CE4E5B9)
+MIX_MULTIPLIER_2 = np.uint64(0x94D049BB133111EB)
+UINT64_MASK = (1 << 64) - 1
+
+def _mix64(values):
+    """Applies the splitmix64 finalizer to an array of uint64 values."""
+    values = np.asarray(values, dtype=np.uint64)
+    values = (values ^ (values >> np.uint64(30))) * MIX_MULTIPLIER_1
+    values = (values ^ (values >> np.uint64(27))) * MIX_MULTIPLIER_2
+    return values ^ (values >> np.uint64(31))
+
+def zipf_ranks(uniform, num_ranks, exponent):
+    """Maps uniform floats to ranks following a bounded zipf distribution, by inverting the
+    cumulative distribution of the continuous density x ** -exponent on [1, num_ranks + 1).
+    Args:
+        uniform: float array of values in [0, 1)
+        num_ranks: number of ranks
+        exponent: positive exponent of the distribution, rank 0 is the most frequent
+    Returns:
+        int64 array of ranks in [0, num_ranks)
+    """
+    if exponent == 1:
+        values = np.power(float(num_ranks + 1), uniform)
+    else:
+        power = 1.0 - exponent
+        values = np.power(1.0 + uniform * (float(num_ranks + 1) ** power - 1.0), 1.0 / power)
+    return np.clip(values.astype(np.int64) - 1, 0, num_ranks - 1)
+
+def stream_key(name):
+    """Stable 32-bit key of a column name, independent of the python hash seed."""
+    return zlib.crc32(name.encode("utf-8"))
+
+class CounterRNG:
+    """Stateless random number generator keyed on (seed, stream) and addressed by row index.
+
+    Every value is a pure function of (seed, stream, row, draw), so any slice of rows can be
+    generated directly, in any chunk size, order or process, with identical results.
+    """
+    def __init__(self, seed, stream=0):
+        self.seed = seed
+        self.stream = stream
+        with np.errstate(over="ignore"):
+            self.key = int(_mix64(_mix64(seed & UINT64_MASK) ^ np.uint64(stream & UINT64_MASK)))
+
+    def raw(self, rows, draw=0):
+        """Draws uniformly distributed uint64 values.
+        Args:
+            rows: int array of row indices
+            draw: int or int array broadcastable with rows, index of the draw within a row
+        Returns:
+            uint64 array of the broadcast shape of rows and draw
+        """
+        with np.errstate(over="ignore"):
+            draw_key = _mix64(np.uint64(self.key) ^ _mix64(draw))
+            counter = np.asarray(rows).astype(np.uint64) * GOLDEN_GAMMA + draw_key
+            return _mix64(counter)
+
+    def random(self, rows, draw=0):
+        """Draws floats uniformly distributed in [0, 1)."""
+        return (self.raw(rows, draw) >> np.uint64(11)) * (1.0 / (1 << 53))
+
+    def uniform(self, rows, low, high, draw=0):
+        """Draws floats uniformly distributed in [low, high)."""
+        return low + (high - low) * self.random(rows, draw)
+
+    def integers(self, rows, low, high, draw=0):
+        """Draws int64 values uniformly distributed in [low, high], both ends inclusive."""
+        span = high - low + 1
+        if span <= 0:
+            raise ValueError("high must not be lower than low")
+        if span <= 1 << 53:
+            return low + (self.random(rows, draw) * span).astype(np.int64)
+        values = self.raw(rows, draw)
+        if span <= UINT64_MASK:
+            values = values % np.uint64(span)
+        with np.errstate(over="ignore"):
+            return (values + np.uint64(low & UINT64_MASK)).view(np.int64)
+
+    def normal(self, rows, mean=0.0, stddev=1.0, draw=0):
+        """Draws normally distributed floats with the box-muller transform, of the draws
+        draw and draw + 1."""
+        radius = np.sqrt(-2.0 * np.log1p(-self.random(rows, draw)))
+        return mean + stddev * radius * np.cos(2.0 * np.pi * self.random(rows, draw + 1))
+
+    def exponential(self, rows, scale=1.0, draw=0):
+        """Draws exponentially distributed floats of mean scale."""
+        return -scale * np.log1p(-self.random(rows, draw))
+
+    def zipf(self, rows, num_ranks, exponent=1.0, draw=0):
+        """Draws int64 ranks in [0, num_ranks) following a bounded zipf distribution."""
+        return zipf_ranks(self.random(rows, draw), num_ranks, exponent)
@@ -0,0 +1,236 @@
+import os
+import shutil
+import tempfile
+import time
+from collections import namedtuple
+
+from datagen.io_helper import IOHelper, writer_options
+from datagen.metrics import Metrics, peak_rss
+from datagen.plan import compile_schema
+
+# number of records generated and written to measure the cost of a config
+SAMPLE_ROWS = 10000
+# records generated first so one-time costs such as vocabulary pools aren't extrapolated
+WARMUP_ROWS = 100
+# a batch is held as generated values, arrow arrays and encoded output at the same time
+BATCH_MEMORY_FACTOR = 3
+# share of the physical memory of the machine recommendations may use
+MEMORY_FRACTION = 0.5
+MIN_BATCH_SIZE = 10000
+MAX_BATCH_SIZE = 1000000
+# runs estimated to take less than this on a single worker aren't sharded
+MIN_PARALLEL_SECONDS = 10.0
+# throughput of concatenating csv and ndjson parts, other formats are rewritten
+COPY_BYTES_PER_SECOND = 500 << 20
+
+class Error(Exception):
+    """Base class for exceptions in this module."""
+    pass
+
+class Estimate(namedtuple("Estimate", ["rows", "sample_rows", "output_format", "output_file",
+    "setup_seconds", "field_seconds", "write_seconds_per_row", "row_bytes", "output_row_bytes",
+    "base_memory_bytes", "batch_size", "workers", "seconds", "peak_memory_bytes",
+    "recommended_batch_size", "recommended_workers", "recommended_seconds",
+    "recommended_peak_memory_bytes", "cpu_count", "memory_bytes"])):
+    """Predicted cost of running a config, extrapolated from a sample.
+    Attributes:
+        rows: number of records of the config
+        sample_rows: number of records generated and written to measure the costs
+        output_format, output_file: output of the config
+        setup_seconds: one-time cost of creating helpers and loading pools
+        field_seconds: dict of the generation seconds per record of every field
+        write_seconds_per_row: seconds to encode and write a record in the output format
+        row_bytes: in-memory arrow size of a record
+        output_row_bytes: encoded size of a record in the output format
+        base_memory_bytes: resident memory of a process once helpers and pools are loaded
+        batch_size, workers: batch size of the config and number of workers of the run
+        seconds, peak_memory_bytes: predicted wall time and peak memory with them
+        recommended_batch_size, recommended_workers: recommended for the current machine
+        recommended_seconds, recommended_peak_memory_bytes: predicted with the recommendation
+        cpu_count, memory_bytes: cpus and physical memory of the machine, memory is None
+            if unknown
+    """
+    __slots__ = ()
+
+    @property
+    def output_bytes(self):
+        return int(self.output_row_bytes * self.rows)
+
+    def to_dict(self):
+        estimate = self._asdict()
+        estimate["output_bytes"] = self.output_bytes
+        return estimate
+
+#
+# Module Methods
+#
+
+def physical_memory():
+    """Physical memory of the machine in bytes, None if the platform doesn't report it."""
+    try:
+        return os.sysconf("SC_PHYS_PAGES") * os.sysconf("SC_PAGE_SIZE")
+    except (AttributeError, OSError, ValueError):
+        return None
+
+def predict_seconds(estimate_values, workers):
+    """Predicted wall time of a run, sharded runs are assumed to scale linearly with workers
+    and to end with a merge of the parts.
+    Args:
+        estimate_values: dict of the measured entries of an Estimate
+        workers: number of worker processes
+    Returns:
+        seconds
+    """
+    rows = estimate_values["rows"]
+    row_seconds = sum(estimate_values["field_seconds"].values()) + estimate_values["write_seconds_per_row"]
+    seconds = estimate_values["setup_seconds"] + rows * row_seconds / workers
+    if workers > 1:
+        output_bytes = rows * estimate_values["output_row_bytes"]
+        if estimate_values["output_format"] in ("csv", "ndjson"):
+            seconds += output_bytes / COPY_BYTES_PER_SECOND
+        else:
+            seconds += rows * estimate_values["write_seconds_per_row"]
+    return seconds
+
+def predict_memory(estimate_values, batch_size, workers):
+    """Predicted peak resident memory of a run, summed over the processes.
+    Args:
+        estimate_values: dict of the measured entries of an Estimate
+        batch_size: maximum number of records a worker holds in memory
+        workers: number of worker processes
+    Returns:
+        bytes
+    """
+    worker_memory = (estimate_values["base_memory_bytes"]
+        + BATCH_MEMORY_FACTOR * batch_size * estimate_values["row_bytes"])
+    if workers == 1:
+        return int(worker_memory)
+    return int(estimate_values["base_memory_bytes"] + workers * worker_memory)
+
+def recommend(estimate_values, cpu_count, memory_bytes):
+    """Recommends a batch size and a number of workers for the current machine.
+    Runs are sharded over all cpus unless they are short, and batches are as large as the
+    memory of the machine allows, between MIN_BATCH_SIZE and MAX_BATCH_SIZE records.
+    Returns:
+        tuple of batch size and number of workers
+    """
+    rows = estimate_values["rows"]
+    workers = 1
+    if predict_seconds(estimate_values, 1) > MIN_PARALLEL_SECONDS:
+        workers = max(1, min(cpu_count, -(-rows // MIN_BATCH_SIZE)))
+    while True:
+        batch_size = min(MAX_BATCH_SIZE, -(-rows // workers))
+        if memory_bytes is not None:
+            worker_budget = MEMORY_FRACTION * memory_bytes / workers - estimate_values["base_memory_bytes"]
+            fitting = int(worker_budget / (BATCH_MEMORY_FACTOR * max(estimate_values["row_bytes"], 1)))
+            batch_size = min(batch_size, max(fitting, MIN_BATCH_SIZE))
+            if fitting < MIN_BATCH_SIZE and workers > 1:
+                workers -= 1
+                continue
+        return (max(batch_size, 1), workers)
+
+def estimate(schema_parsed, workers=1, sample_rows=SAMPLE_ROWS):
+    """Generates a sample of a config and extrapolates the cost of the whole run.
+    The sample is written with the writer of the output format to a temporary local file,
+    uploads to s3 aren't part of the estimate.
+    Args:
+        schema_parsed: parsed Schema of the config
+        workers: number of worker processes of the run
+        sample_rows: number of records to sample, at most the records of the config
+    Returns:
+        Estimate
+    Raises:
+        Error if the sample cann't be generated or written
+    """
+    names = schema_parsed.names
+    rows = names.output_rec_cnt
+    sample_rows = max(1, min(sample_rows, rows))
+    plan = compile_schema(schema_parsed)
+    started = time.perf_counter()
+    helpers = plan.make_helpers()
+    plan.execute(0, min(WARMUP_ROWS, rows), helpers)
+    setup_seconds = time.perf_counter() - started
+    base_memory_bytes = peak_rss() or 0
+    metrics = Metrics()
+    batch = plan.execute(0, sample_rows, helpers, metrics)
+    fields = metrics.report()["fields"]
+    field_seconds = {name: (stages["generate"]["seconds"] + stages["convert"]["seconds"]) / sample_rows
+        for name, stages in fields.items()}
+    sample_dir = tempfile.mkdtemp()
+    try:
+        location = os.path.join(sample_dir, "sample." + names.output_format)
+        iohelp = IOHelper()
+        started = time.perf_counter()
+        iohelp.write_batches([batch], location, names.output_format, writer_options(schema_parsed))
+        write_seconds = time.perf_counter() - started
+        output_row_bytes = iohelp.output_size(location) / sample_rows
+    except Exception as e:
+        raise Error("Cann't write sample of {0} records, exception {1} occurred.".format(sample_rows, e))
+    finally:
+        shutil.rmtree(sample_dir, ignore_errors=True)
+    values = {"rows": rows,
+              "sample_rows": sample_rows,
+              "output_format": names.output_format,
+              "output_file": names.output_file,
+              "setup_seconds": setup_seconds,
+              "field_seconds": field_seconds,
+              "write_seconds_per_row": write_seconds / sample_rows,
+              "row_bytes": batch.nbytes / sample_rows,
+              "output_row_bytes": output_row_bytes,
+              "base_memory_bytes": base_memory_bytes,
+              "cpu_count": os.cpu_count() or 1,
+              "memory_bytes": physical_memory()
+             }
+    batch_size = min(names.batch_size or rows, -(-rows // workers))
+    (recommended_batch_size, recommended_workers) = recommend(values, values["cpu_count"],
+        values["memory_bytes"])
+    return Estimate(batch_size=batch_size, workers=workers,
+        seconds=predict_seconds(values, workers),
+        peak_memory_bytes=predict_memory(values, batch_size, workers),
+        recommended_batch_size=recommended_batch_size,
+        recommended_workers=recommended_workers,
+        recommended_seconds=predict_seconds(values, recommended_workers),
+        recommended_peak_memory_bytes=predict_memory(values, recommended_batch_size,
+            recommended_workers),
+        **values)
+
+def _format_bytes(size):
+    for unit in ("bytes", "KB", "MB", "GB", "TB"):
+        if size < 1024 or unit == "TB":
+            return "{0:.1f} {1}".format(size, unit) if unit != "bytes" else "{0:.0f} bytes".format(size)
+        size /= 1024.0
+
+def _format_seconds(seconds):
+    if seconds < 60:
+        return "{0:.1f} s".format(seconds)
+    if seconds < 3600:
+        return "{0:.1f} min".format(seconds / 60)
+    return "{0:.1f} h".format(seconds / 3600)
+
+def format_estimate(estimate):
+    """Formats an Estimate as readable lines.
+    Returns:
+        str
+    """
+    lines = ["Estimate for {0:,} records of {1} ({2}), extrapolated from {3:,} records:".format(
+                 estimate.rows, estimate.output_file, estimate.output_format, estimate.sample_rows),
+             "  generation seconds per million records by field:"]
+    width = max((len(name) for name in estimate.field_seconds), default=0)
+    for name, seconds in sorted(estimate.field_seconds.items(), key=lambda item: -item[1]):
+        lines.append("    {0:<{1}}  {2:10.3f}".format(name, width, seconds * 1e6))
+    lines.append("  writing {0} seconds per million records: {1:.3f}".format(estimate.output_format,
+        estimate.write_seconds_per_row * 1e6))
+    lines.append("  setup: {0}".format(_format_seconds(estimate.setup_seconds)))
+    lines.append("  output size: {0} ({1:.1f} bytes per record)".format(
+        _format_bytes(estimate.output_bytes), estimate.output_row_bytes))
+    for (label, batch_size, workers, seconds, memory) in (
+        ("configured", estimate.batch_size, estimate.workers, estimate.seconds,
+            estimate.peak_memory_bytes),
+        ("recommended", estimate.recommended_batch_size, estimate.recommended_workers,
+            estimate.recommended_seconds, estimate.recommended_peak_memory_bytes)):
+        lines.append("  {0}: batch_size {1:,} and {2} worker(s), {3}, peak memory {4}".format(label,
+            batch_size, workers, _format_seconds(seconds), _format_bytes(memory)))
+    if estimate.memory_bytes is not None and estimate.peak_memory_bytes > estimate.memory_bytes:
+        lines.append("  the configured run doesn't fit in the {0} of memory of this machine".format(
+            _format_bytes(estimate.memory_bytes)))
+    return "\n".join(lines)
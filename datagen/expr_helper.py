@@ -0,0 +1,271 @@
+import ast
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+
+# units of the timestamp types per second, integers added to timestamps are seconds
+UNITS_PER_SECOND = {"s": 1, "ms": 1000, "us": 1000000, "ns": 1000000000}
+# arrow functions of the comparison operators
+COMPARISONS = {ast.Eq: pc.equal, ast.NotEq: pc.not_equal, ast.Lt: pc.less,
+               ast.LtE: pc.less_equal, ast.Gt: pc.greater, ast.GtE: pc.greater_equal}
+
+class Error(Exception):
+    """Base class for exceptions in this module."""
+    pass
+
+def _is_string(value):
+    return pa.types.is_string(value.type) or pa.types.is_large_string(value.type)
+
+def _is_temporal(value):
+    return pa.types.is_date(value.type) or pa.types.is_timestamp(value.type)
+
+def _to_string(value):
+    return value if _is_string(value) else pc.cast(value, pa.string())
+
+def _scalar(value):
+    """Arrow scalar of a python constant, built from its buffers because arrow imports
+    pandas the first time it converts python values, which validate doesn't load."""
+    if value is None:
+        return pa.nulls(1)[0]
+    if isinstance(value, str):
+        data = value.encode("utf-8")
+        offsets = pa.py_buffer(np.array([0, len(data)], dtype=np.int32))
+        return pa.Array.from_buffers(pa.string(), 1, [None, offsets, pa.py_buffer(data)])[0]
+    if isinstance(value, bool):
+        return pa.Array.from_buffers(pa.bool_(), 1, [None, pa.py_buffer(bytes([value]))])[0]
+    if isinstance(value, int):
+        return pa.Array.from_buffers(pa.int64(), 1, [None, pa.py_buffer(np.array([value], dtype=np.int64))])[0]
+    if isinstance(value, float):
+        return pa.Array.from_buffers(pa.float64(), 1, [None, pa.py_buffer(np.array([value], dtype=np.float64))])[0]
+    raise Error("Cann't use constant {0!r}, it isn't a number, a string, a boolean or None.".format(value))
+
+# separator of the arrow string joins of + and concat
+EMPTY = _scalar("")
+
+def _constant(value):
+    """Python value of a constant argument, such as the start of substr."""
+    if not isinstance(value, pa.Scalar):
+        raise Error("Cann't use a column where a constant is expected.")
+    return value.as_py()
+
+def _shift(temporal, amount):
+    """Adds a number of days to dates, or of seconds to timestamps."""
+    amount = pc.cast(amount, pa.int64())
+    if pa.types.is_date(temporal.type):
+        days = pc.cast(pc.cast(temporal, pa.date32()), pa.int32())
+        shifted = pc.cast(pc.add(pc.cast(days, pa.int64()), amount), pa.int32())
+        return pc.cast(pc.cast(shifted, pa.date32()), temporal.type)
+    units = pc.multiply(amount, _scalar(UNITS_PER_SECOND[temporal.type.unit]))
+    return pc.cast(pc.add(pc.cast(temporal, pa.int64()), units), temporal.type)
+
+def _difference(left, right):
+    """Number of days between dates, or of seconds between timestamps."""
+    if pa.types.is_date(left.type):
+        days = [pc.cast(pc.cast(pc.cast(value, pa.date32()), pa.int32()), pa.int64())
+            for value in (left, right)]
+        return pc.subtract(days[0], days[1])
+    right = pc.cast(right, left.type)
+    return _floor_divide(pc.subtract(pc.cast(left, pa.int64()), pc.cast(right, pa.int64())),
+        _scalar(UNITS_PER_SECOND[left.type.unit]))
+
+def _modulo(left, right):
+    """Remainder with the sign of the divisor, as python %."""
+    if pa.types.is_integer(left.type) and pa.types.is_integer(right.type):
+        remainder = pc.subtract(left, pc.multiply(right, pc.divide(left, right)))
+        zero = _scalar(0)
+        wrong_sign = pc.and_(pc.not_equal(remainder, zero),
+            pc.not_equal(pc.less(remainder, zero), pc.less(right, zero)))
+        return pc.if_else(wrong_sign, pc.add(remainder, right), remainder)
+    (left, right) = (pc.cast(left, pa.float64()), pc.cast(right, pa.float64()))
+    return pc.subtract(left, pc.multiply(right, pc.floor(pc.divide(left, right))))
+
+def _floor_divide(left, right):
+    if pa.types.is_integer(left.type) and pa.types.is_integer(right.type):
+        return pc.divide(pc.subtract(left, _modulo(left, right)), right)
+    return pc.floor(pc.divide(pc.cast(left, pa.float64()), pc.cast(right, pa.float64())))
+
+def _add(left, right):
+    if _is_string(left) or _is_string(right):
+        return pc.binary_join_element_wise(_to_string(left), _to_string(right), EMPTY)
+    if _is_temporal(left) and pa.types.is_integer(right.type):
+        return _shift(left, right)
+    if _is_temporal(right) and pa.types.is_integer(left.type):
+        return _shift(right, left)
+    return pc.add(left, right)
+
+def _subtract(left, right):
+    if _is_temporal(left) and pa.types.is_integer(right.type):
+        return _shift(left, pc.negate(pc.cast(right, pa.int64())))
+    if _is_temporal(left) and _is_temporal(right):
+        return _difference(left, right)
+    return pc.subtract(left, right)
+
+def _divide(left, right):
+    return pc.divide(pc.cast(left, pa.float64()), pc.cast(right, pa.float64()))
+
+def _substr(value, start, length=None):
+    start = _constant(start)
+    stop = None if length is None else start + _constant(length)
+    return pc.utf8_slice_codeunits(_to_string(value), start, stop)
+
+def _round(value, ndigits=None):
+    return pc.round(value, 0 if ndigits is None else _constant(ndigits))
+
+def _int(value):
+    if pa.types.is_floating(value.type) or pa.types.is_decimal(value.type):
+        value = pc.trunc(value)
+    return pc.cast(value, pa.int64())
+
+# arrow functions of the arithmetic operators
+OPERATORS = {ast.Add: _add, ast.Sub: _subtract, ast.Mult: pc.multiply, ast.Div: _divide,
+             ast.FloorDiv: _floor_divide, ast.Mod: _modulo, ast.Pow: pc.power}
+# arrow functions of the functions of expressions, see VALID_EXPR_FUNCTIONS
+FUNCTIONS = {"abs": pc.abs,
+             "coalesce": pc.coalesce,
+             "concat": lambda *values: pc.binary_join_element_wise(*map(_to_string, values), EMPTY),
+             "day": pc.day,
+             "float": lambda value: pc.cast(value, pa.float64()),
+             "if_else": pc.if_else,
+             "int": _int,
+             "length": lambda value: pc.utf8_length(_to_string(value)),
+             "lower": lambda value: pc.utf8_lower(_to_string(value)),
+             "max": pc.max_element_wise,
+             "min": pc.min_element_wise,
+             "month": pc.month,
+             "round": _round,
+             "str": _to_string,
+             "substr": _substr,
+             "upper": lambda value: pc.utf8_upper(_to_string(value)),
+             "year": pc.year
+            }
+
+def _column(columns, name):
+    if name not in columns:
+        raise Error("Cann't evaluate column {0}, it isn't a column of the table.".format(name))
+    value = columns[name]
+    if isinstance(value, pa.DictionaryArray):
+        value = value.dictionary_decode()
+    return value
+
+def _evaluate(node, columns):
+    if isinstance(node, ast.Expression):
+        return _evaluate(node.body, columns)
+    if isinstance(node, ast.Constant):
+        return _scalar(node.value)
+    if isinstance(node, ast.Name):
+        return _column(columns, node.id)
+    if isinstance(node, ast.BinOp):
+        return OPERATORS[type(node.op)](_evaluate(node.left, columns), _evaluate(node.right, columns))
+    if isinstance(node, ast.UnaryOp):
+        operand = _evaluate(node.operand, columns)
+        if isinstance(node.op, ast.Not):
+            return pc.invert(operand)
+        return pc.negate(operand) if isinstance(node.op, ast.USub) else operand
+    if isinstance(node, ast.BoolOp):
+        combine = pc.and_kleene if isinstance(node.op, ast.And) else pc.or_kleene
+        values = [_evaluate(value, columns) for value in node.values]
+        result = values[0]
+        for value in values[1:]:
+            result = combine(result, value)
+        return result
+    if isinstance(node, ast.Compare):
+        # chained comparisons such as a < b < c hold if every comparison holds
+        operands = [_evaluate(node.left, columns)] + [_evaluate(value, columns) for value in node.comparators]
+        results = [COMPARISONS[type(op)](left, right)
+            for (op, left, right) in zip(node.ops, operands, operands[1:])]
+        result = results[0]
+        for value in results[1:]:
+            result = pc.and_kleene(result, value)
+        return result
+    if isinstance(node, ast.IfExp):
+        return pc.if_else(_evaluate(node.test, columns), _evaluate(node.body, columns),
+            _evaluate(node.orelse, columns))
+    if isinstance(node, ast.Call) and isinstance(node.func, ast.Name):
+        if node.func.id == "col":
+            return _column(columns, _constant(_evaluate(node.args[0], columns)))
+        if node.func.id in FUNCTIONS and not node.keywords:
+            return FUNCTIONS[node.func.id](*[_evaluate(arg, columns) for arg in node.args])
+    raise Error("Cann't evaluate {0}, it isn't a supported expression.".format(type(node).__name__))
+
+def evaluate(expr, columns, num_rows):
+    """Evaluates the expression of an expr field on whole columns with arrow compute
+    functions, operators and functions work as in python on every row, adding integers
+    to dates adds days and to timestamps seconds, subtracting dates gives days and
+    subtracting timestamps seconds.
+    Args:
+        expr: expression, checked by config_parser
+        columns: dict of the arrow arrays of the columns it may reference, indexed by name
+        num_rows: number of rows of the columns
+    Returns:
+        arrow array of num_rows values, constants are repeated
+    """
+    result = _evaluate(ast.parse(expr.strip(), mode="eval"), columns)
+    if isinstance(result, pa.ChunkedArray):
+        result = result.combine_chunks()
+    if isinstance(result, pa.Scalar):
+        result = pa.repeat(result, num_rows)
+    return result
+
+class ExprHelper:
+    """This Class is used to compute expr fields from the other columns of a batch."""
+    def __init__(self, num_records=1000, seed=1000, locale=None):
+        self.num_records = num_records
+        self.seed = seed
+
+    def _evaluate(self, expr, arrow_type, columns, rows):
+        result = evaluate(expr, columns, len(rows))
+        if result.type != arrow_type:
+            result = result.cast(arrow_type)
+        return result
+
+    @staticmethod
+    def compile(data_type, min_length=None, max_length=None,
+        min_value=None, max_value=None, format=None, values=None, weights=None):
+        """expr fields need the types of their columns, they are compiled with compile_expression.
+        Raises:
+            Error always
+        """
+        raise Error("Cann't compile data_type: {0}, expr fields are compiled with compile_expression.".format(data_type))
+
+    @staticmethod
+    def compile_expression(expr, column_types):
+        """Resolves an expression and its arrow type once, by evaluating it on empty columns.
+        Args:
+            expr: expression of the field
+            column_types: dict of the arrow types of the columns it may reference
+        Returns:
+            tuple of generator method name, a tuple of its arguments, and the arrow type of
+            the field
+        Raises:
+            Error if the expression cann't be evaluated on columns of these types
+        """
+        columns = {name: pa.nulls(0, arrow_type) for name, arrow_type in column_types.items()}
+        try:
+            arrow_type = evaluate(expr, columns, 0).type
+        except Exception as e:
+            raise Error("Cann't compile expression {0}, Exception {1} occurred.".format(expr, e))
+        if pa.types.is_null(arrow_type):
+            raise Error("Cann't compile expression {0}, its values are always null.".format(expr))
+        return ("_evaluate", (expr, arrow_type), arrow_type)
+
+    def generate(self, method, args, rows=None, stream=0, columns=None):
+        """Computes a whole expr column from the columns generated before it.
+        Args:
+            method: generator method name returned by compile_expression
+            args: arguments returned by compile_expression
+            rows: int array of row indices to generate, defaults to the first num_records rows
+            stream: unused, expressions don't draw random values
+            columns: dict of the arrow arrays of the columns of the batch, indexed by name
+        Returns:
+            tuple of status and arrow array of computed values
+        Raises:
+            Error if the expression cann't be evaluated
+        """
+        if rows is None:
+            rows = np.arange(self.num_records)
+        try:
+            return_array = getattr(self, method)(*args, columns or {}, np.asarray(rows))
+        except Exception as e:
+            raise Error("Cann't compute data with {0}, Exception {1} occurred.".format(method, e))
+        return (True, return_array)
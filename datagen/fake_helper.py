@@ -1,137 +1,232 @@
-from faker import Faker
-from datetime import datetime
-import re
+from collections import OrderedDict
+from datetime import datetime, time
+import numpy as np
+
+from datagen.constants import DEFAULT_ADDRESS_PARTS
+from datagen.constants import DEFAULT_BOUNDS
+from datagen.counter_rng import CounterRNG
+from datagen.state_cities import STATE_CITIES
+
+# last line of an address and full address built from the parts of an address
+ADDRESS_LINE_FORMAT = "{city}, {state_abbr} {zip_code}"
+ADDRESS_FORMAT = "{street_address}\n" + ADDRESS_LINE_FORMAT
+DATE_FORMAT = "%Y-%m-%d"
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+SECONDS_PER_DAY = 86400
+# data types served by a Faker provider without arguments
+PROVIDERS = {"address": "address",
+             "city": "city",
+             "country": "country",
+             "first_name": "first_name",
+             "job": "job",
+             "last_name": "last_name",
+             "name": "name",
+             "state": "state",
+             "street_address": "street_address",
+             "zip_code": "postcode"
+            }
 
-ADDRESS_FORMAT = re.compile(r'(.*)\\n(.*),?\s+(.*)\s+([\d]*)')
 class Error(Exception):
     """Base class for exceptions in this module."""
     pass
 
+def address_parts(generator):
+    """Generates the parts of a single address. When the locale knows the zip code ranges of
+    its states, the state is drawn first, the city from the STATE_CITIES of the state and the
+    zip code from the range of the state, so the three always match.
+    Args:
+        generator: faker generator of the locale
+    Returns:
+        dict of street_address, city, state_abbr and zip_code
+    """
+    states_postcode = getattr(generator.city.__self__, "states_postcode", None)
+    if states_postcode:
+        state_abbr = generator.random_element(tuple(states_postcode.keys()))
+        zip_code = generator.postcode_in_state(state_abbr)
+    else:
+        state_abbr = generator.state_abbr() if hasattr(generator, "state_abbr") else ""
+        zip_code = generator.postcode()
+    if state_abbr in STATE_CITIES:
+        city = generator.random_element(STATE_CITIES[state_abbr])
+    else:
+        city = generator.city()
+    return {"street_address": generator.street_address(),
+            "city": city,
+            "state_abbr": state_abbr,
+            "zip_code": zip_code
+           }
+
 class FakeHelper:
     """This Class is used to generate fake data."""
-    def __init__(self, num_records=1000,seed=1000):
+    def __init__(self, num_records=1000,seed=1000, locale=None):
+        # faker loads its providers on import, it is imported when a helper is created
+        # so compiling a schema doesn't need it
+        from faker import Faker
         self.num_records = num_records
-        self.faker = Faker()
+        self.faker = Faker(locale)
+        # gives the faker its own random.Random, reseeded for every record by generate
+        self.faker.seed_instance(seed)
         self.seed = seed
-    
-    def _fake_address(self):
-        return ADDRESS_FORMAT.match(repr(self.faker.address())).group
-    
+
     def _fake_boolean(self):
         return self.faker.pybool()
 
+    def _fake_bothify(self, format):
+        return self.faker.bothify(format)
+
+    def _fake_cat(self, values):
+        return self.faker.random_element(elements=values)
+
+    def _fake_weighted_cat(self, elements):
+        return self.faker.random_element(elements=elements)
+
+    def _fake_composite_address(self, parts):
+        address = address_parts(self.faker)
+        address["address"] = ADDRESS_FORMAT.format(**address)
+        return {part: address[part] for part in parts}
+
     def _faker_currency(self):
         return self.faker.currency()
-    
-    def _fake_date(self, min_value, max_value):
-        if min_value is None:
-            date_start = datetime.strptime("1970-01-01", "%Y-%m-%d")
-        else:
-            date_start = datetime.strptime(min_value, "%Y-%m-%d")
-        if max_value is None:
-            date_end = datetime.now()
-        else:
-            date_end = datetime.strptime(max_value, "%Y-%m-%d")
+
+    def _fake_currency_code(self):
+        return self._faker_currency()[0]
+
+    def _fake_currency_name(self):
+        return self._faker_currency()[1]
+
+    def _fake_date(self, date_start, date_end):
         return self.faker.date_between_dates(date_start=date_start, date_end=date_end)
-    
-    def _fake_date_time(self, min_value, max_value):
-        if min_value is None:
-            start_time = '-30y'
-        else:
-            start_time = datetime.strptime(min_value, "%Y-%m-%d %H:%M:%S")
-        if max_value is None:
-            end_time = 'now'
-        else:
-            end_time = datetime.strptime(max_value, "%Y-%m-%d %H:%M:%S")
+
+    def _fake_date_time(self, start_time, end_time):
         return self.faker.date_time_between(start_date=start_time, end_date=end_time)
-    
+
     def _fake_decimal(self, min_value, max_value):
         return self.faker.pydecimal(min_value=min_value, max_value=max_value)
-    
+
     def _fake_float(self, min_value, max_value):
         return self.faker.pyfloat(min_value=min_value, max_value=max_value)
-    
-    def _fake_int(self, min_value, max_value):
 
-        if min_value is None:
-            min_value = 0
-        if max_value is None:
-            max_value = 999
+    def _fake_int(self, min_value, max_value):
         return self.faker.pyint(min_value=min_value, max_value=max_value)
-    
-    def _fake_lorem(self, max_length):
-        if max_length is None:
-            max_length = 3
-        return self.faker.paragraph(nb_sentences=max_length)
-    
-    def _fake_str(self, min_length, max_length, format):
-        
-        if format is None:
-            if max_length is None:
-                max_length = 20
-            return self.faker.pystr(min_chars=min_length, max_chars=max_length)
-        else:
-            return self.faker.bothify(format)
-    
-    def fake_it(self, data_type, min_length=None, max_length=None,
-        min_value=None, max_value=None, format=None, values=None):
-        Faker.seed(self.seed)
+
+    def _fake_lorem(self, nb_sentences, ext_word_list):
+        return self.faker.paragraph(nb_sentences=nb_sentences, ext_word_list=ext_word_list)
+
+    def _fake_none(self):
+        return None
+
+    def _fake_provider(self, provider):
+        return getattr(self.faker, provider)()
+
+    def _fake_time(self):
+        # faker time_object is relative to the current time, the time of day is drawn from
+        # the generator seeded for the row instead
+        seconds = self.faker.random_int(0, SECONDS_PER_DAY - 1)
+        return time(seconds // 3600, seconds // 60 % 60, seconds % 60)
+
+    def _fake_str(self, min_length, max_length):
+        return self.faker.pystr(min_chars=min_length, max_chars=max_length)
+
+    @staticmethod
+    def compile(data_type, min_length=None, max_length=None,
+        min_value=None, max_value=None, format=None, values=None, weights=None):
+        """Resolves a data type and its arguments into a generator method once.
+        Args:
+            data_type: data type of the field
+            min_length, max_length, min_value, max_value, format, values, weights: field arguments
+        Returns:
+            tuple of generator method name and a tuple of its parsed arguments
+        Raises:
+            Error if the arguments cann't be parsed
+        """
+        data_type = data_type.lower()
+        try:
+            if data_type in PROVIDERS:
+                return ("_fake_provider", (PROVIDERS[data_type],))
+            elif data_type == "boolean":
+                return ("_fake_boolean", ())
+            elif data_type == "cat" and weights is not None:
+                return ("_fake_weighted_cat", (OrderedDict(zip(values, weights)),))
+            elif data_type == "cat":
+                return ("_fake_cat", (tuple(values),))
+            elif data_type == "composite_address":
+                return ("_fake_composite_address", (tuple(values or DEFAULT_ADDRESS_PARTS),))
+            elif data_type == "currency_code":
+                return ("_fake_currency_code", ())
+            elif data_type == "currency_name":
+                return ("_fake_currency_name", ())
+            elif data_type == "date":
+                if min_value is None:
+                    min_value = DEFAULT_BOUNDS["date"][0]
+                if max_value is None:
+                    max_value = DEFAULT_BOUNDS["date"][1]
+                date_start = datetime.strptime(min_value, DATE_FORMAT)
+                date_end = datetime.strptime(max_value, DATE_FORMAT)
+                return ("_fake_date", (date_start, date_end))
+            elif data_type in ("decimal", "double", "float", "int"):
+                if min_value is None:
+                    min_value = 0
+                if max_value is None:
+                    max_value = 999
+                method = "_fake_decimal" if data_type == "double" else "_fake_" + data_type
+                return (method, (min_value, max_value))
+            elif data_type == "lorem":
+                if max_length is None:
+                    max_length = 3
+                return ("_fake_lorem", (max_length, values))
+            elif data_type in ("string", "str"):
+                if format is not None:
+                    return ("_fake_bothify", (format,))
+                if max_length is None:
+                    max_length = 20
+                return ("_fake_str", (min_length, max_length))
+            elif data_type == "time":
+                return ("_fake_time", ())
+            elif data_type == "timestamp":
+                # relative bounds such as -30y are resolved by faker on every call, the
+                # bounds are resolved to absolute timestamps once
+                if min_value is None:
+                    min_value = DEFAULT_BOUNDS["timestamp"][0]
+                if max_value is None:
+                    max_value = DEFAULT_BOUNDS["timestamp"][1]
+                start_time = datetime.strptime(min_value, TIMESTAMP_FORMAT)
+                end_time = datetime.strptime(max_value, TIMESTAMP_FORMAT)
+                return ("_fake_date_time", (start_time, end_time))
+            else:
+                return ("_fake_none", ())
+        except Exception as e:
+            raise Error("Cann't compile data_type: {0}, Exception {1} occurred.".format(data_type, e))
+
+    def generate(self, method, args, rows=None, stream=0):
+        """Generates a column by calling a compiled generator method once per record.
+        The random.Random of faker is reseeded for every record from (seed, stream, row), so
+        any slice of rows can be generated on its own.
+        Args:
+            method: generator method name returned by compile
+            args: parsed arguments returned by compile
+            rows: int array of row indices to generate, defaults to the first num_records rows
+            stream: key of the random stream of the column
+        Returns:
+            tuple of status and list of generated values
+        Raises:
+            Error if data cann't be faked
+        """
+        if rows is None:
+            rows = np.arange(self.num_records)
+        row_seeds = CounterRNG(self.seed, stream).raw(rows).tolist()
+        fake = getattr(self, method)
+        reseed = self.faker.random.seed
         return_list = list()
-        status = True
         try:
-            for _ in range(self.num_records):
-                if data_type.lower() == "address":
-                    #return_list.append(self._fake_address()(0))
-                    return_list.append(self.faker.address())
-                elif data_type.lower() == "boolean":
-                    return_list.append(self._fake_boolean())
-                elif data_type.lower() == "cat":
-                    return_list.append(self.faker.random_element(elements=values))
-                elif data_type.lower() == "city":
-                    #return_list.append(self._fake_address()(2))
-                    return_list.append(self.faker.city())
-                elif data_type.lower() == "country":
-                    return_list.append(self.faker.country())
-                elif data_type.lower() == "currency_code":
-                    return_list.append(self._faker_currency()(0))
-                elif data_type.lower() == "currency_name":
-                    return_list.append(self._faker_currency()(1))
-                elif data_type.lower() == "date":
-                    return_list.append(self._fake_date(min_value, max_value))
-                elif data_type.lower() in ("decimal", "double"):
-                    return_list.append(self._fake_decimal(min_value, max_value))
-                elif data_type.lower() == "first_name":
-                    return_list.append(self.faker.first_name())
-                elif data_type.lower() == "float":
-                    return_list.append(self._fake_float(min_value, max_value))
-                elif data_type.lower() == "int":
-                    return_list.append(self._fake_int(min_value, max_value))
-                elif data_type.lower() == "job":
-                    return_list.append(self.faker.job())
-                elif data_type.lower() == "last_name":
-                    return_list.append(self.faker.last_name())
-                elif data_type.lower() == "lorem":
-                    return_list.append(self._fake_lorem(max_length))
-                elif data_type.lower() == "name":
-                    return_list.append(self.faker.name())
-                elif data_type.lower() == "state":
-                    #return_list.append(self._fake_address()(3))
-                    return_list.append(self.faker.state())
-                elif data_type.lower() == "street_address":
-                    #return_list.append(self._fake_address()(1))
-                    return_list.append(self.faker.street_address())
-                elif data_type.lower() in ("string", "str"):
-                    return_list.append(self._fake_str(min_length, max_length, format))
-                elif data_type.lower() == "time":
-                    return_list.append(self.faker.time())
-                elif data_type.lower() == "timestamp":
-                    return_list.append(self._fake_date_time(min_value, max_value))
-                elif data_type.lower() == "zip_code":
-                    #return_list.append(self._fake_address()(4))
-                    return_list.append(self.faker.postcode())
-                else:
-                    return_list.append(None)
+            for row_seed in row_seeds:
+                reseed(row_seed)
+                return_list.append(fake(*args))
         except Exception as e:
-            status = False
-            raise Error("Cann't fake data_type: {0}, Exception {1} occurred.".format(data_type, e))
-        return (status, return_list)
\ No newline at end of file
+            raise Error("Cann't fake data with {0}, Exception {1} occurred.".format(method, e))
+        return (True, return_list)
+
+    def fake_it(self, data_type, min_length=None, max_length=None,
+        min_value=None, max_value=None, format=None, values=None, weights=None):
+        (method, args) = self.compile(data_type, min_length, max_length,
+            min_value, max_value, format, values, weights)
+        return self.generate(method, args)
@@ -1,7 +1,34 @@
+import gzip
+import json
+import os
+import re
+import shutil
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from itertools import chain
 import pyarrow.parquet as pq
+import pyarrow.csv as pacsv
+import pyarrow.ipc as ipc
+import pyarrow.orc as orc
 import pyarrow as pa
-import pandas as pd
-from s3fs.core import S3FileSystem
+import pyarrow.compute as pc
+
+# arrow gzip streams always use level 9, gzip output goes through the gzip module instead
+GZIP_COMPRESSION_LEVEL = 6
+# maximum number of partition directories of a parquet dataset
+MAX_PARTITIONS = 100000
+# size of the parts of s3 multipart uploads and number of parts uploaded at the same time,
+# at most MAX_IN_FLIGHT_PARTS parts are held in memory
+MULTIPART_PART_SIZE = 16 << 20
+MAX_IN_FLIGHT_PARTS = 8
+# size of the blocks csv files are read and parsed in
+CSV_BLOCK_SIZE = 16 << 20
+# default number of records of the batches parquet files are read in
+PARQUET_BATCH_SIZE = 65536
+
+# process-wide cache of s3 filesystems indexed by (process id, profile_name, endpoint_url),
+# handles are not fork safe so worker processes create their own
+_FILE_SYSTEMS = {}
 
 class Error(Exception):
     """Base class for exceptions in this module."""
@@ -10,11 +37,305 @@ class Error(Exception):
 class IOException(Error):
     pass
 
+def get_s3_file_system(profile_name="default", endpoint_url=None):
+    """Creates an s3 filesystem once per process, profile and endpoint.
+    Args:
+        profile_name: aws profile used to access s3
+        endpoint_url: url of an s3 compatible endpoint such as MinIO or moto, aws if None
+    Returns:
+        S3FileSystem
+    """
+    key = (os.getpid(), profile_name, endpoint_url)
+    if key not in _FILE_SYSTEMS:
+        # s3fs pulls in aiobotocore, it is only imported once an s3 location is used
+        from s3fs.core import S3FileSystem
+        _FILE_SYSTEMS[key] = S3FileSystem(anon=False, endpoint_url=endpoint_url,
+            profile=None if profile_name == "default" else profile_name)
+    return _FILE_SYSTEMS[key]
+
+class S3MultipartWriter(object):
+    """Binary file like object uploading an s3 object with a multipart upload.
+
+    Written bytes are cut into parts of part_size bytes uploaded by a pool of threads while
+    the caller keeps writing, writes block while max_in_flight parts are being uploaded.
+    Objects smaller than a part are uploaded with a single request. The time and size of
+    every request are recorded as the upload stage of metrics if given.
+    """
+    def __init__(self, filesystem, output_location, part_size=MULTIPART_PART_SIZE,
+        max_in_flight=MAX_IN_FLIGHT_PARTS, metrics=None):
+        self.filesystem = filesystem
+        self.metrics = metrics
+        self.output_location = output_location
+        (self.bucket, self.key) = filesystem.split_path(output_location)[:2]
+        self.part_size = part_size
+        self.max_in_flight = max_in_flight
+        self.executor = ThreadPoolExecutor(max_workers=max_in_flight)
+        self.buffer = bytearray()
+        self.position = 0
+        self.upload_id = None
+        self.parts = []
+        self.in_flight = set()
+        self.closed = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+    def writable(self):
+        return True
+
+    def seekable(self):
+        return False
+
+    def readable(self):
+        return False
+
+    def tell(self):
+        return self.position
+
+    def flush(self):
+        pass
+
+    def write(self, data):
+        data = memoryview(data).cast("B")
+        self.buffer += data
+        self.position += len(data)
+        while len(self.buffer) >= self.part_size:
+            self._submit_part(bytes(self.buffer[:self.part_size]))
+            del self.buffer[:self.part_size]
+        return len(data)
+
+    def _record_upload(self, started, size):
+        if self.metrics is not None:
+            self.metrics.add("upload", seconds=time.perf_counter() - started, bytes=size)
+
+    def _upload_part(self, part_number, body):
+        started = time.perf_counter()
+        response = self.filesystem.call_s3("upload_part", Bucket=self.bucket, Key=self.key,
+            UploadId=self.upload_id, PartNumber=part_number, Body=body)
+        self._record_upload(started, len(body))
+        return {"ETag": response["ETag"], "PartNumber": part_number}
+
+    def _collect(self, return_when=FIRST_COMPLETED):
+        (done, self.in_flight) = wait(self.in_flight, return_when=return_when)
+        self.parts.extend(future.result() for future in done)
+
+    def _submit_part(self, body):
+        if self.upload_id is None:
+            self.upload_id = self.filesystem.call_s3("create_multipart_upload", Bucket=self.bucket,
+                Key=self.key)["UploadId"]
+        while len(self.in_flight) >= self.max_in_flight:
+            self._collect()
+        part_number = len(self.parts) + len(self.in_flight) + 1
+        self.in_flight.add(self.executor.submit(self._upload_part, part_number, body))
+
+    def close(self):
+        """Uploads the remaining bytes and completes the upload."""
+        if self.closed:
+            return
+        try:
+            if self.upload_id is None:
+                started = time.perf_counter()
+                self.filesystem.pipe_file(self.output_location, bytes(self.buffer))
+                self._record_upload(started, len(self.buffer))
+            else:
+                if self.buffer:
+                    self._submit_part(bytes(self.buffer))
+                if self.in_flight:
+                    self._collect(return_when="ALL_COMPLETED")
+                self.filesystem.call_s3("complete_multipart_upload", Bucket=self.bucket, Key=self.key,
+                    UploadId=self.upload_id,
+                    MultipartUpload={"Parts": sorted(self.parts, key=lambda part: part["PartNumber"])})
+        except Exception:
+            self.abort()
+            raise
+        self.closed = True
+        self.executor.shutdown()
+        self.filesystem.invalidate_cache(self.output_location)
+
+    def abort(self):
+        """Drops the parts uploaded so far, no object is created."""
+        if self.closed:
+            return
+        self.closed = True
+        self.executor.shutdown(cancel_futures=True)
+        if self.upload_id is not None:
+            self.filesystem.call_s3("abort_multipart_upload", Bucket=self.bucket, Key=self.key,
+                UploadId=self.upload_id)
+
+def _format_csv(batch, write_options):
+    """Formats a record batch as csv in memory, arrow releases the GIL so slices of a batch
+    are formatted in parallel threads.
+    Returns:
+        arrow Buffer holding the csv text
+    """
+    sink = pa.BufferOutputStream()
+    pacsv.write_csv(batch, sink, write_options=write_options)
+    return sink.getvalue()
+
+def _needs_quotes(values, delimiter):
+    """Whether a string array or the names of a batch hold the delimiter, a quote or a line break."""
+    pattern = "[{0}\"\r\n]".format(re.escape(delimiter))
+    return pc.any(pc.match_substring_regex(values, pattern)).as_py() is True
+
+def _minimal_quoting(batch, delimiter):
+    """Quoting style of a slice of a batch in minimal quoting, values are only quoted if a
+    string value of the slice holds the delimiter, a quote or a line break.
+    Returns:
+        none or needed
+    """
+    for column in batch.columns:
+        if pa.types.is_dictionary(column.type):
+            column = column.dictionary
+        if (pa.types.is_string(column.type) or pa.types.is_large_string(column.type)) and \
+            _needs_quotes(column, delimiter):
+            return "needed"
+    return "none"
+
+def _compressed_stream(f, compression=None):
+    """Wraps an open binary file into a streaming compressor.
+    Args:
+        f: binary file object to write to
+        compression: gzip, zstd or None to write uncompressed
+    Returns:
+        file like object to write to, closing it flushes the compressor
+    """
+    if compression == "gzip":
+        return gzip.GzipFile(fileobj=f, mode="wb", compresslevel=GZIP_COMPRESSION_LEVEL, mtime=0)
+    if compression is not None:
+        return pa.CompressedOutputStream(f, compression)
+    return f
+
+def _cast_columns(batch, cast):
+    """Applies a conversion to every column of a record batch.
+    Args:
+        batch: arrow record batch
+        cast: function converting an arrow array
+    Returns:
+        arrow record batch of the converted columns
+    """
+    return pa.RecordBatch.from_arrays([cast(column) for column in batch.columns],
+        names=batch.schema.names)
+
+def _orc_column(column):
+    """ORC has no dictionary nor time type, dictionaries are decoded and times written as text."""
+    if pa.types.is_dictionary(column.type):
+        column = column.dictionary_decode()
+    if pa.types.is_time(column.type):
+        column = column.cast(pa.string())
+    return column
+
+def _json_values(column):
+    """Encodes the values of an arrow array as json texts. Dictionaries are decoded, temporal
+    values are written as ISO text and decimals as numbers of their exact digits, json.dumps
+    would write them through float64.
+    Args:
+        column: arrow array
+    Returns:
+        list of json texts, null values are written as null
+    """
+    if pa.types.is_dictionary(column.type):
+        column = column.dictionary_decode()
+    if pa.types.is_decimal(column.type):
+        return ["null" if value is None else value for value in column.cast(pa.string()).to_pylist()]
+    if pa.types.is_temporal(column.type):
+        column = column.cast(pa.string())
+    return [json.dumps(value) for value in column.to_pylist()]
+
+def _parquet_column_options(schema, compression, column_compression=None, column_encoding=None):
+    """Resolves per column compression and encoding into parquet writer arguments.
+    Args:
+        schema: arrow schema of the written batches
+        compression: compression of the columns without their own compression
+        column_compression: dict of compression indexed by column name
+        column_encoding: dict of parquet encoding indexed by column name, these columns are
+            not dictionary encoded
+    Returns:
+        tuple of compression, use_dictionary and column_encoding writer arguments
+    """
+    if column_compression:
+        compression = {name: column_compression.get(name, compression) for name in schema.names}
+    use_dictionary = True
+    if column_encoding:
+        use_dictionary = [name for name in schema.names if name not in column_encoding]
+    return (compression, use_dictionary, column_encoding or None)
+
+def _row_groups(batches, row_group_size):
+    """Regroups record batches or tables into tables of row_group_size records, the last one may
+    be smaller."""
+    pending = []
+    pending_rows = 0
+    for batch in batches:
+        pending.extend(batch.to_batches() if isinstance(batch, pa.Table) else [batch])
+        pending_rows += batch.num_rows
+        while pending_rows >= row_group_size:
+            table = pa.Table.from_batches(pending)
+            yield table.slice(0, row_group_size)
+            rest = table.slice(row_group_size)
+            (pending, pending_rows) = (rest.to_batches(), rest.num_rows)
+    if pending_rows > 0:
+        yield pa.Table.from_batches(pending)
+
+def is_dataset(output_format, writer_options=None):
+    """Whether the output is a directory of parquet files written by the dataset writer.
+    Args:
+        output_format: one of the valid output formats
+        writer_options: keyword arguments of the writer of the output format
+    Returns:
+        True if the output is partitioned or split into files of max_rows_per_file records
+    """
+    writer_options = writer_options or {}
+    return output_format == "parquet" and bool(writer_options.get("partition_by")
+        or writer_options.get("max_rows_per_file"))
+
+def writer_options(schema_parsed):
+    """Keyword arguments of the IOHelper writer of the output format from the named types
+    of a config.
+    Args:
+        schema_parsed: config_parser.Schema of the table
+    Returns:
+        dict of keyword arguments of write_batches
+    """
+    names = schema_parsed.names
+    if names.output_format == "csv":
+        return {"delimiter": names.delimiter,
+                "include_header": names.header,
+                "quoting_style": names.quoting,
+                "compression": names.compression
+               }
+    if names.output_format == "orc" and names.compression:
+        return {"compression": names.compression}
+    if names.output_format != "parquet":
+        return {}
+    options = {"compression": names.compression or "snappy",
+               "compression_level": names.compression_level,
+               "row_group_size": names.row_group_size,
+               "version": names.parquet_version,
+               "use_deprecated_int96_timestamps": names.int96_timestamps,
+               "write_statistics": names.statistics,
+               "column_compression": {field.name: field.compression
+                   for field in schema_parsed.fields if field.compression},
+               "column_encoding": {field.name: field.encoding.upper()
+                   for field in schema_parsed.fields if field.encoding not in (None, "dictionary")}
+              }
+    if names.partition_by:
+        options["partition_by"] = names.partition_by
+    if names.max_rows_per_file:
+        options["max_rows_per_file"] = names.max_rows_per_file
+    return options
+
 class IOHelper:
     """This Class helps with IO operations."""
     
-    def __init__(self, profile_name="default"):
+    def __init__(self, profile_name="default", endpoint_url=None, metrics=None):
         self.profile_name = profile_name
+        self.endpoint_url = endpoint_url
+        self.metrics = metrics
     
     def _determite_file_system(self, filename):
         """Determines file system
@@ -24,11 +345,120 @@ class IOHelper:
             returns s3 if file system is s3, else None
         """
         if filename.startswith("s3://"):
-            s3 = S3FileSystem(anon=False, profile_name=self.profile_name)
-            return s3
+            return get_s3_file_system(self.profile_name, self.endpoint_url)
         else:
             return None
     
+    def _open_output(self, output_location):
+        """Opens an output file for binary writing, s3 objects are written with a parallel
+        multipart upload."""
+        filesystem = self._determite_file_system(output_location)
+        if filesystem is not None:
+            return S3MultipartWriter(filesystem, output_location, metrics=self.metrics)
+        return open(output_location, 'wb')
+
+    def output_size(self, location):
+        """Size of a written file, or of all files of a written directory.
+        Args:
+            location: file or directory location, can be s3/local file system
+        Returns:
+            size in bytes
+        Raises:
+            IOException if the size cann't be read
+        """
+        filesystem = self._determite_file_system(location)
+        try:
+            if filesystem is not None:
+                return filesystem.du(location)
+            if not os.path.isdir(location):
+                return os.path.getsize(location)
+            return sum(os.path.getsize(os.path.join(directory, name))
+                for (directory, _, names) in os.walk(location) for name in names)
+        except Exception as e:
+            raise IOException("Cann't read size of {0}, exception {1} occurred.".format(location, e))
+
+    def makedirs(self, location):
+        """Creates a directory and its parents if they don't exist.
+        Args:
+            location: directory to create, s3 locations need no directories
+        Raises:
+            IOException if the directory cann't be created
+        """
+        if self._determite_file_system(location) is None:
+            try:
+                os.makedirs(location, exist_ok=True)
+            except Exception as e:
+                raise IOException("Cann't create directory {0}, exception {1} occurred.".format(location, e))
+
+    def remove(self, location):
+        """Removes a file or a directory and everything in it if it exists, so a dataset
+        written over a previous one doesn't keep the files the new one doesn't replace.
+        Args:
+            location: file or directory to remove, can be s3/local file system
+        Raises:
+            IOException if the location cann't be removed
+        """
+        filesystem = self._determite_file_system(location)
+        try:
+            if filesystem is not None:
+                filesystem.invalidate_cache(location)
+                if filesystem.exists(location):
+                    filesystem.rm(location, recursive=True)
+            elif os.path.isdir(location):
+                shutil.rmtree(location)
+            elif os.path.exists(location):
+                os.remove(location)
+        except Exception as e:
+            raise IOException("Cann't remove {0}, exception {1} occurred.".format(location, e))
+
+    def read_json(self, location):
+        """Reads a small json file, such as the manifest of a checkpointed run.
+        Args:
+            location: file location, can be s3/local file system
+        Returns:
+            the parsed json, None if the file doesn't exist
+        Raises:
+            IOException if the file cann't be read or parsed
+        """
+        filesystem = self._determite_file_system(location)
+        try:
+            if filesystem is not None:
+                filesystem.invalidate_cache(location)
+                if not filesystem.exists(location):
+                    return None
+                with filesystem.open(location, 'rb') as f:
+                    return json.load(f)
+            if not os.path.exists(location):
+                return None
+            with open(location, 'rb') as f:
+                return json.load(f)
+        except Exception as e:
+            raise IOException("Cann't read json file {0}, exception {1} occurred.".format(location, e))
+
+    def write_json(self, data, location):
+        """Writes a small json file, local files are replaced atomically and s3 objects with a
+        single put, so an interrupted run never leaves a truncated file.
+        Args:
+            data: json serializable data
+            location: file location, can be s3/local file system
+        Raises:
+            IOException if the file cann't be written
+        """
+        filesystem = self._determite_file_system(location)
+        body = json.dumps(data, indent=2).encode("utf-8")
+        try:
+            if filesystem is not None:
+                filesystem.pipe(location, body)
+                return
+            temp_location = location + ".tmp"
+            with open(temp_location, 'wb') as f:
+                f.write(body)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_location, location)
+        except Exception as e:
+            raise IOException("Cann't write json file {0}, exception {1} occurred.".format(location, e))
+
     def read_parquet(self, input_location, columns=None, read_dictionary=None):
         """Reads parquet file as pandas dataframe.
         Args:
@@ -52,6 +482,56 @@ class IOHelper:
             raise IOException("Cann't convert parquet file into pandas df, exception {0} occurred.".format(e))
         return df
     
+    def _open_input(self, input_location):
+        """Opens an input file for binary reading, from s3 or the local file system."""
+        filesystem = self._determite_file_system(input_location)
+        if filesystem is not None:
+            return filesystem.open(input_location, 'rb')
+        return open(input_location, 'rb')
+
+    def _open_csv(self, f, input_location, delimiter, column_types=None):
+        """Opens a streaming csv reader on an input file, gzip files are decompressed while
+        they are read."""
+        if input_location.endswith(".gz"):
+            f = pa.CompressedInputStream(f, "gzip")
+        convert_options = pacsv.ConvertOptions(column_types=column_types, null_values=[""],
+            strings_can_be_null=True)
+        return pacsv.open_csv(f, read_options=pacsv.ReadOptions(block_size=CSV_BLOCK_SIZE),
+            parse_options=pacsv.ParseOptions(delimiter=delimiter), convert_options=convert_options)
+
+    def read_batches(self, input_location, input_format, delimiter="|", batch_size=None):
+        """Reads a parquet or csv file as a stream of arrow record batches, only a batch
+        is held in memory at a time so files larger than memory can be read.
+        Args:
+            input_location: location of the input file, can be s3/local file system
+            input_format: parquet or csv
+            delimiter: single character delimiting csv cells
+            batch_size: maximum number of records of parquet batches, csv files are read
+                in blocks of CSV_BLOCK_SIZE bytes
+        Yields:
+            arrow RecordBatches, csv cells are read as strings and empty cells as nulls
+        Raises:
+            IOException if the file cann't be read
+        """
+        try:
+            if input_format == "parquet":
+                with self._open_input(input_location) as f:
+                    for batch in pq.ParquetFile(f).iter_batches(batch_size=batch_size or PARQUET_BATCH_SIZE):
+                        yield batch
+                return
+            # arrow infers csv types from the first block only, cells are read as strings
+            # so later blocks can't fail to convert, the header is read first for the names
+            with self._open_input(input_location) as f:
+                names = self._open_csv(f, input_location, delimiter).schema.names
+            with self._open_input(input_location) as f:
+                reader = self._open_csv(f, input_location, delimiter,
+                    {name: pa.string() for name in names})
+                for batch in reader:
+                    yield batch
+        except Exception as e:
+            raise IOException("Cann't read {0} file {1}, exception {2} occurred.".format(input_format,
+                input_location, e))
+
     def write_as_csv(self, dataframe_to_persist, output_location, **kwargs):
         """ Persists pandas dataframe as csv file. 
         Args:
@@ -65,7 +545,7 @@ class IOHelper:
         """
         filesystem = self._determite_file_system(output_location)
         try:
-            if isinstance(filesystem, S3FileSystem):
+            if filesystem is not None:
                 with filesystem.open(output_location,'w') as f:
                     dataframe_to_persist.to_csv(f, **kwargs)
             else:
@@ -108,4 +588,380 @@ class IOHelper:
             )
         except Exception as e:
             raise IOException("Cann't persist dataframe as parquet, exception {0} occurred.".format(e))
-        return True
\ No newline at end of file
+        return True
+
+    def write_batches_as_csv(self, batches, output_location, delimiter="|", include_header=True,
+        quoting_style="minimal", compression=None, threads=None):
+        """Persists an iterable of arrow record batches as a single csv file.
+        Every batch is split into one slice per thread, slices are formatted in parallel by the
+        arrow csv writer and appended in order, the header is written once. In minimal
+        quoting, slices without a string value that needs quotes are written unquoted, as
+        the pandas writer wrote them, other slices quote their strings.
+        Args:
+            batches: iterable of arrow record batches sharing the same schema
+            output_location: output file location, can be s3/local file system
+            delimiter: character delimiting individual cells
+            include_header: whether to write the column names as first line
+            quoting_style: minimal, needed, all_valid or none, how values are quoted
+            compression: gzip or zstd to compress the file while it is written, None for plain csv
+            threads: number of formatting threads, defaults to the arrow cpu count
+        Returns:
+            status of write operation
+        Raises:
+            IOException if batches cann't be persisted as csv
+        """
+        threads = threads or pa.cpu_count()
+        styles = ("none", "needed") if quoting_style == "minimal" else (quoting_style,)
+        write_options = {style: pacsv.WriteOptions(include_header=False, delimiter=delimiter,
+            quoting_style=style) for style in styles}
+        header_options = {style: pacsv.WriteOptions(include_header=True, delimiter=delimiter,
+            quoting_style=style) for style in styles}
+        def slice_options(batch):
+            if quoting_style != "minimal":
+                return write_options[quoting_style]
+            return write_options[_minimal_quoting(batch, delimiter)]
+        try:
+            with self._open_output(output_location) as f, ThreadPoolExecutor(max_workers=threads) as executor:
+                out = _compressed_stream(f, compression)
+                for batch in batches:
+                    if include_header:
+                        names = batch.schema.names
+                        if quoting_style == "minimal" and not _needs_quotes(
+                            pa.array(names, type=pa.string()), delimiter):
+                            # the arrow csv writer always quotes the column names
+                            out.write((delimiter.join(names) + "\n").encode("utf-8"))
+                        else:
+                            style = "needed" if quoting_style == "minimal" else quoting_style
+                            out.write(_format_csv(batch.slice(0, 0), header_options[style]))
+                        include_header = False
+                    slice_size = max(-(-batch.num_rows // threads), 1)
+                    slices = [batch.slice(offset, slice_size)
+                        for offset in range(0, batch.num_rows, slice_size)]
+                    for chunk in executor.map(_format_csv, slices, map(slice_options, slices)):
+                        out.write(chunk)
+                out.close()
+        except Exception as e:
+            raise IOException("Cann't persist batches as csv, exception {0} occurred.".format(e))
+        return True
+
+    def write_batches_as_parquet(self, batches, output_location,
+        compression="snappy", coerce_timestamps="ms", flavor="spark", version="1.0",
+        allow_truncated_timestamps=True, use_deprecated_int96_timestamps=True,
+        compression_level=None, row_group_size=None, column_compression=None,
+        column_encoding=None, write_statistics=True):
+        """Persists an iterable of arrow record batches as a single parquet file.
+        A long-lived parquet writer appends every batch as its own row group, or batches are
+        regrouped into row groups of row_group_size records.
+        Args:
+            batches: iterable of arrow record batches sharing the same schema
+            output_location: file name to write
+            compression, coerce_timestamps, allow_truncated_timestamps, flavor,
+            use_deprecated_int96_timestamps: same as write_as_parquet
+            version: parquet format version, 1.0, 2.4 or 2.6
+            compression_level: level of the compression codec, codec default if None
+            row_group_size: number of records per row group, one row group per batch if None
+            column_compression: dict of compression indexed by column name
+            column_encoding: dict of parquet encoding indexed by column name, for example
+                PLAIN or DELTA_BINARY_PACKED, other columns are dictionary encoded
+            write_statistics: whether to write column chunk statistics and page indexes
+        Returns:
+            status of write operation
+        Raises:
+            IOException if batches cann't be persisted as parquet
+        """
+        writer = None
+        if row_group_size:
+            batches = _row_groups(batches, row_group_size)
+        try:
+            with self._open_output(output_location) as f:
+                for batch in batches:
+                    if writer is None:
+                        (column_compressions, use_dictionary, column_encodings) = _parquet_column_options(
+                            batch.schema, compression, column_compression, column_encoding)
+                        writer = pq.ParquetWriter(
+                            where=f,
+                            schema=batch.schema,
+                            compression=column_compressions,
+                            compression_level=compression_level,
+                            use_dictionary=use_dictionary,
+                            column_encoding=column_encodings,
+                            write_statistics=write_statistics,
+                            write_page_index=write_statistics,
+                            coerce_timestamps=coerce_timestamps,
+                            allow_truncated_timestamps=allow_truncated_timestamps,
+                            version=version,
+                            flavor=flavor,
+                            use_deprecated_int96_timestamps=use_deprecated_int96_timestamps
+                        )
+                    if isinstance(batch, pa.Table):
+                        writer.write_table(batch, row_group_size=row_group_size)
+                    else:
+                        writer.write_batch(batch)
+                if writer is not None:
+                    writer.close()
+        except Exception as e:
+            raise IOException("Cann't persist batches as parquet, exception {0} occurred.".format(e))
+        return True
+
+    def write_batches_as_parquet_dataset(self, batches, output_location, partition_by=None,
+        max_rows_per_file=None, basename_template="part-{i}.parquet", compression="snappy",
+        coerce_timestamps="ms", version="1.0", allow_truncated_timestamps=True,
+        use_deprecated_int96_timestamps=True, compression_level=None, row_group_size=None,
+        column_compression=None, column_encoding=None, write_statistics=True):
+        """Persists an iterable of arrow record batches as a parquet dataset directory.
+        Records are split into hive style partition directories, for example period_dt=2020-01-01,
+        and into files of at most max_rows_per_file records.
+        Args:
+            batches: iterable of arrow record batches sharing the same schema
+            output_location: dataset directory, can be s3/local file system
+            partition_by: list of column names to partition by
+            max_rows_per_file: maximum number of records per file, unlimited if None
+            basename_template: file name template, {i} is replaced by the file number
+            compression, coerce_timestamps, version, allow_truncated_timestamps,
+            use_deprecated_int96_timestamps, compression_level, row_group_size,
+            column_compression, column_encoding, write_statistics: same as write_batches_as_parquet
+        Returns:
+            status of write operation
+        Raises:
+            IOException if batches cann't be persisted as a parquet dataset
+        """
+        # pyarrow.dataset imports pandas, it is only loaded when a dataset is written
+        import pyarrow.dataset as ds
+        batches = iter(batches)
+        first = next(batches, None)
+        if first is None:
+            return True
+        try:
+            (column_compressions, use_dictionary, column_encodings) = _parquet_column_options(
+                first.schema, compression, column_compression, column_encoding)
+            file_options = ds.ParquetFileFormat().make_write_options(
+                compression=column_compressions,
+                compression_level=compression_level,
+                use_dictionary=use_dictionary,
+                column_encoding=column_encodings,
+                write_statistics=write_statistics,
+                write_page_index=write_statistics,
+                coerce_timestamps=coerce_timestamps,
+                allow_truncated_timestamps=allow_truncated_timestamps,
+                version=version,
+                use_deprecated_int96_timestamps=use_deprecated_int96_timestamps
+            )
+            ds.write_dataset(chain([first], batches), output_location,
+                schema=first.schema,
+                format="parquet",
+                file_options=file_options,
+                filesystem=self._determite_file_system(output_location),
+                partitioning=partition_by or None,
+                partitioning_flavor="hive" if partition_by else None,
+                basename_template=basename_template,
+                max_rows_per_file=max_rows_per_file,
+                min_rows_per_group=row_group_size or 0,
+                max_rows_per_group=row_group_size,
+                max_partitions=MAX_PARTITIONS,
+                preserve_order=True,
+                existing_data_behavior="overwrite_or_ignore"
+            )
+        except Exception as e:
+            raise IOException("Cann't persist batches as parquet dataset, exception {0} occurred.".format(e))
+        return True
+
+    def write_batches_as_arrow(self, batches, output_location):
+        """Persists an iterable of arrow record batches as a single arrow IPC file.
+        The file is uncompressed, also readable as feather, and can be memory mapped so
+        consumers read it without copies or deserialization.
+        Args:
+            batches: iterable of arrow record batches sharing the same schema
+            output_location: output file location, can be s3/local file system
+        Returns:
+            status of write operation
+        Raises:
+            IOException if batches cann't be persisted as arrow
+        """
+        writer = None
+        try:
+            with self._open_output(output_location) as f:
+                for batch in batches:
+                    if writer is None:
+                        writer = ipc.new_file(f, batch.schema)
+                    writer.write_batch(batch)
+                if writer is not None:
+                    writer.close()
+        except Exception as e:
+            raise IOException("Cann't persist batches as arrow, exception {0} occurred.".format(e))
+        return True
+
+    def write_batches_as_orc(self, batches, output_location, compression="zstd"):
+        """Persists an iterable of arrow record batches as a single orc file.
+        Every batch is appended as soon as it is produced, dictionary columns are decoded and
+        times written as text.
+        Args:
+            batches: iterable of arrow record batches sharing the same schema
+            output_location: output file location, can be s3/local file system
+            compression: algorithm to use to compress the orc file, valid values - uncompressed,
+                snappy, zlib, lz4, zstd
+        Returns:
+            status of write operation
+        Raises:
+            IOException if batches cann't be persisted as orc
+        """
+        writer = None
+        try:
+            with self._open_output(output_location) as f:
+                for batch in batches:
+                    if writer is None:
+                        writer = orc.ORCWriter(f, compression=compression)
+                    writer.write(pa.Table.from_batches([_cast_columns(batch, _orc_column)]))
+                if writer is not None:
+                    writer.close()
+        except Exception as e:
+            raise IOException("Cann't persist batches as orc, exception {0} occurred.".format(e))
+        return True
+
+    def write_batches_as_ndjson(self, batches, output_location):
+        """Persists an iterable of arrow record batches as newline delimited json, one object
+        per record. Every batch is encoded from its arrow values, without a pandas round
+        trip, and appended as soon as it is produced.
+        Args:
+            batches: iterable of arrow record batches sharing the same schema
+            output_location: output file location, can be s3/local file system
+        Returns:
+            status of write operation
+        Raises:
+            IOException if batches cann't be persisted as ndjson
+        """
+        try:
+            with self._open_output(output_location) as f:
+                for batch in batches:
+                    if batch.num_rows == 0:
+                        continue
+                    keys = [json.dumps(name) + ":" for name in batch.schema.names]
+                    columns = [_json_values(column) for column in batch.columns]
+                    lines = "".join("{" + ",".join(map(str.__add__, keys, values)) + "}\n"
+                        for values in zip(*columns))
+                    f.write(lines.encode("utf-8"))
+        except Exception as e:
+            raise IOException("Cann't persist batches as ndjson, exception {0} occurred.".format(e))
+        return True
+
+    def write_batches(self, batches, output_location, output_format, writer_options=None):
+        """Persists an iterable of arrow record batches with the writer of an output format.
+        Args:
+            batches: iterable of arrow record batches sharing the same schema
+            output_location: output file location, can be s3/local file system
+            output_format: one of the valid output formats
+            writer_options: keyword arguments of the writer of the output format
+        Returns:
+            status of write operation
+        """
+        writer_options = writer_options or {}
+        if is_dataset(output_format, writer_options):
+            return self.write_batches_as_parquet_dataset(batches, output_location, **writer_options)
+        if output_format == "parquet":
+            return self.write_batches_as_parquet(batches, output_location, **writer_options)
+        if output_format == "arrow":
+            return self.write_batches_as_arrow(batches, output_location, **writer_options)
+        if output_format == "orc":
+            return self.write_batches_as_orc(batches, output_location, **writer_options)
+        if output_format == "ndjson":
+            return self.write_batches_as_ndjson(batches, output_location)
+        return self.write_batches_as_csv(batches, output_location, **writer_options)
+
+    def merge_csv(self, input_locations, output_location, skip_header=True):
+        """Concatenates local csv files into a single csv file, keeping only the first header.
+        Args:
+            input_locations: ordered list of local csv files with a header line
+            output_location: output file location, can be s3/local file system
+            skip_header: whether to drop the first line of every file but the first, files
+                are concatenated byte for byte otherwise, so compressed files can be merged
+        Returns:
+            status of write operation
+        Raises:
+            IOException if csv files cann't be merged
+        """
+        try:
+            with self._open_output(output_location) as f:
+                for index, input_location in enumerate(input_locations):
+                    with open(input_location, 'rb') as part:
+                        if skip_header and index > 0:
+                            part.readline()
+                        shutil.copyfileobj(part, f)
+        except Exception as e:
+            raise IOException("Cann't merge csv files, exception {0} occurred.".format(e))
+        return True
+
+    def merge_parquet(self, input_locations, output_location, **writer_options):
+        """Concatenates local parquet files into a single parquet file one row group at a time.
+        Args:
+            input_locations: ordered list of local parquet files sharing the same schema
+            output_location: file name to write
+            writer_options: keyword arguments of write_batches_as_parquet
+        Returns:
+            status of write operation
+        Raises:
+            IOException if parquet files cann't be merged
+        """
+        try:
+            parts = (pq.ParquetFile(input_location) for input_location in input_locations)
+            self.write_batches_as_parquet((part.read_row_group(row_group) for part in parts
+                for row_group in range(part.num_row_groups)), output_location, **writer_options)
+        except Exception as e:
+            raise IOException("Cann't merge parquet files, exception {0} occurred.".format(e))
+        return True
+
+    def merge_arrow(self, input_locations, output_location):
+        """Concatenates local arrow IPC files into a single arrow IPC file one batch at a time,
+        parts are memory mapped.
+        Args:
+            input_locations: ordered list of local arrow files sharing the same schema
+            output_location: output file location, can be s3/local file system
+        Returns:
+            status of write operation
+        Raises:
+            IOException if arrow files cann't be merged
+        """
+        try:
+            parts = (ipc.open_file(pa.memory_map(input_location)) for input_location in input_locations)
+            self.write_batches_as_arrow((part.get_batch(index) for part in parts
+                for index in range(part.num_record_batches)), output_location)
+        except Exception as e:
+            raise IOException("Cann't merge arrow files, exception {0} occurred.".format(e))
+        return True
+
+    def merge_orc(self, input_locations, output_location, compression="zstd"):
+        """Concatenates local orc files into a single orc file one stripe at a time.
+        Args:
+            input_locations: ordered list of local orc files sharing the same schema
+            output_location: output file location, can be s3/local file system
+            compression: same as write_batches_as_orc
+        Returns:
+            status of write operation
+        Raises:
+            IOException if orc files cann't be merged
+        """
+        try:
+            parts = (orc.ORCFile(input_location) for input_location in input_locations)
+            self.write_batches_as_orc((part.read_stripe(stripe) for part in parts
+                for stripe in range(part.nstripes)), output_location, compression)
+        except Exception as e:
+            raise IOException("Cann't merge orc files, exception {0} occurred.".format(e))
+        return True
+
+    def merge_parts(self, input_locations, output_location, output_format, writer_options=None):
+        """Merges local part files of an output format into a single file.
+        Args:
+            input_locations: ordered list of local part files
+            output_location: output file location, can be s3/local file system
+            output_format: one of the valid output formats
+            writer_options: keyword arguments of the writer of the output format
+        Returns:
+            status of write operation
+        """
+        writer_options = writer_options or {}
+        if output_format == "parquet":
+            return self.merge_parquet(input_locations, output_location, **writer_options)
+        if output_format == "arrow":
+            return self.merge_arrow(input_locations, output_location)
+        if output_format == "orc":
+            return self.merge_orc(input_locations, output_location, **writer_options)
+        # csv parts after the first and ndjson parts have no header
+        return self.merge_csv(input_locations, output_location, skip_header=False)
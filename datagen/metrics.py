@@ -0,0 +1,172 @@
+import sys
+import threading
+import time
+
+try:
+    import resource
+except ImportError:
+    # not available on windows, peak rss is reported as None
+    resource = None
+
+# stages of a run in the order they are reported
+STAGES = ["parse", "generate", "convert", "write", "upload"]
+
+def peak_rss(children=False):
+    """Peak resident set size of the process, or of its terminated child processes.
+    Args:
+        children: whether to read the peak of the child processes, such as shard workers
+    Returns:
+        peak resident set size in bytes, None if the platform doesn't report it
+    """
+    if resource is None:
+        return None
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN if children else resource.RUSAGE_SELF)
+    # macos reports bytes, other platforms kilobytes
+    return usage.ru_maxrss if sys.platform == "darwin" else usage.ru_maxrss * 1024
+
+def _max_rss(first, second):
+    if first is None or second is None:
+        return first if second is None else second
+    return max(first, second)
+
+def _rate(amount, seconds):
+    return round(amount / seconds, 1) if amount and seconds > 0 else None
+
+class StageMetrics(object):
+    """Totals of a stage, or of a stage of a single field.
+    Attributes:
+        seconds: wall time spent in the stage, summed over batches, threads and workers
+        rows: number of records processed
+        bytes: number of bytes produced
+        peak_rss_bytes: peak resident set size of the processes when the stage last ran
+    """
+    __slots__ = ("seconds", "rows", "bytes", "peak_rss_bytes")
+
+    def __init__(self, seconds=0.0, rows=0, bytes=0, peak_rss_bytes=None):
+        self.seconds = seconds
+        self.rows = rows
+        self.bytes = bytes
+        self.peak_rss_bytes = peak_rss_bytes
+
+    def __getstate__(self):
+        return (self.seconds, self.rows, self.bytes, self.peak_rss_bytes)
+
+    def __setstate__(self, state):
+        (self.seconds, self.rows, self.bytes, self.peak_rss_bytes) = state
+
+    def merge(self, other):
+        self.seconds += other.seconds
+        self.rows += other.rows
+        self.bytes += other.bytes
+        self.peak_rss_bytes = _max_rss(self.peak_rss_bytes, other.peak_rss_bytes)
+
+    def to_dict(self):
+        return {"seconds": round(self.seconds, 6),
+                "rows": self.rows,
+                "bytes": self.bytes,
+                "rows_per_second": _rate(self.rows, self.seconds),
+                "bytes_per_second": _rate(self.bytes, self.seconds),
+                "peak_rss_bytes": self.peak_rss_bytes
+               }
+
+class Metrics(object):
+    """Collects wall time, rows, bytes and peak rss of a run per stage and per field.
+
+    Metrics are recorded from writer and upload threads, and are pickled back from shard
+    workers and merged into the metrics of the run.
+    """
+    def __init__(self):
+        self._stages = {}
+        self._started = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def __getstate__(self):
+        return (self._stages, self._started)
+
+    def __setstate__(self, state):
+        (self._stages, self._started) = state
+        self._lock = threading.Lock()
+
+    def add(self, stage, field=None, seconds=0.0, rows=0, bytes=0):
+        """Adds the work of a stage.
+        Args:
+            stage: one of STAGES
+            field: name of the field the work belongs to, None for the whole record
+            seconds: wall time spent
+            rows: number of records processed
+            bytes: number of bytes produced
+        """
+        record = StageMetrics(seconds, rows, bytes, peak_rss())
+        with self._lock:
+            self._stages.setdefault((stage, field), StageMetrics()).merge(record)
+
+    def add_remainder(self, stage, seconds, rows=0, bytes=0, nested=("generate", "convert")):
+        """Adds the work of a stage that drove nested stages, such as a writer pulling lazily
+        generated batches, less the time recorded so far by the nested stages.
+        Args:
+            stage: one of STAGES
+            seconds: wall time spent in the stage and its nested stages
+            rows: number of records processed
+            bytes: number of bytes produced
+            nested: stages that ran within the stage
+        """
+        seconds -= sum(self.total(name).seconds for name in nested)
+        self.add(stage, seconds=max(seconds, 0.0), rows=rows, bytes=bytes)
+
+    def merge(self, other, prefix=None):
+        """Adds the metrics of another run, such as a shard worker or a table of a config.
+        Args:
+            other: Metrics to add
+            prefix: optional prefix of the field names of other, such as the table name
+        """
+        with self._lock:
+            for (stage, field), record in other._stages.items():
+                if prefix is not None and field is not None:
+                    field = prefix + field
+                self._stages.setdefault((stage, field), StageMetrics()).merge(record)
+
+    def total(self, stage):
+        """StageMetrics of a stage summed over all fields, every field processes the same
+        records so rows are the rows of a single field."""
+        totals = StageMetrics()
+        rows = 0
+        with self._lock:
+            for (name, _), record in self._stages.items():
+                if name == stage:
+                    totals.merge(record)
+                    rows = max(rows, record.rows)
+        totals.rows = rows
+        return totals
+
+    def report(self, **info):
+        """Run report as a json serializable dict.
+        Args:
+            info: entries describing the run, such as the config and the output file
+        Returns:
+            dict of the run info, the wall time and peak rss of the run, totals per stage
+            and metrics per field and stage
+        """
+        fields = {}
+        with self._lock:
+            for (stage, field), record in sorted(self._stages.items(),
+                key=lambda item: STAGES.index(item[0][0])):
+                if field is not None:
+                    fields.setdefault(field, {})[stage] = record.to_dict()
+        report = dict(info)
+        report["wall_seconds"] = round(time.perf_counter() - self._started, 6)
+        report["peak_rss_bytes"] = _max_rss(peak_rss(), peak_rss(children=True))
+        report["stages"] = {stage: self.total(stage).to_dict() for stage in STAGES}
+        report["fields"] = fields
+        return report
+
+    def log(self, logger):
+        """Logs the totals of every stage and the metrics of every field at debug level."""
+        report = self.report()
+        for stage, record in report["stages"].items():
+            logger.debug("stage %s: %.3f s, %s rows/s, %s bytes, peak rss %s bytes", stage,
+                record["seconds"], record["rows_per_second"], record["bytes"], record["peak_rss_bytes"])
+        for field, stages in report["fields"].items():
+            for stage, record in stages.items():
+                logger.debug("field %s %s: %.3f s, %s rows/s, %s bytes", field, stage,
+                    record["seconds"], record["rows_per_second"], record["bytes"])
+        logger.debug("run: %.3f s, peak rss %s bytes", report["wall_seconds"], report["peak_rss_bytes"])
@@ -0,0 +1,228 @@
+import numpy as np
+from datetime import datetime
+
+from datagen.constants import DEFAULT_BOUNDS
+from datagen.constants import DEFAULT_ZIPF_EXPONENT
+from datagen.counter_rng import CounterRNG
+
+DATE_FORMAT = "%Y-%m-%d"
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+DECIMAL_SCALE = 2
+SECONDS_PER_DAY = 86400
+MILLIS_PER_SECOND = 1000
+# draw of the values of a distribution, histograms draw the bin and the value in the bin
+DISTRIBUTION_DRAW = 0
+# int values of unbounded distributions are clipped to the exactly representable floats
+INT_LIMIT = float(1 << 53)
+
+class Error(Exception):
+    """Base class for exceptions in this module."""
+    pass
+
+class NumpyHelper:
+    """This Class is used to generate fake data as numpy arrays, one call per column."""
+    def __init__(self, num_records=1000, seed=1000, locale=None):
+        self.num_records = num_records
+        self.seed = seed
+        self.rng = CounterRNG(seed)
+
+    def _fake_boolean(self, rows):
+        return self.rng.random(rows) < 0.5
+
+    def _fake_date(self, start, days, rows):
+        return start + self.rng.integers(rows, 0, days)
+
+    def _fake_date_time(self, start, millis, rows):
+        return start + self.rng.integers(rows, 0, millis)
+
+    def _fake_decimal(self, min_value, max_value, rows):
+        return np.round(self._fake_float(min_value, max_value, rows), DECIMAL_SCALE)
+
+    def _fake_float(self, min_value, max_value, rows):
+        return self.rng.uniform(rows, min_value, max_value)
+
+    def _fake_int(self, min_value, max_value, rows):
+        return self.rng.integers(rows, min_value, max_value)
+
+    def _sample(self, distribution, parameters, rows):
+        """Draws floats of a distribution with its compiled parameters."""
+        if distribution == "normal":
+            return self.rng.normal(rows, *parameters, draw=DISTRIBUTION_DRAW)
+        if distribution == "lognormal":
+            return np.exp(self.rng.normal(rows, *parameters, draw=DISTRIBUTION_DRAW))
+        if distribution == "exponential":
+            return self.rng.exponential(rows, *parameters, draw=DISTRIBUTION_DRAW)
+        if distribution == "zipf":
+            return self.rng.zipf(rows, *parameters, draw=DISTRIBUTION_DRAW).astype(np.float64)
+        # histogram, a bin is picked by its weight and the value is uniform within the bin
+        (edges, cumulative) = parameters
+        bins = np.searchsorted(cumulative, self.rng.random(rows, DISTRIBUTION_DRAW), side="right")
+        (low, high) = (edges[bins], edges[bins + 1])
+        return low + (high - low) * self.rng.random(rows, DISTRIBUTION_DRAW + 1)
+
+    def _fake_distributed_number(self, distribution, parameters, offset, min_value, max_value,
+        scale, rows):
+        values = offset + self._sample(distribution, parameters, rows)
+        if min_value is not None or max_value is not None:
+            values = np.clip(values, min_value, max_value)
+        if scale is None:
+            return values
+        if scale == 0:
+            return np.rint(values).astype(np.int64)
+        return np.round(values, scale)
+
+    def _fake_distributed_time(self, distribution, parameters, start, span, units, rows):
+        offsets = np.floor(self._sample(distribution, parameters, rows) * units)
+        return start + np.clip(offsets, 0, span).astype(np.int64)
+
+    def _fake_time(self, rows):
+        return self.rng.integers(rows, 0, SECONDS_PER_DAY - 1).astype("timedelta64[s]")
+
+    @staticmethod
+    def compile(data_type, min_length=None, max_length=None,
+        min_value=None, max_value=None, format=None, values=None, weights=None):
+        """Resolves a data type and its arguments into a generator method once.
+        Args:
+            data_type: one of the vectorized data types
+            min_length, max_length, format, values, weights: accepted for parity with FakeHelper.compile
+            min_value: lower bound of the generated values, dates and timestamps default
+                to the fixed DEFAULT_BOUNDS
+            max_value: upper bound of the generated values
+        Returns:
+            tuple of generator method name and a tuple of its parsed arguments
+        Raises:
+            Error if data_type cann't be generated as an array or its bounds cann't be parsed
+        """
+        data_type = data_type.lower()
+        try:
+            if data_type == "boolean":
+                return ("_fake_boolean", ())
+            elif data_type == "date":
+                if min_value is None:
+                    min_value = DEFAULT_BOUNDS["date"][0]
+                if max_value is None:
+                    max_value = DEFAULT_BOUNDS["date"][1]
+                date_start = datetime.strptime(min_value, DATE_FORMAT)
+                date_end = datetime.strptime(max_value, DATE_FORMAT)
+                start = np.datetime64(date_start.date(), "D")
+                days = int((np.datetime64(date_end.date(), "D") - start).astype(np.int64))
+                return ("_fake_date", (start, days))
+            elif data_type in ("decimal", "double", "float", "int"):
+                if min_value is None:
+                    min_value = 0
+                if max_value is None:
+                    max_value = 999
+                method = "_fake_decimal" if data_type == "double" else "_fake_" + data_type
+                return (method, (min_value, max_value))
+            elif data_type == "time":
+                return ("_fake_time", ())
+            elif data_type == "timestamp":
+                if min_value is None:
+                    min_value = DEFAULT_BOUNDS["timestamp"][0]
+                if max_value is None:
+                    max_value = DEFAULT_BOUNDS["timestamp"][1]
+                start_time = datetime.strptime(min_value, TIMESTAMP_FORMAT)
+                end_time = datetime.strptime(max_value, TIMESTAMP_FORMAT)
+                start = np.datetime64(start_time, "ms")
+                millis = int((np.datetime64(end_time, "ms") - start).astype(np.int64))
+                return ("_fake_date_time", (start, millis))
+        except Exception as e:
+            raise Error("Cann't compile data_type: {0}, Exception {1} occurred.".format(data_type, e))
+        raise Error("Cann't compile data_type: {0}, it is not a vectorized data type.".format(data_type))
+
+    @staticmethod
+    def compile_distribution(data_type, distribution, min_value=None, max_value=None):
+        """Resolves a field with a distribution into a generator method once.
+        Values of numeric fields are drawn from the distribution, lognormal, exponential
+        and zipf values are offsets from min_value, 0 if not given. Values of date and
+        timestamp fields are min_value plus a number of days or seconds drawn from the
+        distribution. Values are clipped to the bounds that are given, the range of a zipf
+        distribution of a numeric field defaults to the bounds of the compile defaults.
+        Args:
+            data_type: date, decimal, double, float, int or timestamp
+            distribution: dict of the type of the distribution and its parameters, checked
+                by config_parser
+            min_value: lower bound of the generated values
+            max_value: upper bound of the generated values
+        Returns:
+            tuple of generator method name and a tuple of its parsed arguments
+        Raises:
+            Error if data_type has no distributions or its bounds cann't be parsed
+        """
+        data_type = data_type.lower()
+        kind = distribution["type"]
+        temporal = data_type in ("date", "timestamp")
+        if temporal:
+            (_, (start, span)) = NumpyHelper.compile(data_type, min_value=min_value, max_value=max_value)
+            units = 1 if data_type == "date" else MILLIS_PER_SECOND
+            offset = 0
+            num_ranks = span // units + 1
+        elif data_type in ("decimal", "double", "float", "int"):
+            offset = 0 if min_value is None or kind in ("normal", "histogram") else min_value
+            num_ranks = None
+            if kind == "zipf":
+                if min_value is None:
+                    min_value = 0
+                if max_value is None:
+                    max_value = 999
+                (offset, num_ranks) = (min_value, int(max_value - min_value) + 1)
+        else:
+            raise Error("Cann't compile data_type: {0}, it has no distributions.".format(data_type))
+        if num_ranks is not None and num_ranks < 1:
+            raise Error("Cann't compile data_type: {0}, max_value is lower than min_value.".format(data_type))
+        if kind == "normal":
+            parameters = (float(distribution.get("mean", 0.0)), float(distribution.get("stddev", 1.0)))
+        elif kind == "lognormal":
+            parameters = (float(distribution.get("mean", 0.0)), float(distribution.get("sigma", 1.0)))
+        elif kind == "exponential":
+            parameters = (float(distribution.get("scale", 1.0)),)
+        elif kind == "zipf":
+            parameters = (num_ranks, float(distribution.get("exponent", DEFAULT_ZIPF_EXPONENT)))
+        else:
+            cumulative = np.cumsum(np.asarray(distribution["weights"], dtype=np.float64))
+            parameters = (np.asarray(distribution["bins"], dtype=np.float64), cumulative / cumulative[-1])
+        if temporal:
+            return ("_fake_distributed_time", (kind, parameters, start, span, units))
+        if data_type == "int":
+            (min_value, max_value) = (-INT_LIMIT if min_value is None else min_value,
+                INT_LIMIT if max_value is None else max_value)
+        scale = {"int": 0, "float": None}.get(data_type, DECIMAL_SCALE)
+        return ("_fake_distributed_number", (kind, parameters, offset, min_value, max_value, scale))
+
+    def generate(self, method, args, rows=None, stream=0):
+        """Generates a whole column with a single call of a compiled generator method.
+        Args:
+            method: generator method name returned by compile
+            args: parsed arguments returned by compile
+            rows: int array of row indices to generate, defaults to the first num_records rows
+            stream: key of the random stream of the column
+        Returns:
+            tuple of status and numpy array of generated values
+        Raises:
+            Error if data cann't be faked
+        """
+        if rows is None:
+            rows = np.arange(self.num_records)
+        self.rng = CounterRNG(self.seed, stream)
+        try:
+            return_array = getattr(self, method)(*args, rows)
+        except Exception as e:
+            raise Error("Cann't fake data with {0}, Exception {1} occurred.".format(method, e))
+        return (True, return_array)
+
+    def fake_it(self, data_type, min_length=None, max_length=None,
+        min_value=None, max_value=None, format=None, values=None, weights=None):
+        """Generates a whole column of fake data in one call.
+        Args:
+            data_type: one of the vectorized data types
+            min_length, max_length, format, values, weights: accepted for parity with FakeHelper.fake_it
+            min_value: lower bound of the generated values
+            max_value: upper bound of the generated values
+        Returns:
+            tuple of status and numpy array holding num_records values
+        Raises:
+            Error if data_type cann't be generated as an array
+        """
+        (method, args) = self.compile(data_type, min_length, max_length,
+            min_value, max_value, format, values, weights)
+        return self.generate(method, args)
@@ -0,0 +1,402 @@
+import time
+from collections import namedtuple
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from datagen.constants import DEFAULT_ADDRESS_PARTS
+from datagen.constants import DEFAULT_CARDINALITY
+from datagen.constants import POOLED_DATA_TYPES
+from datagen.constants import VECTORIZED_DATA_TYPES
+from datagen.counter_rng import CounterRNG, stream_key
+from datagen.expr_helper import ExprHelper
+from datagen.fake_helper import FakeHelper
+from datagen.numpy_helper import NumpyHelper
+from datagen.pool_helper import PoolHelper
+from datagen.ref_helper import RefHelper
+from datagen.text_helper import OffsetOverflow, TextHelper
+from datagen.unique_helper import UniqueHelper
+
+# helper classes running the column generators, indexed by name
+HELPERS = {"expr": ExprHelper, "faker": FakeHelper, "numpy": NumpyHelper, "pool": PoolHelper,
+           "ref": RefHelper, "text": TextHelper, "unique": UniqueHelper}
+DICTIONARY_STRING = pa.dictionary(pa.int32(), pa.string())
+# arrow type of each data type, other data types are plain strings
+ARROW_TYPES = {"boolean": pa.bool_(),
+               "city": DICTIONARY_STRING,
+               "country": DICTIONARY_STRING,
+               "currency_code": DICTIONARY_STRING,
+               "currency_name": DICTIONARY_STRING,
+               "date": pa.date32(),
+               "decimal": pa.decimal128(18, 2),
+               "double": pa.float64(),
+               "first_name": DICTIONARY_STRING,
+               "float": pa.float64(),
+               "int": pa.int64(),
+               "job": DICTIONARY_STRING,
+               "last_name": DICTIONARY_STRING,
+               "name": DICTIONARY_STRING,
+               "state": DICTIONARY_STRING,
+               "time": pa.time32("s"),
+               "timestamp": pa.timestamp("ms")
+              }
+# draw of the validity of a row of a column with a null_ratio, apart from the draws of
+# the helpers
+NULL_DRAW = 1 << 60
+
+class ColumnGenerator(namedtuple("ColumnGenerator",
+    ["name", "data_type", "arrow_type", "helper", "method", "args", "stream", "null_ratio"],
+    defaults=(0.0,))):
+    """Ready-to-call generator of a single column.
+    Attributes:
+        name: name of the output column
+        data_type: data type of the field the generator was compiled from
+        arrow_type: arrow type of the output column
+        helper: name of the helper running the generator
+        method: generator method name on the helper
+        args: parsed arguments of the generator method
+        stream: key of the random stream of the column, derived from its name
+        null_ratio: probability of a row of the column being null
+    """
+    __slots__ = ()
+
+class Plan(object):
+    """Immutable generation plan compiled from a schema.
+
+    A plan only holds plain values so it can be reused across chunks and
+    pickled to other processes. Helpers are created when the plan is executed.
+    Values are keyed on (seed, column, row), so any row range can be generated
+    directly and the output doesn't depend on batch size or worker count.
+    Struct columns are generated in one pass and written as one column per child.
+    Columns are generated in order, expr columns after the columns they are computed from.
+    """
+    def __init__(self, num_records, seed, columns, locale=None, order=None):
+        self._num_records = num_records
+        self._seed = seed
+        self._locale = locale
+        self._columns = tuple(columns)
+        self._order = tuple(range(len(self._columns)) if order is None else order)
+        self._arrow_schema = pa.schema([field for column in self._columns
+            for field in output_fields(column.name, column.arrow_type)])
+
+    # read-only properties
+    @property
+    def num_records(self):
+        return self._num_records
+
+    @property
+    def seed(self):
+        return self._seed
+
+    @property
+    def locale(self):
+        return self._locale
+
+    @property
+    def columns(self):
+        return self._columns
+
+    @property
+    def order(self):
+        return self._order
+
+    @property
+    def arrow_schema(self):
+        return self._arrow_schema
+
+    def make_helpers(self):
+        """Creates one instance of every helper.
+        Returns:
+            dict of helpers indexed by name
+        """
+        return {name: helper_class(self.num_records, self.seed, self.locale)
+            for name, helper_class in HELPERS.items()}
+
+    def generate_column(self, column, helpers, rows, metrics=None, columns=None):
+        """Runs a single column generator.
+        Args:
+            column: ColumnGenerator of the plan
+            helpers: helpers returned by make_helpers
+            rows: int array of row indices to generate
+            metrics: optional Metrics recording the generate and convert stages of the column
+            columns: dict of the arrow arrays of the columns generated before, indexed by
+                output column name, expr columns are computed from them
+        Returns:
+            tuple of status and arrow array of generated values
+        """
+        started = time.perf_counter()
+        if column.helper == "expr":
+            (status, values) = helpers["expr"].generate(column.method, column.args, rows,
+                column.stream, columns)
+        else:
+            (status, values) = helpers[column.helper].generate(column.method, column.args,
+                rows, column.stream)
+        generated = time.perf_counter()
+        array = to_arrow(values, column.arrow_type)
+        if column.null_ratio:
+            valid = CounterRNG(self.seed, column.stream).random(rows, NULL_DRAW) >= column.null_ratio
+            array = with_nulls(array, valid)
+        if metrics is not None:
+            metrics.add("generate", column.name, generated - started, len(rows),
+                getattr(values, "nbytes", 0))
+            metrics.add("convert", column.name, time.perf_counter() - generated, len(rows),
+                array.nbytes)
+        return (status, array)
+
+    def execute(self, start=0, stop=None, helpers=None, metrics=None):
+        """Runs every column generator of the plan for a range of rows.
+        Args:
+            start: first row to generate
+            stop: row after the last row to generate, defaults to num_records of the plan
+            helpers: helpers returned by make_helpers, created if not given
+            metrics: optional Metrics recording the generate and convert stages of every column
+        Returns:
+            arrow RecordBatch holding the generated columns
+        """
+        if stop is None:
+            stop = self.num_records
+        if helpers is None:
+            helpers = self.make_helpers()
+        rows = np.arange(start, stop, dtype=np.int64)
+        generated = [None] * len(self.columns)
+        columns = {}
+        for index in self.order:
+            column = self.columns[index]
+            (status, values) = self.generate_column(column, helpers, rows, metrics, columns)
+            if pa.types.is_struct(column.arrow_type):
+                generated[index] = values.flatten()
+            else:
+                generated[index] = [values]
+            for (field, array) in zip(output_fields(column.name, column.arrow_type), generated[index]):
+                columns[field.name] = array
+        arrays = [array for column_arrays in generated for array in column_arrays]
+        return pa.RecordBatch.from_arrays(arrays, schema=self.arrow_schema)
+
+    def iter_batches(self, batch_size, start=0, stop=None, metrics=None):
+        """Runs the plan in batches so only one batch is held in memory at a time.
+        Args:
+            batch_size: maximum number of records per batch
+            start: first row to generate
+            stop: row after the last row to generate, defaults to num_records of the plan
+            metrics: optional Metrics recording the generate and convert stages of every column
+        Yields:
+            arrow RecordBatches of at most batch_size records, batches whose text columns
+            hold more than 2 GiB are split into smaller batches
+        """
+        if stop is None:
+            stop = self.num_records
+        helpers = self.make_helpers()
+        for batch_start in range(start, stop, batch_size):
+            yield from self._execute_split(batch_start, min(batch_start + batch_size, stop),
+                helpers, metrics)
+
+    def _execute_split(self, start, stop, helpers, metrics=None):
+        """Runs a range of rows, split in halves while a text column of the range holds more
+        bytes than an arrow string array addresses. Values are keyed on the row, so the
+        halves hold the same records as the whole range."""
+        try:
+            yield self.execute(start, stop, helpers, metrics)
+        except OffsetOverflow:
+            if stop - start < 2:
+                raise
+            middle = (start + stop) // 2
+            yield from self._execute_split(start, middle, helpers, metrics)
+            yield from self._execute_split(middle, stop, helpers, metrics)
+
+#
+# Module Methods
+#
+
+def resolve_arrow_type(data_type, values=None):
+    """Resolves the arrow type of a data type.
+    Args:
+        data_type: data type of the field
+        values: values of a cat field, their inferred type is dictionary encoded, or parts
+            of a composite_address field
+    Returns:
+        arrow DataType
+    """
+    data_type = data_type.lower()
+    if data_type == "cat":
+        return pa.dictionary(pa.int32(), infer_value_type(values))
+    if data_type == "composite_address":
+        return pa.struct([(part, pa.string() if part == "address" else DICTIONARY_STRING)
+            for part in values or DEFAULT_ADDRESS_PARTS])
+    return ARROW_TYPES.get(data_type, pa.string())
+
+def infer_value_type(values):
+    """Infers the arrow type of the values of a cat field.
+    Types of plain json values are resolved directly, arrow type inference imports pandas
+    on first use, which compiling a schema doesn't need otherwise.
+    Args:
+        values: list of json values
+    Returns:
+        arrow DataType
+    """
+    if all(isinstance(value, str) for value in values):
+        return pa.string()
+    if all(isinstance(value, bool) for value in values):
+        return pa.bool_()
+    if all(isinstance(value, int) and not isinstance(value, bool) for value in values):
+        return pa.int64()
+    if all(isinstance(value, (int, float)) and not isinstance(value, bool) for value in values):
+        return pa.float64()
+    return pa.array(list(values)).type
+
+def output_fields(name, arrow_type):
+    """Resolves the output columns of a generated column, struct columns are written as
+    one column per child named {name}_{child}.
+    Args:
+        name: name of the generated column
+        arrow_type: arrow type of the generated column
+    Returns:
+        list of arrow Fields
+    """
+    if pa.types.is_struct(arrow_type):
+        return [pa.field("{0}_{1}".format(name, child.name), child.type) for child in arrow_type]
+    return [pa.field(name, arrow_type)]
+
+def to_arrow(values, arrow_type):
+    """Converts generated values to an arrow array without going through pandas.
+    Args:
+        values: arrow array, numpy array or list returned by a helper
+        arrow_type: arrow type of the column
+    Returns:
+        arrow Array of arrow_type
+    """
+    if isinstance(values, pa.Array):
+        return values
+    if pa.types.is_struct(arrow_type):
+        return pa.StructArray.from_arrays([to_arrow([value[child.name] for value in values], child.type)
+            for child in arrow_type], fields=list(arrow_type))
+    if pa.types.is_dictionary(arrow_type):
+        return pa.array(values, type=arrow_type.value_type).dictionary_encode()
+    if pa.types.is_decimal(arrow_type):
+        return pa.array(np.asarray(values, dtype=np.float64)).cast(arrow_type, safe=False)
+    if pa.types.is_floating(arrow_type) and not isinstance(values, np.ndarray):
+        # faker returns Decimal values for double fields
+        return pa.array(np.asarray(values, dtype=np.float64), type=arrow_type)
+    if pa.types.is_time(arrow_type) and isinstance(values, np.ndarray):
+        return pa.array(values.astype(np.int32), type=arrow_type)
+    return pa.array(values, type=arrow_type)
+
+def with_nulls(array, valid):
+    """Nulls the rows of an array that aren't valid by setting its validity bitmap, the
+    values buffers are reused as they are.
+    Args:
+        array: arrow array
+        valid: bool numpy array of the validity of every row
+    Returns:
+        arrow array of the type of array, null where valid is False or array is null
+    """
+    if pa.types.is_struct(array.type):
+        return pa.StructArray.from_arrays(array.flatten(), fields=list(array.type),
+            mask=pa.array(~valid))
+    if pa.types.is_dictionary(array.type):
+        return pa.DictionaryArray.from_arrays(with_nulls(array.indices, valid), array.dictionary)
+    if array.offset:
+        # the bitmap of a slice doesn't start at a byte boundary
+        return pc.if_else(pa.array(valid), array, pa.scalar(None, array.type))
+    if array.null_count:
+        valid = valid & array.is_valid().to_numpy(zero_copy_only=False)
+    bitmap = pa.py_buffer(np.packbits(valid, bitorder="little"))
+    return pa.Array.from_buffers(array.type, len(array), [bitmap] + array.buffers()[1:],
+        null_count=len(valid) - int(np.count_nonzero(valid)))
+
+def compile_column(field, engine, num_records):
+    """Compiles a field into a column generator.
+    Args:
+        field: config_parser.Field to compile, not a ref field
+        engine: engine of the table of the field
+        num_records: number of records of the table of the field
+    Returns:
+        ColumnGenerator of the field
+    """
+    if field.unique:
+        # unique values are a permutation of the row indices whatever the engine
+        (method, args) = UniqueHelper.compile_unique(field.type, num_records, field.min_value,
+            field.max_value, field.format)
+        return ColumnGenerator(field.name, field.type, resolve_arrow_type(field.type),
+            "unique", method, args, stream_key(field.name))
+    if field.distribution:
+        # distributions are sampled as whole arrays whatever the engine
+        (method, args) = NumpyHelper.compile_distribution(field.type, field.distribution,
+            field.min_value, field.max_value)
+        return ColumnGenerator(field.name, field.type, resolve_arrow_type(field.type),
+            "numpy", method, args, stream_key(field.name))
+    helper = "faker"
+    if engine == "batch" and field.type in VECTORIZED_DATA_TYPES:
+        helper = "numpy"
+    elif engine == "batch" and field.type in POOLED_DATA_TYPES:
+        helper = "pool"
+    elif engine == "batch" and field.type in ("lorem", "str"):
+        helper = "text"
+    (method, args) = HELPERS[helper].compile(field.type, field.min_length,
+        field.max_length, field.min_value, field.max_value, field.format, field.values,
+        field.weights)
+    return ColumnGenerator(field.name, field.type, resolve_arrow_type(field.type, field.values),
+        helper, method, args, stream_key(field.name))
+
+def compile_reference(field, tables):
+    """Compiles a ref field into a column generator sampling the keys of its parent table.
+    Args:
+        field: config_parser.Field of type ref
+        tables: read-only map of the schemas of the config, indexed by table name
+    Returns:
+        ColumnGenerator of the field, of the arrow type of the referenced field
+    """
+    (table, name) = field.references.rsplit(".", 1)
+    parent_schema = tables[table]
+    parent = compile_column(parent_schema.field_map[name], parent_schema.names.engine,
+        parent_schema.names.output_rec_cnt)
+    cardinality = field.cardinality or {}
+    (method, args) = RefHelper.compile_reference(parent, parent_schema.names.output_rec_cnt,
+        parent_schema.names.seed, parent_schema.names.locale,
+        cardinality.get("distribution", DEFAULT_CARDINALITY), cardinality.get("exponent"))
+    return ColumnGenerator(field.name, field.type, parent.arrow_type, "ref", method, args,
+        stream_key(field.name))
+
+def compile_expression(field, column_types):
+    """Compiles an expr field into a column generator computing it from other columns.
+    Args:
+        field: config_parser.Field of type expr
+        column_types: dict of the arrow types of the columns compiled before the field,
+            indexed by output column name
+    Returns:
+        ColumnGenerator of the field, of the arrow type of the expression
+    """
+    (method, args, arrow_type) = ExprHelper.compile_expression(field.expr, column_types)
+    return ColumnGenerator(field.name, field.type, arrow_type, "expr", method, args,
+        stream_key(field.name))
+
+def compile_schema(schema_parsed, num_records=None):
+    """Compiles a parsed Schema into a Plan.
+    Data types are resolved, defaults applied and arguments parsed once per field. Fields
+    are compiled in the order they are generated in, so expr fields know the types of the
+    columns they are computed from.
+    Args:
+        schema_parsed: config_parser.Schema to compile
+        num_records: number of records of the plan, output_rec_cnt of the schema if not
+            given, such as the total number of records of an appended dataset
+    Returns:
+        Plan of the schema
+    """
+    if num_records is None:
+        num_records = schema_parsed.names.output_rec_cnt
+    compiled = {}
+    column_types = {}
+    for field in schema_parsed.ordered_fields:
+        if field.type == "ref":
+            column = compile_reference(field, schema_parsed.tables)
+        elif field.type == "expr":
+            column = compile_expression(field, column_types)
+        else:
+            column = compile_column(field, schema_parsed.names.engine, num_records)
+        compiled[field.name] = column._replace(null_ratio=field.null_ratio)
+        for output_field in output_fields(column.name, column.arrow_type):
+            column_types[output_field.name] = output_field.type
+    columns = [compiled[field.name] for field in schema_parsed.fields]
+    index = {field.name: position for position, field in enumerate(schema_parsed.fields)}
+    return Plan(num_records, schema_parsed.names.seed, columns,
+        schema_parsed.names.locale, [index[field.name] for field in schema_parsed.ordered_fields])
@@ -0,0 +1,266 @@
+from collections import Counter
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from datagen.constants import DEFAULT_ADDRESS_PARTS
+from datagen.counter_rng import CounterRNG
+from datagen.fake_helper import ADDRESS_LINE_FORMAT, address_parts
+
+DEFAULT_LOCALE = "en_US"
+# number of values pre-generated for providers without a fixed vocabulary
+POOL_SIZE = 5000
+# pools are generated with a fixed seed so they are identical in every process
+POOL_SEED = 0
+# faker method serving each pooled data type
+POOL_PROVIDERS = {"city": "city",
+                  "country": "country",
+                  "currency_code": "currency_code",
+                  "currency_name": "currency_name",
+                  "first_name": "first_name",
+                  "job": "job",
+                  "last_name": "last_name",
+                  "name": "name",
+                  "state": "state"
+                 }
+# provider attribute holding the vocabulary of a data type, and the item to pick from pairs
+VOCABULARY_ATTRIBUTES = {"country": ("countries", None),
+                         "currency_code": ("currencies", 0),
+                         "currency_name": ("currencies", 1),
+                         "first_name": ("first_names", None),
+                         "job": ("jobs", None),
+                         "last_name": ("last_names", None),
+                         "state": ("states", None)
+                        }
+
+# separate draws of the address tuple and of the street of a composite address
+TUPLE_DRAW = 0
+STREET_DRAW = 1
+
+# process-wide caches of vocabularies indexed by (locale, data_type) and of address tables
+# indexed by locale
+_VOCABULARIES = {}
+_ADDRESS_TABLES = {}
+
+class Error(Exception):
+    """Base class for exceptions in this module."""
+    pass
+
+class AliasTable(object):
+    """Walker alias table of a discrete distribution, built once with Vose's method.
+
+    An index is sampled in constant time from a single uniform float: its integer part
+    picks a bucket and its fractional part picks the bucket or its alias.
+    """
+    def __init__(self, weights):
+        weights = np.asarray(weights, dtype=np.float64)
+        size = len(weights)
+        scaled = weights * size / weights.sum()
+        self.probability = np.ones(size, dtype=np.float64)
+        self.alias = np.arange(size, dtype=np.int32)
+        small = [index for index in range(size) if scaled[index] < 1.0]
+        large = [index for index in range(size) if scaled[index] >= 1.0]
+        while small and large:
+            (less, more) = (small.pop(), large[-1])
+            self.probability[less] = scaled[less]
+            self.alias[less] = more
+            scaled[more] -= 1.0 - scaled[less]
+            if scaled[more] < 1.0:
+                small.append(large.pop())
+
+    def __len__(self):
+        return len(self.alias)
+
+    def sample(self, uniform):
+        """Maps uniform floats in [0, 1) to int32 indices."""
+        scaled = uniform * len(self)
+        buckets = np.minimum(scaled.astype(np.int32), len(self) - 1)
+        return np.where(scaled - buckets < self.probability[buckets], buckets,
+            self.alias[buckets]).astype(np.int32)
+
+class Vocabulary(object):
+    """Distinct values of a provider with the alias table to sample them."""
+    def __init__(self, values, weights):
+        self.values = pa.array(values, type=pa.string())
+        self.table = AliasTable(weights)
+
+    def sample(self, uniform):
+        """Maps uniform floats in [0, 1) to int32 indices into values."""
+        return self.table.sample(uniform)
+
+def _extract_vocabulary(generator, data_type):
+    """Reads the vocabulary of a data type from the attributes of its faker provider.
+    Returns:
+        Vocabulary or None if the provider of the locale doesn't expose one
+    """
+    if data_type not in VOCABULARY_ATTRIBUTES:
+        return None
+    (attribute, item) = VOCABULARY_ATTRIBUTES[data_type]
+    provider = getattr(generator, POOL_PROVIDERS[data_type]).__self__
+    elements = getattr(provider, attribute, None)
+    if not elements:
+        return None
+    if hasattr(elements, "items"):
+        (values, weights) = (list(elements.keys()), list(elements.values()))
+    else:
+        values = list(elements)
+        weights = [1.0] * len(values)
+    if item is not None:
+        values = [value[item] for value in values]
+    if not all(isinstance(value, str) for value in values):
+        return None
+    counts = Counter()
+    for value, weight in zip(values, weights):
+        counts[value] += weight
+    return Vocabulary(list(counts.keys()), list(counts.values()))
+
+def _generate_vocabulary(generator, data_type):
+    """Pre-generates POOL_SIZE values of a data type, keeping distinct values and their frequency."""
+    generator.seed_instance(POOL_SEED)
+    provider = getattr(generator, POOL_PROVIDERS[data_type])
+    counts = Counter(provider() for _ in range(POOL_SIZE))
+    return Vocabulary(list(counts.keys()), list(counts.values()))
+
+def load_vocabulary(data_type, locale=DEFAULT_LOCALE):
+    """Loads the vocabulary of a data type once per process and locale.
+    Args:
+        data_type: one of the pooled data types
+        locale: faker locale of the vocabulary
+    Returns:
+        Vocabulary of the data type
+    """
+    from faker import Faker
+    key = (locale, data_type)
+    if key not in _VOCABULARIES:
+        generator = Faker(locale)[locale]
+        vocabulary = _extract_vocabulary(generator, data_type)
+        if vocabulary is None:
+            vocabulary = _generate_vocabulary(generator, data_type)
+        _VOCABULARIES[key] = vocabulary
+    return _VOCABULARIES[key]
+
+class AddressTable(object):
+    """Pre-generated address tuples of a locale, with the parts of a tuple stored by column.
+
+    The city, state and zip code of a tuple match when the locale knows the zip code ranges
+    of its states, see address_parts. Street addresses are sampled independently so the
+    number of distinct addresses is the square of the table size.
+    """
+    def __init__(self, addresses):
+        # parts are dictionary encoded so sampled columns have dictionaries of distinct values
+        self.columns = {part: pa.array([address[part] for address in addresses],
+            type=pa.string()).dictionary_encode() for part in addresses[0]}
+        self.streets = pa.array([address["street_address"] for address in addresses], type=pa.string())
+        self.lines = pa.array([ADDRESS_LINE_FORMAT.format(**address) for address in addresses],
+            type=pa.string())
+
+    def __len__(self):
+        return len(self.lines)
+
+def load_address_table(locale=DEFAULT_LOCALE):
+    """Generates POOL_SIZE consistent address tuples once per process and locale.
+    Args:
+        locale: faker locale of the addresses
+    Returns:
+        AddressTable of the locale
+    """
+    from faker import Faker
+    if locale not in _ADDRESS_TABLES:
+        generator = Faker(locale)[locale]
+        generator.seed_instance(POOL_SEED)
+        _ADDRESS_TABLES[locale] = AddressTable([address_parts(generator) for _ in range(POOL_SIZE)])
+    return _ADDRESS_TABLES[locale]
+
+class PoolHelper:
+    """This Class is used to sample fake text data from per locale vocabulary pools."""
+    def __init__(self, num_records=1000, seed=1000, locale=None):
+        self.num_records = num_records
+        self.seed = seed
+        self.locale = locale or DEFAULT_LOCALE
+        self.rng = CounterRNG(seed)
+
+    def _fake_pool(self, data_type, rows):
+        vocabulary = load_vocabulary(data_type, self.locale)
+        indices = vocabulary.sample(self.rng.random(rows))
+        return pa.DictionaryArray.from_arrays(indices, vocabulary.values)
+
+    def _fake_cat(self, values, table, rows):
+        indices = table.sample(self.rng.random(rows))
+        return pa.DictionaryArray.from_arrays(indices, pa.array(list(values)))
+
+    def _fake_composite_address(self, parts, rows):
+        table = load_address_table(self.locale)
+        tuples = self.rng.integers(rows, 0, len(table) - 1, TUPLE_DRAW).astype(np.int32)
+        streets = self.rng.integers(rows, 0, len(table) - 1, STREET_DRAW).astype(np.int32)
+        arrays = []
+        for part in parts:
+            if part == "address":
+                arrays.append(pc.binary_join_element_wise(table.streets.take(streets),
+                    table.lines.take(tuples), "\n"))
+            else:
+                column = table.columns[part]
+                indices = column.indices.take(streets if part == "street_address" else tuples)
+                arrays.append(pa.DictionaryArray.from_arrays(indices, column.dictionary))
+        return pa.StructArray.from_arrays(arrays, names=list(parts))
+
+    @staticmethod
+    def compile(data_type, min_length=None, max_length=None,
+        min_value=None, max_value=None, format=None, values=None, weights=None):
+        """Resolves a data type into a generator method once.
+        Args:
+            data_type: cat, composite_address or one of the pooled data types
+            values: values of a cat field or parts of a composite_address field
+            weights: optional relative weights of the values of a cat field, values are
+                equally likely if not given
+            min_length, max_length, min_value, max_value, format: accepted for parity
+                with FakeHelper.compile
+        Returns:
+            tuple of generator method name and a tuple of its arguments
+        Raises:
+            Error if data_type has no vocabulary pool
+        """
+        data_type = data_type.lower()
+        if data_type == "cat":
+            if not values:
+                raise Error("Cann't compile data_type: {0}, values must not be empty.".format(data_type))
+            if weights is None:
+                weights = [1.0] * len(values)
+            # repeated values are merged so the dictionary holds distinct values
+            counts = Counter()
+            for value, weight in zip(values, weights):
+                counts[value] += weight
+            return ("_fake_cat", (tuple(counts.keys()), AliasTable(list(counts.values()))))
+        if data_type == "composite_address":
+            return ("_fake_composite_address", (tuple(values or DEFAULT_ADDRESS_PARTS),))
+        if data_type not in POOL_PROVIDERS:
+            raise Error("Cann't compile data_type: {0}, it is not a pooled data type.".format(data_type))
+        return ("_fake_pool", (data_type,))
+
+    def generate(self, method, args, rows=None, stream=0):
+        """Generates a whole column by sampling vocabulary indices.
+        Args:
+            method: generator method name returned by compile
+            args: arguments returned by compile
+            rows: int array of row indices to generate, defaults to the first num_records rows
+            stream: key of the random stream of the column
+        Returns:
+            tuple of status and dictionary encoded arrow array of generated values, or struct
+            array of dictionary encoded parts for composite_address
+        Raises:
+            Error if data cann't be faked
+        """
+        if rows is None:
+            rows = np.arange(self.num_records)
+        self.rng = CounterRNG(self.seed, stream)
+        try:
+            return_array = getattr(self, method)(*args, rows)
+        except Exception as e:
+            raise Error("Cann't fake data with {0}, Exception {1} occurred.".format(method, e))
+        return (True, return_array)
+
+    def fake_it(self, data_type, min_length=None, max_length=None,
+        min_value=None, max_value=None, format=None, values=None, weights=None):
+        (method, args) = self.compile(data_type, min_length, max_length,
+            min_value, max_value, format, values, weights)
+        return self.generate(method, args)
@@ -0,0 +1,382 @@
+import math
+import os
+import string
+import time
+from datetime import date, datetime
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from datagen.constants import DEFAULT_DELIMITER
+from datagen.constants import DEFAULT_TOP_K
+from datagen.io_helper import IOHelper
+
+# frequent values are counted approximately with COUNTER_FACTOR counters per reported value
+COUNTER_FACTOR = 10
+# number of counters of the shapes of string values
+SHAPE_COUNTERS = 64
+# lengths of string values are counted exactly up to this length, longer values share a bin
+MAX_LENGTH_BIN = 1024
+# share of the string values a single shape must cover to be profiled as a format
+FORMAT_COVERAGE = 0.99
+# cat fields repeat their values at least this many times on average
+CAT_MIN_REPEAT = 2
+# seed of the emitted config
+DEFAULT_SEED = 1000
+# types inferred from the text of string values, in order of preference, with the
+# pattern all values of the type match
+INFERRED_TYPES = [("boolean", r"^(true|false|True|False|TRUE|FALSE)$"),
+                  ("int", r"^[+-]?[0-9]{1,18}$"),
+                  ("double", r"^[+-]?([0-9]+\.?[0-9]*|\.[0-9]+)([eE][+-]?[0-9]+)?$"),
+                  ("date", r"^[0-9]{4}-[0-9]{2}-[0-9]{2}$"),
+                  ("timestamp", r"^[0-9]{4}-[0-9]{2}-[0-9]{2}[ T][0-9]{2}:[0-9]{2}:[0-9]{2}(\.[0-9]+)?$"),
+                  ("time", r"^[0-9]{2}:[0-9]{2}:[0-9]{2}$")
+                 ]
+# numbers with leading zeros, such as zip codes, are kept as strings
+LEADING_ZERO = r"^[+-]?0[0-9]"
+# characters of values that would be read as placeholders of a format
+PLACEHOLDER_CHARS = r"[#%?!@]"
+# byte translation tables of the shapes of string values, digits are replaced by # and,
+# in letter shapes, ascii letters by ?
+DIGIT_SHAPE = np.arange(256, dtype=np.uint8)
+DIGIT_SHAPE[np.frombuffer(b"0123456789", dtype=np.uint8)] = ord("#")
+LETTER_SHAPE = DIGIT_SHAPE.copy()
+LETTER_SHAPE[np.frombuffer(string.ascii_letters.encode("ascii"), dtype=np.uint8)] = ord("?")
+DATE_FORMAT = "%Y-%m-%d"
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+class Error(Exception):
+    """Base class for exceptions in this module."""
+    pass
+
+def translate(values, table):
+    """Translates the bytes of an arrow string array without nulls with a byte table, in a
+    single vectorized pass over its data buffer.
+    Args:
+        values: arrow string or large_string array without nulls
+        table: uint8 array of the 256 translated bytes, ascii bytes only
+    Returns:
+        arrow array of the type of values
+    """
+    offset_type = np.int64 if pa.types.is_large_string(values.type) else np.int32
+    (_, offsets, data) = values.buffers()
+    offsets = np.frombuffer(offsets, dtype=offset_type)[values.offset:values.offset + len(values) + 1]
+    data = np.frombuffer(data, dtype=np.uint8) if data is not None else np.zeros(0, dtype=np.uint8)
+    return pa.Array.from_buffers(values.type, len(values),
+        [None, pa.py_buffer(offsets), pa.py_buffer(table[data])])
+
+class FrequentValues(object):
+    """Approximate counts of the most frequent values of a stream, a Misra-Gries summary
+    merged batch by batch.
+
+    At most capacity values are counted. When a batch brings more distinct values, the
+    count of the first value left out is subtracted from every count, so counts are lower
+    bounds, short of the true counts by at most error, and a value more frequent than
+    1 / (capacity + 1) of the stream is never dropped. Counts are exact while error is 0.
+    """
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.values = None
+        self.counts = np.zeros(0, dtype=np.int64)
+        self.error = 0
+        self.total = 0
+
+    def update(self, values):
+        """Counts an arrow array of non-null values."""
+        self.total += len(values)
+        counted = pc.value_counts(values)
+        batch_values = counted.field("values")
+        batch_counts = counted.field("counts").to_numpy().astype(np.int64)
+        if self.values is not None:
+            merged = pa.table({"value": pa.concat_arrays([self.values, batch_values]),
+                "count": np.concatenate([self.counts, batch_counts])}).group_by("value").aggregate(
+                [("count", "sum")])
+            batch_values = merged.column("value").combine_chunks()
+            batch_counts = merged.column("count_sum").to_numpy()
+        if len(batch_counts) > self.capacity:
+            threshold = np.partition(batch_counts, len(batch_counts) - self.capacity - 1)[
+                len(batch_counts) - self.capacity - 1]
+            kept = batch_counts > threshold
+            batch_values = batch_values.filter(pa.array(kept))
+            batch_counts = batch_counts[kept] - threshold
+            self.error += int(threshold)
+        self.values = batch_values
+        self.counts = batch_counts
+
+    @property
+    def exact(self):
+        """Whether every distinct value is counted exactly."""
+        return self.error == 0
+
+    def most_common(self, limit=None):
+        """Counted values, most frequent first.
+        Args:
+            limit: maximum number of values, all counted values if None
+        Returns:
+            list of (value, count) tuples
+        """
+        if self.values is None:
+            return []
+        order = np.argsort(-self.counts, kind="stable")[:limit]
+        values = self.values.take(pa.array(order)).to_pylist()
+        return list(zip(values, self.counts[order].tolist()))
+
+class ColumnProfile(object):
+    """Statistics of a column collected batch by batch in bounded memory: the number of
+    values and nulls, the inferred type with its min and max, the most frequent values,
+    the histogram of the lengths of string values and the most frequent shapes of string
+    values, digits replaced by # or letters by ?.
+    """
+    def __init__(self, name, arrow_type, top_k=DEFAULT_TOP_K):
+        self.name = name
+        self.arrow_type = arrow_type
+        self.top_k = top_k
+        self.rows = 0
+        self.nulls = 0
+        self.frequent = FrequentValues(top_k * COUNTER_FACTOR)
+        self.is_string = pa.types.is_string(self._value_type) or pa.types.is_large_string(self._value_type)
+        # types the string values may still be read as, with the min and max of each
+        self.candidates = [kind for (kind, _) in INFERRED_TYPES] if self.is_string else []
+        self.bounds = {}
+        self.lengths = np.zeros(MAX_LENGTH_BIN + 1, dtype=np.int64)
+        self.min_length = None
+        self.max_length = None
+        self.digit_shapes = FrequentValues(SHAPE_COUNTERS)
+        self.letter_shapes = FrequentValues(SHAPE_COUNTERS)
+        self.placeholder_chars = False
+
+    @property
+    def _value_type(self):
+        if pa.types.is_dictionary(self.arrow_type):
+            return self.arrow_type.value_type
+        return self.arrow_type
+
+    def _bound(self, kind, minimum, maximum):
+        if kind in self.bounds:
+            (low, high) = self.bounds[kind]
+            (minimum, maximum) = (min(low, minimum), max(high, maximum))
+        self.bounds[kind] = (minimum, maximum)
+
+    def update(self, array):
+        """Adds an arrow array of the column to the statistics."""
+        self.rows += len(array)
+        self.nulls += array.null_count
+        if isinstance(array, pa.DictionaryArray):
+            array = array.dictionary_decode()
+        values = array.drop_null()
+        if len(values) == 0:
+            return
+        self.frequent.update(values)
+        if not self.is_string:
+            if self.kind != "string" and self.kind != "boolean":
+                bounds = pc.min_max(values)
+                self._bound(self.kind, bounds["min"].as_py(), bounds["max"].as_py())
+            return
+        self._update_strings(values)
+
+    def _update_strings(self, values):
+        lengths = pc.utf8_length(values).to_numpy()
+        self.lengths += np.bincount(np.minimum(lengths, MAX_LENGTH_BIN), minlength=MAX_LENGTH_BIN + 1)
+        self.min_length = int(lengths.min()) if self.min_length is None else min(self.min_length, int(lengths.min()))
+        self.max_length = int(lengths.max()) if self.max_length is None else max(self.max_length, int(lengths.max()))
+        for (kind, pattern) in INFERRED_TYPES:
+            if kind in self.candidates and not pc.all(pc.match_substring_regex(values, pattern)).as_py():
+                self.candidates.remove(kind)
+        if pc.any(pc.match_substring_regex(values, LEADING_ZERO)).as_py():
+            self.candidates = [kind for kind in self.candidates if kind not in ("int", "double")]
+        for kind in self.candidates:
+            if kind in ("int", "double"):
+                bounds = pc.min_max(values.cast(pa.int64() if kind == "int" else pa.float64()))
+            elif kind != "boolean":
+                # iso dates, timestamps and times sort as text
+                bounds = pc.min_max(values)
+            else:
+                continue
+            self._bound(kind, bounds["min"].as_py(), bounds["max"].as_py())
+        if self.placeholder_chars or pc.any(pc.match_substring_regex(values, PLACEHOLDER_CHARS)).as_py():
+            self.placeholder_chars = True
+            return
+        self.digit_shapes.update(translate(values, DIGIT_SHAPE))
+        self.letter_shapes.update(translate(values, LETTER_SHAPE))
+
+    @property
+    def kind(self):
+        """Inferred type of the values: boolean, int, double, date, timestamp, time or string."""
+        if self.is_string:
+            return self.candidates[0] if self.candidates and self.frequent.total else "string"
+        value_type = self._value_type
+        if pa.types.is_boolean(value_type):
+            return "boolean"
+        if pa.types.is_integer(value_type):
+            return "int"
+        if pa.types.is_floating(value_type) or pa.types.is_decimal(value_type):
+            return "double"
+        if pa.types.is_date(value_type):
+            return "date"
+        if pa.types.is_timestamp(value_type):
+            return "timestamp"
+        if pa.types.is_time(value_type):
+            return "time"
+        return "string"
+
+    @property
+    def null_ratio(self):
+        return self.nulls / self.rows if self.rows else 0.0
+
+    def _is_categorical(self):
+        distinct = len(self.frequent.counts)
+        return (self.kind != "boolean" and self.frequent.exact and 0 < distinct <= self.top_k
+            and self.frequent.total >= CAT_MIN_REPEAT * distinct)
+
+    def _format(self):
+        """Shape covering nearly all string values, digits replaced by # and possibly
+        letters by ?, None if the values have no dominant shape."""
+        if self.placeholder_chars:
+            return None
+        for (shapes, placeholder) in ((self.digit_shapes, "#"), (self.letter_shapes, "?")):
+            common = shapes.most_common(1)
+            if common and placeholder in common[0][0] and common[0][1] >= FORMAT_COVERAGE * shapes.total:
+                return common[0][0]
+        return None
+
+    def _value(self, value):
+        """Converts a value of the column to the json value of the config."""
+        kind = self.kind
+        if kind == "int":
+            return int(value)
+        if kind == "double":
+            return float(value)
+        if isinstance(value, datetime):
+            return value.strftime(TIMESTAMP_FORMAT)
+        if isinstance(value, date):
+            return value.strftime(DATE_FORMAT)
+        if kind == "timestamp":
+            return value[:19].replace("T", " ")
+        return value if isinstance(value, (str, bool)) else str(value)
+
+    def field(self):
+        """Field of a config reproducing the shape of the column and its ratio of nulls.
+        Returns:
+            dict of the field
+        """
+        field = self._field()
+        if self.nulls:
+            field["null_ratio"] = round(self.null_ratio, 6)
+        return field
+
+    def _field(self):
+        kind = self.kind
+        field = {"name": self.name}
+        if self._is_categorical():
+            common = self.frequent.most_common()
+            field.update(type="cat", values=[self._value(value) for (value, _) in common],
+                weights=[count for (_, count) in common])
+            return field
+        if kind in ("boolean", "time"):
+            field["type"] = kind
+            return field
+        if kind in self.bounds:
+            (minimum, maximum) = self.bounds[kind]
+            if kind == "int":
+                field.update(type="int", min_value=int(minimum), max_value=int(maximum))
+            elif kind == "double":
+                # bounds of double fields are ints
+                field.update(type="double", min_value=int(math.floor(minimum)),
+                    max_value=int(math.ceil(maximum)))
+            else:
+                field.update(type=kind, min_value=self._value(minimum), max_value=self._value(maximum))
+            return field
+        field["type"] = "str"
+        format = self._format()
+        if format is not None:
+            field["format"] = format
+        elif self.max_length is not None:
+            field.update(min_length=self.min_length, max_length=self.max_length)
+        return field
+
+    def statistics(self):
+        """Statistics of the column as a json serializable dict."""
+        (minimum, maximum) = self.bounds.get(self.kind, (None, None))
+        statistics = {"type": str(self.arrow_type),
+                      "kind": self.kind,
+                      "rows": self.rows,
+                      "nulls": self.nulls,
+                      "null_ratio": round(self.null_ratio, 6),
+                      "min": None if minimum is None else self._value(minimum),
+                      "max": None if maximum is None else self._value(maximum),
+                      "top_values": [{"value": self._value(value), "count": count}
+                          for (value, count) in self.frequent.most_common(self.top_k)],
+                      "top_values_error": self.frequent.error
+                     }
+        if self.is_string:
+            statistics["length_histogram"] = {str(length): int(count)
+                for length, count in enumerate(self.lengths) if count}
+        return statistics
+
+#
+# Module Methods
+#
+
+def input_format(input_location):
+    """Format of a file to profile, from its extension.
+    Returns:
+        parquet or csv
+    Raises:
+        Error if the extension isn't a parquet or csv extension
+    """
+    name = input_location.lower()
+    if name.endswith(".gz"):
+        name = name[:-3]
+    if name.endswith((".parquet", ".parq")):
+        return "parquet"
+    if name.endswith((".csv", ".txt", ".psv")):
+        return "csv"
+    raise Error("Cann't profile {0}, only parquet and csv files can be profiled.".format(input_location))
+
+def profile(input_location, delimiter=DEFAULT_DELIMITER, top_k=DEFAULT_TOP_K, metrics=None,
+    profile_name="default", endpoint_url=None):
+    """Profiles a parquet or csv file in a single pass, a batch at a time, and builds a
+    config generating data of the same shape.
+    Args:
+        input_location: file to profile, can be s3/local file system
+        delimiter: single character delimiting csv cells
+        top_k: number of most frequent values reported per column, and maximum number of
+            values of a cat field
+        metrics: optional Metrics recording the parse stage
+        profile_name, endpoint_url: aws profile and s3 endpoint of s3 files
+    Returns:
+        tuple of the config as a dict and the statistics of every column
+    Raises:
+        Error if the file cann't be profiled
+    """
+    source_format = input_format(input_location)
+    iohelp = IOHelper(profile_name, endpoint_url)
+    columns = None
+    started = time.perf_counter()
+    for batch in iohelp.read_batches(input_location, source_format, delimiter):
+        if columns is None:
+            columns = [ColumnProfile(field.name, field.type, top_k) for field in batch.schema]
+        for (column, array) in zip(columns, batch.columns):
+            column.update(array)
+        if metrics is not None:
+            metrics.add("parse", seconds=time.perf_counter() - started, rows=batch.num_rows,
+                bytes=batch.nbytes)
+        started = time.perf_counter()
+    if columns is None:
+        raise Error("Cann't profile {0}, it has no records.".format(input_location))
+    name = os.path.basename(input_location)
+    if name.endswith(".gz"):
+        name = name[:-3]
+    name = os.path.splitext(name)[0]
+    config = {"name": name,
+              "output_format": source_format,
+              "output_rec_cnt": columns[0].rows,
+              "source": "fake",
+              "seed": DEFAULT_SEED,
+              "output_file": "{0}_fake.{1}".format(name, source_format)
+             }
+    if source_format == "csv" and delimiter != DEFAULT_DELIMITER:
+        config["delimiter"] = delimiter
+    config["fields"] = [column.field() for column in columns]
+    return (config, {column.name: column.statistics() for column in columns})
@@ -0,0 +1,112 @@
+import numpy as np
+
+from datagen.constants import DEFAULT_CARDINALITY, DEFAULT_ZIPF_EXPONENT
+from datagen.counter_rng import CounterRNG
+
+# draw of the parent row of a child row
+PARENT_DRAW = 0
+
+class Error(Exception):
+    """Base class for exceptions in this module."""
+    pass
+
+class RefHelper:
+    """This Class is used to generate foreign keys referencing the key field of a parent table.
+
+    Parent rows are sampled per child row and their key is regenerated from the seed of the
+    parent table, parent key generators are addressed by row, so the parent table is never
+    materialized or held in memory.
+    """
+    def __init__(self, num_records=1000, seed=1000, locale=None):
+        self.num_records = num_records
+        self.seed = seed
+        self.locale = locale
+        self.rng = CounterRNG(seed)
+        # helpers of parent tables indexed by helper name, records, seed and locale
+        self._parent_helpers = {}
+
+    def _parent_helper(self, helper, parent_records, parent_seed, parent_locale):
+        # plan imports this module, helpers are resolved when the first key is generated
+        from datagen.plan import HELPERS
+        key = (helper, parent_records, parent_seed, parent_locale)
+        if key not in self._parent_helpers:
+            self._parent_helpers[key] = HELPERS[helper](parent_records, parent_seed, parent_locale)
+        return self._parent_helpers[key]
+
+    def parent_rows(self, parent_records, cardinality, exponent, rows):
+        """Samples the parent row of every child row.
+        Args:
+            parent_records: number of records of the parent table
+            cardinality: uniform, fixed or zipf distribution of the children per parent
+            exponent: exponent of a zipf distribution
+            rows: int array of child row indices
+        Returns:
+            int64 array of parent row indices
+        """
+        if cardinality == "fixed":
+            # child rows are spread evenly over the parent rows, in order
+            scaled = rows.astype(np.float64) * (float(parent_records) / self.num_records)
+            return np.minimum(scaled.astype(np.int64), parent_records - 1)
+        if cardinality == "zipf":
+            return self.rng.zipf(rows, parent_records, exponent, PARENT_DRAW)
+        uniform = self.rng.random(rows, PARENT_DRAW)
+        return np.minimum((uniform * parent_records).astype(np.int64), parent_records - 1)
+
+    def _fake_ref(self, parent, parent_records, parent_seed, parent_locale, cardinality,
+        exponent, rows):
+        helper = self._parent_helper(parent.helper, parent_records, parent_seed, parent_locale)
+        parent_rows = self.parent_rows(parent_records, cardinality, exponent, rows)
+        (status, values) = helper.generate(parent.method, parent.args, parent_rows, parent.stream)
+        return values
+
+    @staticmethod
+    def compile(data_type, min_length=None, max_length=None,
+        min_value=None, max_value=None, format=None, values=None, weights=None):
+        """ref fields need their parent column, they are compiled with compile_reference.
+        Raises:
+            Error always
+        """
+        raise Error("Cann't compile data_type: {0}, ref fields are compiled with compile_reference.".format(data_type))
+
+    @staticmethod
+    def compile_reference(parent, parent_records, parent_seed, parent_locale=None,
+        cardinality=None, exponent=None):
+        """Resolves a ref field into a generator method once.
+        Args:
+            parent: ColumnGenerator of the referenced field of the parent table
+            parent_records: number of records of the parent table
+            parent_seed: seed of the parent table
+            parent_locale: locale of the parent table
+            cardinality: uniform, fixed or zipf distribution of the children per parent,
+                uniform if not given
+            exponent: exponent of a zipf distribution, 1.0 if not given
+        Returns:
+            tuple of generator method name and a tuple of its arguments
+        Raises:
+            Error if the parent table has no records
+        """
+        if parent_records < 1:
+            raise Error("Cann't compile reference to {0}, the parent table has no records.".format(parent.name))
+        return ("_fake_ref", (parent, parent_records, parent_seed, parent_locale,
+            cardinality or DEFAULT_CARDINALITY, float(exponent or DEFAULT_ZIPF_EXPONENT)))
+
+    def generate(self, method, args, rows=None, stream=0):
+        """Generates a whole column of foreign keys.
+        Args:
+            method: generator method name returned by compile_reference
+            args: arguments returned by compile_reference
+            rows: int array of row indices to generate, defaults to the first num_records rows
+            stream: key of the random stream of the column
+        Returns:
+            tuple of status and the keys as returned by the helper of the parent column
+        Raises:
+            Error if data cann't be faked
+        """
+        if rows is None:
+            rows = np.arange(self.num_records)
+        self.rng = CounterRNG(self.seed, stream)
+        try:
+            return_values = getattr(self, method)(*args, np.asarray(rows))
+        except Exception as e:
+            raise Error("Cann't fake data with {0}, Exception {1} occurred.".format(method, e))
+        return (True, return_values)
@@ -0,0 +1,150 @@
+import os
+import tempfile
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+from datagen.io_helper import IOHelper, is_dataset
+from datagen.metrics import Metrics
+
+class Shard(namedtuple("Shard", ["index", "start", "stop"])):
+    """Row range [start, stop) of the output generated by a single worker.
+    Attributes:
+        index: 0-based index of the shard
+        start: first row of the shard
+        stop: row after the last row of the shard
+    """
+    __slots__ = ()
+
+    @property
+    def num_records(self):
+        return self.stop - self.start
+
+#
+# Module Methods
+#
+
+def make_shards(num_records, num_shards):
+    """Splits the output into contiguous row ranges of nearly equal size.
+    Args:
+        num_records: total number of records to generate
+        num_shards: number of shards to split the records into
+    Returns:
+        list of non-empty shards ordered by row range
+    """
+    shards = []
+    for index in range(num_shards):
+        start = num_records * index // num_shards
+        stop = num_records * (index + 1) // num_shards
+        if stop > start:
+            shards.append(Shard(index, start, stop))
+    return shards
+
+def part_location(output_location, index):
+    """Location of a part file, parts are written into a directory named after the output file.
+    Args:
+        output_location: output file location of the config
+        index: index of the shard
+    Returns:
+        location of the part file
+    """
+    extension = os.path.splitext(output_location.rstrip("/"))[1]
+    return "{0}/part-{1:05d}{2}".format(output_location.rstrip("/"), index, extension)
+
+def shard_writer_options(output_format, shard, writer_options=None, skip_header=False):
+    """Writer options of a shard.
+    csv parts merged after the first one are written without header, and every shard of a
+    parquet dataset writes files of its own into the dataset directory.
+    Args:
+        output_format: one of the valid output formats
+        shard: Shard to write
+        writer_options: keyword arguments of the writer of the output format
+        skip_header: whether to write a csv shard without header
+    Returns:
+        dict of keyword arguments
+    """
+    writer_options = dict(writer_options or {})
+    if output_format == "csv" and skip_header:
+        writer_options["include_header"] = False
+    if is_dataset(output_format, writer_options):
+        writer_options["basename_template"] = "part-{0:05d}-{{i}}.parquet".format(shard.index)
+    return writer_options
+
+def write_shard(plan, shard, output_format, output_location, batch_size=None,
+    profile_name="default", writer_options=None, endpoint_url=None):
+    """Generates a shard with its own helpers and persists it, runs in a worker process.
+    Args:
+        plan: compiled Plan of the schema
+        shard: Shard to generate
+        output_format: one of the valid output formats
+        output_location: location of the part file
+        batch_size: maximum number of records to hold in memory, defaults to the whole shard
+        profile_name: profile used to access s3
+        writer_options: keyword arguments of the writer of the output format
+        endpoint_url: url of an s3 compatible endpoint, aws if None
+    Returns:
+        tuple of the location of the part file and the Metrics of the shard
+    """
+    if batch_size is None:
+        batch_size = shard.num_records
+    metrics = Metrics()
+    started = time.perf_counter()
+    iohelp = IOHelper(profile_name, endpoint_url, metrics)
+    batches = plan.iter_batches(batch_size, shard.start, shard.stop, metrics)
+    iohelp.write_batches(batches, output_location, output_format, writer_options)
+    # shards of a dataset share its directory, the output size is read once all are written
+    size = 0 if is_dataset(output_format, writer_options) else iohelp.output_size(output_location)
+    metrics.add_remainder("write", time.perf_counter() - started, shard.num_records, size)
+    return (output_location, metrics)
+
+def run_shards(plan, shards, output_format, output_location, workers, batch_size=None,
+    merge=True, profile_name="default", writer_options=None, endpoint_url=None, metrics=None):
+    """Generates shards in a pool of worker processes.
+    Args:
+        plan: compiled Plan of the schema
+        shards: shards returned by make_shards
+        output_format: one of the valid output formats
+        output_location: output file location of the config
+        workers: number of worker processes
+        batch_size: maximum number of records a worker holds in memory
+        merge: merge parts into output_location if True, else keep them as part files
+            in a directory named output_location
+        profile_name: profile used to access s3
+        writer_options: keyword arguments of the writer of the output format, shards of a
+            parquet dataset are written into the dataset directory and never merged
+        endpoint_url: url of an s3 compatible endpoint, aws if None
+        metrics: optional Metrics the metrics of the shards and the merge are added to
+    Returns:
+        list of written locations
+    """
+    iohelp = IOHelper(profile_name, endpoint_url, metrics)
+    dataset = is_dataset(output_format, writer_options)
+    with tempfile.TemporaryDirectory() as temp_dir:
+        if merge and not dataset:
+            parts_location = temp_dir
+        else:
+            parts_location = output_location
+            # parts of a previous run with more shards would be left next to the new ones
+            iohelp.remove(parts_location)
+            iohelp.makedirs(parts_location)
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(write_shard, plan, shard, output_format,
+                output_location if dataset else part_location(parts_location, shard.index),
+                batch_size, profile_name, shard_writer_options(output_format, shard,
+                writer_options, merge and shard is not shards[0]), endpoint_url)
+                for shard in shards]
+            part_locations = []
+            for future in futures:
+                (location, shard_metrics) = future.result()
+                part_locations.append(location)
+                if metrics is not None:
+                    metrics.merge(shard_metrics)
+        if dataset:
+            return [output_location]
+        if not merge:
+            return part_locations
+        started = time.perf_counter()
+        iohelp.merge_parts(part_locations, output_location, output_format, writer_options)
+        if metrics is not None:
+            metrics.add("write", seconds=time.perf_counter() - started)
+    return [output_location]
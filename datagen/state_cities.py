@@ -0,0 +1,63 @@
+# cities of every state, district and territory of the en_US faker locale, indexed by the
+# state abbreviations of its states_postcode, so composite addresses pair a state with one
+# of its own cities. Faker has no cities per state.
+STATE_CITIES = {"AK": ("Anchorage", "Fairbanks", "Juneau", "Sitka", "Ketchikan"),
+                "AL": ("Birmingham", "Montgomery", "Mobile", "Huntsville", "Tuscaloosa"),
+                "AR": ("Little Rock", "Fort Smith", "Fayetteville", "Springdale", "Jonesboro"),
+                "AS": ("Pago Pago", "Tafuna", "Leone"),
+                "AZ": ("Phoenix", "Tucson", "Mesa", "Chandler", "Flagstaff"),
+                "CA": ("Los Angeles", "San Diego", "San Jose", "San Francisco", "Fresno", "Sacramento"),
+                "CO": ("Denver", "Colorado Springs", "Aurora", "Fort Collins", "Boulder"),
+                "CT": ("Bridgeport", "New Haven", "Hartford", "Stamford", "Waterbury"),
+                "DC": ("Washington",),
+                "DE": ("Wilmington", "Dover", "Newark", "Middletown", "Smyrna"),
+                "FL": ("Jacksonville", "Miami", "Tampa", "Orlando", "Tallahassee"),
+                "FM": ("Palikir", "Weno", "Kolonia"),
+                "GA": ("Atlanta", "Augusta", "Columbus", "Savannah", "Athens"),
+                "GU": ("Hagatna", "Dededo", "Tamuning"),
+                "HI": ("Honolulu", "Hilo", "Kailua", "Pearl City", "Kahului"),
+                "IA": ("Des Moines", "Cedar Rapids", "Davenport", "Sioux City", "Iowa City"),
+                "ID": ("Boise", "Meridian", "Nampa", "Idaho Falls", "Pocatello"),
+                "IL": ("Chicago", "Aurora", "Naperville", "Rockford", "Springfield"),
+                "IN": ("Indianapolis", "Fort Wayne", "Evansville", "South Bend", "Bloomington"),
+                "KS": ("Wichita", "Overland Park", "Kansas City", "Topeka", "Lawrence"),
+                "KY": ("Louisville", "Lexington", "Bowling Green", "Owensboro", "Frankfort"),
+                "LA": ("New Orleans", "Baton Rouge", "Shreveport", "Lafayette", "Lake Charles"),
+                "MA": ("Boston", "Worcester", "Springfield", "Cambridge", "Lowell"),
+                "MD": ("Baltimore", "Frederick", "Rockville", "Gaithersburg", "Annapolis"),
+                "ME": ("Portland", "Lewiston", "Bangor", "South Portland", "Augusta"),
+                "MH": ("Majuro", "Ebeye"),
+                "MI": ("Detroit", "Grand Rapids", "Warren", "Lansing", "Ann Arbor"),
+                "MN": ("Minneapolis", "Saint Paul", "Rochester", "Duluth", "Bloomington"),
+                "MO": ("Kansas City", "Saint Louis", "Springfield", "Columbia", "Independence"),
+                "MP": ("Saipan", "Tinian", "Rota"),
+                "MS": ("Jackson", "Gulfport", "Southaven", "Hattiesburg", "Biloxi"),
+                "MT": ("Billings", "Missoula", "Great Falls", "Bozeman", "Helena"),
+                "NC": ("Charlotte", "Raleigh", "Greensboro", "Durham", "Wilmington"),
+                "ND": ("Fargo", "Bismarck", "Grand Forks", "Minot", "West Fargo"),
+                "NE": ("Omaha", "Lincoln", "Bellevue", "Grand Island", "Kearney"),
+                "NH": ("Manchester", "Nashua", "Concord", "Dover", "Rochester"),
+                "NJ": ("Newark", "Jersey City", "Paterson", "Elizabeth", "Trenton"),
+                "NM": ("Albuquerque", "Las Cruces", "Rio Rancho", "Santa Fe", "Roswell"),
+                "NV": ("Las Vegas", "Henderson", "Reno", "North Las Vegas", "Carson City"),
+                "NY": ("New York", "Buffalo", "Rochester", "Yonkers", "Syracuse", "Albany"),
+                "OH": ("Columbus", "Cleveland", "Cincinnati", "Toledo", "Akron"),
+                "OK": ("Oklahoma City", "Tulsa", "Norman", "Broken Arrow", "Edmond"),
+                "OR": ("Portland", "Salem", "Eugene", "Gresham", "Bend"),
+                "PA": ("Philadelphia", "Pittsburgh", "Allentown", "Erie", "Harrisburg"),
+                "PR": ("San Juan", "Bayamon", "Carolina", "Ponce", "Caguas"),
+                "PW": ("Koror", "Melekeok", "Airai"),
+                "RI": ("Providence", "Warwick", "Cranston", "Pawtucket", "Newport"),
+                "SC": ("Charleston", "Columbia", "North Charleston", "Greenville", "Rock Hill"),
+                "SD": ("Sioux Falls", "Rapid City", "Aberdeen", "Brookings", "Pierre"),
+                "TN": ("Nashville", "Memphis", "Knoxville", "Chattanooga", "Clarksville"),
+                "TX": ("Houston", "San Antonio", "Dallas", "Austin", "Fort Worth", "El Paso"),
+                "UT": ("Salt Lake City", "West Valley City", "Provo", "Ogden", "St. George"),
+                "VA": ("Virginia Beach", "Norfolk", "Chesapeake", "Richmond", "Arlington"),
+                "VI": ("Charlotte Amalie", "Christiansted", "Frederiksted"),
+                "VT": ("Burlington", "South Burlington", "Rutland", "Montpelier", "Barre"),
+                "WA": ("Seattle", "Spokane", "Tacoma", "Vancouver", "Bellevue"),
+                "WI": ("Milwaukee", "Madison", "Green Bay", "Kenosha", "Racine"),
+                "WV": ("Charleston", "Huntington", "Morgantown", "Parkersburg", "Wheeling"),
+                "WY": ("Cheyenne", "Casper", "Laramie", "Gillette", "Rock Springs")
+               }
@@ -0,0 +1,291 @@
+import string
+
+import numpy as np
+import pyarrow as pa
+
+from datagen.counter_rng import CounterRNG, stream_key
+
+DEFAULT_LOCALE = "en_US"
+# size of the random letter pool unbounded str values are cut from
+LETTER_POOL_SIZE = 1 << 20
+# pools are generated with a fixed seed so they are identical in every process
+POOL_SEED = 0
+# number of words of a lorem sentence, same range as faker sentence
+MIN_SENTENCE_WORDS = 3
+MAX_SENTENCE_WORDS = 8
+# separate draw ranges of the random values of a row
+LENGTH_DRAW = 0
+START_DRAW = 1
+SENTENCE_DRAW = 1 << 32
+WORD_DRAW = 1 << 48
+
+# characters drawn for each placeholder of a format, and whether it may be left empty
+PLACEHOLDERS = {"#": (string.digits, False),
+                "%": (string.digits[1:], False),
+                "?": (string.ascii_letters, False),
+                "!": (string.digits, True),
+                "@": (string.digits[1:], True)
+               }
+EMPTY_BYTE = 0
+# largest offset of an arrow string array, offsets are int32
+MAX_STRING_BYTES = (1 << 31) - 1
+
+# process-wide caches of the letter pool and of word pools indexed by locale or word list
+_LETTER_POOL = []
+_WORD_POOLS = {}
+
+class Error(Exception):
+    """Base class for exceptions in this module."""
+    pass
+
+class OffsetOverflow(Error):
+    """Raised when the values of a column of a batch hold more bytes than the offsets of an
+    arrow string array address, the batch is split and generated again."""
+    pass
+
+def string_offsets(offsets):
+    """Converts int64 offsets of string values to the int32 offsets of an arrow string array.
+    Raises:
+        OffsetOverflow if the values hold more than MAX_STRING_BYTES bytes
+    """
+    if len(offsets) and offsets[-1] > MAX_STRING_BYTES:
+        raise OffsetOverflow("Cann't build a string array of {0} bytes, arrow string arrays hold at most {1} bytes.".format(
+            int(offsets[-1]), MAX_STRING_BYTES))
+    return offsets.astype(np.int32)
+
+def compile_format(format):
+    """Parses a bothify style format once.
+    Args:
+        format: format string with #, %, ?, ! and @ placeholders
+    Returns:
+        tuple of the utf-8 encoded format, with a single byte per placeholder, and a
+        tuple of (byte position, placeholder) pairs
+    """
+    encoded = bytearray()
+    placeholders = []
+    for char in format:
+        if char in PLACEHOLDERS:
+            placeholders.append((len(encoded), char))
+            encoded.append(ord(char))
+        else:
+            encoded.extend(char.encode("utf-8"))
+    return (bytes(encoded), tuple(placeholders))
+
+def string_array(chars, kept=None):
+    """Views a fixed-width byte matrix as an arrow string array without per-row python strings.
+    Args:
+        chars: uint8 matrix with one row per value
+        kept: optional boolean matrix of the bytes to keep, all bytes are kept if None
+    Returns:
+        arrow string array
+    Raises:
+        OffsetOverflow if the values hold more than MAX_STRING_BYTES bytes
+    """
+    (num_records, width) = chars.shape
+    if kept is None:
+        data = chars.ravel()
+        offsets = np.arange(0, (num_records + 1) * width, width, dtype=np.int64)
+    else:
+        data = chars[kept]
+        offsets = _offsets(kept.sum(axis=1))
+    return pa.Array.from_buffers(pa.string(), num_records,
+        [None, pa.py_buffer(string_offsets(offsets)), pa.py_buffer(np.ascontiguousarray(data))])
+
+def _offsets(lengths):
+    """Start offsets of consecutive pieces of the given lengths, followed by the total length."""
+    offsets = np.zeros(len(lengths) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=offsets[1:])
+    return offsets
+
+def _gather(data, starts, lengths):
+    """Concatenates the slices data[start:start + length] without a python loop.
+    Args:
+        data: uint8 array to cut slices from
+        starts: int array of slice starts
+        lengths: int array of slice lengths
+    Returns:
+        uint8 array of the concatenated slices
+    """
+    offsets = _offsets(lengths)
+    return data[np.arange(offsets[-1]) - np.repeat(offsets[:-1] - starts, lengths)]
+
+def load_letter_pool():
+    """Random ascii letters generated once per process, str values are slices of it."""
+    if not _LETTER_POOL:
+        letters = np.frombuffer(string.ascii_letters.encode("ascii"), dtype=np.uint8)
+        draws = CounterRNG(POOL_SEED, stream_key("letters")).raw(np.arange(LETTER_POOL_SIZE))
+        _LETTER_POOL.append(letters[draws % np.uint64(len(letters))])
+    return _LETTER_POOL[0]
+
+class WordPool(object):
+    """Words of a lorem paragraph stored in a single contiguous buffer.
+
+    Every word is stored twice, followed by a connector and followed by a punctuation
+    and a connector, so a paragraph is a concatenation of slices of the buffer.
+    """
+    def __init__(self, words, connector=" ", punctuation="."):
+        encoded = [word.encode("utf-8") for word in words]
+        connector = connector.encode("utf-8")
+        punctuation = punctuation.encode("utf-8")
+        connected = [word + connector for word in encoded]
+        punctuated = [word + punctuation + connector for word in encoded]
+        self.data = np.frombuffer(b"".join(connected + punctuated), dtype=np.uint8)
+        starts = _offsets([len(word) for word in connected + punctuated])[:-1]
+        self.connected_starts = starts[:len(encoded)]
+        self.punctuated_starts = starts[len(encoded):]
+        self.lengths = np.array([len(word) for word in encoded], dtype=np.int64)
+        self.connector_length = len(connector)
+        self.punctuation_length = len(punctuation)
+
+def load_word_pool(locale=DEFAULT_LOCALE, words=None):
+    """Loads the lorem words of a locale, or a user provided word list, once per process.
+    Args:
+        locale: faker locale of the lorem provider
+        words: optional tuple of words to use instead of the lorem provider
+    Returns:
+        WordPool
+    """
+    from faker import Faker
+    key = words or locale
+    if key not in _WORD_POOLS:
+        provider = Faker(locale)[locale].paragraph.__self__
+        _WORD_POOLS[key] = WordPool(words or provider.word_list,
+            provider.word_connector, provider.sentence_punctuation)
+    return _WORD_POOLS[key]
+
+class TextHelper:
+    """This Class is used to generate whole columns of fake text in contiguous buffers."""
+    def __init__(self, num_records=1000, seed=1000, locale=None):
+        self.num_records = num_records
+        self.seed = seed
+        self.locale = locale or DEFAULT_LOCALE
+        self.rng = CounterRNG(seed)
+
+    def _fake_lorem(self, min_sentences, max_sentences, words, rows):
+        pool = load_word_pool(self.locale, words)
+        sentences = self.rng.integers(rows, min_sentences, max_sentences, LENGTH_DRAW)
+        # one entry per sentence
+        sentence_rows = np.repeat(np.arange(len(rows)), sentences)
+        sentence_index = np.arange(len(sentence_rows)) - np.repeat(_offsets(sentences)[:-1], sentences)
+        sentence_words = self.rng.integers(rows[sentence_rows], MIN_SENTENCE_WORDS,
+            MAX_SENTENCE_WORDS, SENTENCE_DRAW + sentence_index)
+        last_sentence = sentence_index == sentences[sentence_rows] - 1
+        # one entry per word
+        word_sentences = np.repeat(np.arange(len(sentence_rows)), sentence_words)
+        word_rows = sentence_rows[word_sentences]
+        row_words = np.bincount(word_rows, minlength=len(rows))
+        word_index = np.arange(len(word_rows)) - _offsets(row_words)[:-1][word_rows]
+        word_ids = self.rng.raw(rows[word_rows], WORD_DRAW + word_index) % np.uint64(len(pool.lengths))
+        word_ids = word_ids.astype(np.int64)
+        sentence_starts = _offsets(sentence_words)
+        first_word = np.zeros(len(word_rows), dtype=bool)
+        first_word[sentence_starts[:-1]] = True
+        last_word = np.zeros(len(word_rows), dtype=bool)
+        last_word[sentence_starts[1:] - 1] = True
+        # words end with a connector, sentences with a punctuation and a connector,
+        # and paragraphs with a punctuation
+        starts = np.where(last_word, pool.punctuated_starts[word_ids], pool.connected_starts[word_ids])
+        lengths = pool.lengths[word_ids] + np.where(last_word, pool.punctuation_length, 0)
+        lengths += np.where(last_word & last_sentence[word_sentences], 0, pool.connector_length)
+        data = _gather(pool.data, starts, lengths)
+        capitals = _offsets(lengths)[:-1][first_word]
+        lower = (data[capitals] >= ord("a")) & (data[capitals] <= ord("z"))
+        data[capitals[lower]] -= ord("a") - ord("A")
+        offsets = _offsets(np.bincount(word_rows, weights=lengths, minlength=len(rows)).astype(np.int64))
+        return pa.Array.from_buffers(pa.string(), len(rows),
+            [None, pa.py_buffer(string_offsets(offsets)), pa.py_buffer(data)])
+
+    def _fake_str(self, min_length, max_length, rows):
+        pool = load_letter_pool()
+        lengths = self.rng.integers(rows, min_length, max_length, LENGTH_DRAW)
+        starts = self.rng.integers(rows, 0, LETTER_POOL_SIZE - max_length, START_DRAW)
+        offsets = _offsets(lengths)
+        return pa.Array.from_buffers(pa.string(), len(rows),
+            [None, pa.py_buffer(string_offsets(offsets)), pa.py_buffer(_gather(pool, starts, lengths))])
+
+    def _fake_format(self, encoded, placeholders, rows):
+        chars = np.empty((len(rows), len(encoded)), dtype=np.uint8)
+        chars[:] = np.frombuffer(encoded, dtype=np.uint8)
+        if not placeholders:
+            return string_array(chars)
+        positions = np.array([position for (position, _) in placeholders])
+        draws = self.rng.raw(rows[:, None], positions[None, :])
+        optional = False
+        for placeholder, (alphabet, may_be_empty) in PLACEHOLDERS.items():
+            selected = np.array([char == placeholder for (_, char) in placeholders])
+            if not selected.any():
+                continue
+            alphabet = np.frombuffer(alphabet.encode("ascii"), dtype=np.uint8)
+            values = draws[:, selected]
+            generated = alphabet[values % np.uint64(len(alphabet))]
+            if may_be_empty:
+                optional = True
+                generated[(values >> np.uint64(63)) == 1] = EMPTY_BYTE
+            chars[:, positions[selected]] = generated
+        if not optional:
+            return string_array(chars)
+        return string_array(chars, chars != EMPTY_BYTE)
+
+    @staticmethod
+    def compile(data_type, min_length=None, max_length=None,
+        min_value=None, max_value=None, format=None, values=None, weights=None):
+        """Resolves a text data type and its arguments into a generator method once.
+        Args:
+            data_type: lorem or str
+            min_length: minimum number of sentences of lorem or characters of str, max_length
+                if not given
+            max_length: maximum number of sentences of lorem or characters of str
+            format: bothify style format of str values, lengths are ignored if given
+            values: words of lorem paragraphs, lorem words of the locale if not given
+            min_value, max_value, weights: accepted for parity with FakeHelper.compile
+        Returns:
+            tuple of generator method name and a tuple of its parsed arguments
+        Raises:
+            Error if data_type cann't be generated as a text column
+        """
+        data_type = data_type.lower()
+        if data_type in ("string", "str") and format is not None:
+            return ("_fake_format", compile_format(format))
+        if data_type in ("lorem", "string", "str"):
+            if max_length is None:
+                max_length = 3 if data_type == "lorem" else 20
+            if min_length is None:
+                min_length = max_length
+            if min_length < 0 or min_length > max_length:
+                raise Error("Cann't compile data_type: {0}, min_length must be between 0 and max_length.".format(data_type))
+            if data_type == "lorem":
+                return ("_fake_lorem", (min_length, max_length, tuple(values) if values else None))
+            if max_length > LETTER_POOL_SIZE:
+                raise Error("Cann't compile data_type: {0}, max_length must not exceed {1}.".format(data_type, LETTER_POOL_SIZE))
+            return ("_fake_str", (min_length, max_length))
+        raise Error("Cann't compile data_type: {0}, it is not a text data type.".format(data_type))
+
+    def generate(self, method, args, rows=None, stream=0):
+        """Generates a whole text column into a single arrow string array.
+        Args:
+            method: generator method name returned by compile
+            args: parsed arguments returned by compile
+            rows: int array of row indices to generate, defaults to the first num_records rows
+            stream: key of the random stream of the column
+        Returns:
+            tuple of status and arrow string array of generated values
+        Raises:
+            OffsetOverflow if the values hold more bytes than an arrow string array
+            Error if data cann't be faked
+        """
+        if rows is None:
+            rows = np.arange(self.num_records)
+        self.rng = CounterRNG(self.seed, stream)
+        try:
+            return_array = getattr(self, method)(*args, np.asarray(rows))
+        except OffsetOverflow:
+            raise
+        except Exception as e:
+            raise Error("Cann't fake data with {0}, Exception {1} occurred.".format(method, e))
+        return (True, return_array)
+
+    def fake_it(self, data_type, min_length=None, max_length=None,
+        min_value=None, max_value=None, format=None, values=None, weights=None):
+        (method, args) = self.compile(data_type, min_length, max_length,
+            min_value, max_value, format, values, weights)
+        return self.generate(method, args)
@@ -0,0 +1,151 @@
+import numpy as np
+
+from datagen.counter_rng import CounterRNG
+from datagen.text_helper import PLACEHOLDERS, OffsetOverflow, compile_format, string_array
+
+# rounds of the feistel network permuting row indices
+FEISTEL_ROUNDS = 4
+# draws of the round keys, apart from the draws of other helpers
+ROUND_DRAW = 1 << 56
+# permuted indices are uint64 values
+MAX_DOMAIN = 1 << 64
+# numpy defaults of the bounds of int fields
+DEFAULT_MIN_VALUE = 0
+DEFAULT_MAX_VALUE = 999
+
+class Error(Exception):
+    """Base class for exceptions in this module."""
+    pass
+
+class UniqueHelper:
+    """This Class is used to generate collision-free int and formatted str values.
+
+    Row indices are mapped to values by a keyed bijective permutation of the range of the
+    field, a feistel network over the smallest number of bits covering the range, walked
+    again while it lands outside the range. Every value is a pure function
+    of the row index, so values stay unique across batches, shards and workers without
+    keeping the values generated so far.
+    """
+    def __init__(self, num_records=1000, seed=1000, locale=None):
+        self.num_records = num_records
+        self.seed = seed
+        self.rng = CounterRNG(seed)
+
+    def permute(self, domain, values):
+        """Permutes indices of [0, domain) with a keyed feistel network and cycle walking.
+        Args:
+            domain: number of values of the range, at most MAX_DOMAIN
+            values: uint64 array of indices lower than domain
+        Returns:
+            uint64 array of distinct indices lower than domain for distinct indices
+        """
+        bits = max(1, (domain - 1).bit_length())
+        values = self._feistel(bits, values)
+        if domain < 1 << bits:
+            # the network permutes [0, 2 ** bits), values landing outside the range are
+            # walked through it again until they are back in range, fewer than 2 times on
+            # average
+            limit = np.uint64(domain)
+            walking = np.flatnonzero(values >= limit)
+            while walking.size:
+                values[walking] = self._feistel(bits, values[walking])
+                walking = walking[values[walking] >= limit]
+        return values
+
+    def _feistel(self, bits, values):
+        # halves of an odd number of bits differ by a bit, they swap widths every round
+        (left_bits, right_bits) = (bits // 2, bits - bits // 2)
+        left = values >> np.uint64(right_bits)
+        right = values & np.uint64((1 << right_bits) - 1)
+        for round in range(FEISTEL_ROUNDS):
+            mask = np.uint64((1 << left_bits) - 1)
+            (left, right) = (right, left ^ (self.rng.raw(right, ROUND_DRAW + round) & mask))
+            (left_bits, right_bits) = (right_bits, left_bits)
+        return (left << np.uint64(right_bits)) | right
+
+    def _unique_int(self, min_value, domain, rows):
+        values = self.permute(domain, rows.astype(np.uint64))
+        with np.errstate(over="ignore"):
+            return (values + np.uint64(min_value % MAX_DOMAIN)).view(np.int64)
+
+    def _unique_format(self, encoded, placeholders, domain, rows):
+        values = self.permute(domain, rows.astype(np.uint64))
+        chars = np.empty((len(rows), len(encoded)), dtype=np.uint8)
+        chars[:] = np.frombuffer(encoded, dtype=np.uint8)
+        # the permuted index is written as a mixed radix number, a digit per placeholder
+        for (position, placeholder) in reversed(placeholders):
+            alphabet = np.frombuffer(PLACEHOLDERS[placeholder][0].encode("ascii"), dtype=np.uint8)
+            radix = np.uint64(len(alphabet))
+            chars[:, position] = alphabet[values % radix]
+            values //= radix
+        return string_array(chars)
+
+    @staticmethod
+    def compile(data_type, min_length=None, max_length=None,
+        min_value=None, max_value=None, format=None, values=None, weights=None):
+        """unique fields need the number of records, they are compiled with compile_unique.
+        Raises:
+            Error always
+        """
+        raise Error("Cann't compile data_type: {0}, unique fields are compiled with compile_unique.".format(data_type))
+
+    @staticmethod
+    def compile_unique(data_type, num_records, min_value=None, max_value=None, format=None):
+        """Resolves a unique field into a generator method once.
+        Args:
+            data_type: int, or str with a format
+            num_records: number of records of the table, at most the number of values of
+                the range
+            min_value: lower bound of int values, DEFAULT_MIN_VALUE if not given
+            max_value: upper bound of int values, DEFAULT_MAX_VALUE if not given
+            format: bothify style format of str values, with #, % and ? placeholders
+        Returns:
+            tuple of generator method name and a tuple of its parsed arguments
+        Raises:
+            Error if the field cann't be unique or its range is smaller than num_records
+        """
+        data_type = data_type.lower()
+        if data_type == "int":
+            if min_value is None:
+                min_value = DEFAULT_MIN_VALUE
+            if max_value is None:
+                max_value = DEFAULT_MAX_VALUE
+            (method, args, domain) = ("_unique_int", (min_value,), max_value - min_value + 1)
+        elif data_type in ("string", "str") and format is not None:
+            (encoded, placeholders) = compile_format(format)
+            if any(PLACEHOLDERS[placeholder][1] for (_, placeholder) in placeholders):
+                raise Error("Cann't compile data_type: {0}, ! and @ placeholders may be empty and aren't valid in unique formats.".format(data_type))
+            domain = 1
+            for (_, placeholder) in placeholders:
+                domain *= len(PLACEHOLDERS[placeholder][0])
+            (method, args) = ("_unique_format", (encoded, placeholders))
+        else:
+            raise Error("Cann't compile data_type: {0}, only int and formatted str fields can be unique.".format(data_type))
+        if domain > MAX_DOMAIN:
+            raise Error("Cann't compile data_type: {0}, the range of a unique field must not exceed {1} values.".format(data_type, MAX_DOMAIN))
+        if domain < num_records:
+            raise Error("Cann't compile data_type: {0}, the range of {1} values is smaller than the {2} records.".format(data_type, domain, num_records))
+        return (method, args + (domain,))
+
+    def generate(self, method, args, rows=None, stream=0):
+        """Generates a whole column of unique values.
+        Args:
+            method: generator method name returned by compile_unique
+            args: parsed arguments returned by compile_unique
+            rows: int array of row indices to generate, defaults to the first num_records rows
+            stream: key of the random stream of the column, the key of the permutation
+        Returns:
+            tuple of status and the int64 numpy array or arrow string array of values
+        Raises:
+            Error if data cann't be faked
+        """
+        if rows is None:
+            rows = np.arange(self.num_records)
+        self.rng = CounterRNG(self.seed, stream)
+        try:
+            return_values = getattr(self, method)(*args, np.asarray(rows))
+        except OffsetOverflow:
+            raise
+        except Exception as e:
+            raise Error("Cann't fake data with {0}, Exception {1} occurred.".format(method, e))
+        return (True, return_values)
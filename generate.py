@@ -1,61 +1,72 @@
-import pandas as pd
+import json
+import logging
 import time
 
+import pandas as pd
+
 from datagen.fake_helper import FakeHelper
 from datagen.io_helper import IOHelper
+from datagen.metrics import Metrics
 from datagen import config_parser
 
+logger = logging.getLogger(__name__)
 
 class Error(Exception):
     """Base class for exceptions in this module."""
     pass
 
-def generate_fake_df(schema_parsed):
+def generate_fake_df(schema_parsed, metrics):
     faker = FakeHelper(schema_parsed.names.output_rec_cnt)
     output_df = pd.DataFrame()
     for field in schema_parsed.fields:
-        start_time = time.time() #degug
+        started = time.perf_counter()
         name = field.name
         (status, field_list) = faker.fake_it(field.type, field.min_length, 
-            field.max_length, field.min_value, field.max_value, field.values)
+            field.max_length, field.min_value, field.max_value, field.format, field.values,
+            field.weights)
+        generated = time.perf_counter()
         if status:
             output_df[name] = field_list
-        end_time = time.time() #degug
-        print ("Time taken to generate {0}: {1} seconds".format(name, end_time - start_time)) #degug
+        metrics.add("generate", name, generated - started, len(field_list))
+        metrics.add("convert", name, time.perf_counter() - generated, len(field_list),
+            int(output_df[name].memory_usage(index=False, deep=True)))
     return output_df
 
-def persist_df(schema_parsed, output_df):
-    start_time = time.time() #degug
+def persist_df(schema_parsed, output_df, metrics):
+    started = time.perf_counter()
     iohelp = IOHelper("codecommit")
     if schema_parsed.names.output_format == "parquet":
         status = iohelp.write_as_parquet(output_df, schema_parsed.names.output_file)
         if status:
-            end_time = time.time() #degug
-            print ("Time taken to persist DF: {0} seconds".format(end_time - start_time)) #degug
             print ("pandas df has been successfully persisted as parquet!")
     else:
         kwargs = dict(header=True, index=False, sep="|")
         status = iohelp.write_as_csv(output_df, schema_parsed.names.output_file, **kwargs)
         if status:
-            end_time = time.time() #degug
-            print ("Time taken to persist DF: {0} seconds".format(end_time - start_time)) #degug
             print ("pandas df has been successfully persisted as csv!")
+    if status:
+        metrics.add("write", seconds=time.perf_counter() - started, rows=len(output_df),
+            bytes=iohelp.output_size(schema_parsed.names.output_file))
 
-def parse_json_config(input_schema):
-    start_time = time.time() #degug
+def parse_json_config(input_schema, metrics):
+    started = time.perf_counter()
     schema_parsed = config_parser.parse(input_schema)
-    end_time = time.time() #degug
-    print ("Time taken to parse schema: {0} seconds".format(end_time - start_time)) #degug
+    metrics.add("parse", seconds=time.perf_counter() - started)
+    return schema_parsed
 
 def main():
     """main method"""
-    schema_parsed = parse_json_config(input_schema)
+    metrics = Metrics()
+    schema_parsed = parse_json_config(input_schema, metrics)
     if schema_parsed.names.source == "fake":
-        output_df = generate_fake_df(schema_parsed)
-        persist_df (schema_parsed, output_df)
+        output_df = generate_fake_df(schema_parsed, metrics)
+        persist_df (schema_parsed, output_df, metrics)
+    metrics.log(logger)
+    with open(report_file, "w", encoding="utf-8") as f:
+        json.dump(metrics.report(config=input_schema, rows=schema_parsed.names.output_rec_cnt), f, indent=2)
 
 if __name__ == "__main__":
     input_schema = "config.json"
+    report_file = "report.json"
+    logging.basicConfig(level=logging.DEBUG)
     main()
-
-    
\ No newline at end of file
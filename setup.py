@@ -25,10 +25,12 @@ setup(
     license='MIT License',
     packages=find_packages(exclude=excluded_packages),
     platforms=["any"],
-    python_requires=">=3.6",
+    python_requires=">=3.9",
     install_requires=[
+        "numpy>=1.17.0",
         "pandas>=0.24.1",
-        "s3fs>=0.4.2",
+        "pyarrow>=13.0.0",
+        "s3fs>=2021.11.0",
         "faker>=3.0.0"
     ]
 )
\ No newline at end of file
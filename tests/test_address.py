@@ -0,0 +1,38 @@
+import pyarrow as pa
+import pytest
+
+from datagen import config_parser
+from datagen.plan import compile_schema
+from datagen.state_cities import STATE_CITIES
+
+
+def states_postcode():
+    from faker import Faker
+
+    return Faker("en_US")["en_US"].city.__self__.states_postcode
+
+
+@pytest.mark.parametrize("engine", ["batch", "record"])
+def test_city_state_and_zip_code_match(engine):
+    schema = config_parser.make_config_object({
+        "name": "addresses", "output_format": "parquet", "output_rec_cnt": 3000, "source": "fake",
+        "seed": 13, "output_file": "addresses.parquet", "engine": engine,
+        "fields": [{"name": "addr", "type": "composite_address",
+                    "values": ["city", "state_abbr", "zip_code", "address"]}]})
+    rows = pa.Table.from_batches(list(compile_schema(schema).iter_batches(1000))).to_pylist()
+    ranges = states_postcode()
+    states = set()
+    for row in rows:
+        state = row["addr_state_abbr"]
+        states.add(state)
+        assert row["addr_city"] in STATE_CITIES[state]
+        (low, high) = ranges[state]
+        assert low <= int(row["addr_zip_code"]) <= high
+        assert row["addr_address"].endswith("\n{0}, {1} {2}".format(row["addr_city"], state,
+            row["addr_zip_code"]))
+    assert len(states) > 40
+
+
+def test_every_state_of_the_locale_has_cities():
+    assert set(STATE_CITIES) == set(states_postcode())
+    assert all(STATE_CITIES.values())
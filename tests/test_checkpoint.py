@@ -0,0 +1,110 @@
+import json
+import os
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+
+from datagen import config_parser
+from datagen.checkpoint import MANIFEST_NAME, Error, config_hash, run_checkpointed
+
+FIELDS = [{"name": "id", "type": "int", "unique": True, "min_value": 1, "max_value": 1000000},
+          {"name": "segment", "type": "cat", "values": ["a", "b", "c"]},
+          {"name": "score", "type": "double", "distribution": {"type": "normal", "mean": 0, "stddev": 1}},
+          {"name": "opened_dt", "type": "date"},
+          {"name": "code", "type": "str", "format": "??-##"}]
+
+
+def make_schema(output_file, rows, fields=FIELDS, seed=21):
+    return config_parser.make_config_object({
+        "name": "checkpoint", "output_format": "parquet", "output_rec_cnt": rows, "source": "fake",
+        "seed": seed, "output_file": str(output_file), "batch_size": 700, "fields": fields})
+
+
+def read_parts(directory):
+    names = sorted(name for name in os.listdir(directory) if not name.startswith("_"))
+    return pa.concat_tables([pq.read_table(os.path.join(directory, name)) for name in names]).to_pydict()
+
+
+def read_manifest(directory):
+    with open(os.path.join(directory, MANIFEST_NAME)) as f:
+        return json.load(f)
+
+
+def test_run_writes_every_range_and_its_manifest(tmp_path):
+    output = tmp_path / "run"
+    (manifest, written) = run_checkpointed(make_schema(output, 2500), num_shards=3)
+    assert written == 3
+    assert [(entry["start"], entry["stop"]) for entry in manifest["ranges"]] == [(0, 834), (834, 1668), (1668, 2500)]
+    assert all(entry["complete"] for entry in read_manifest(output)["ranges"])
+    values = read_parts(output)
+    assert len(values["id"]) == 2500
+    assert len(set(values["id"])) == 2500
+
+
+def test_resume_writes_only_the_incomplete_ranges(tmp_path):
+    output = tmp_path / "resume"
+    schema = make_schema(output, 3000)
+    run_checkpointed(schema, num_shards=3)
+    expected = read_parts(output)
+    # an interrupted run leaves a range incomplete, its part may be missing or truncated
+    manifest = read_manifest(output)
+    manifest["ranges"][1]["complete"] = False
+    with open(os.path.join(output, MANIFEST_NAME), "w") as f:
+        json.dump(manifest, f)
+    os.remove(os.path.join(output, "part-00001"))
+    first = os.path.getmtime(os.path.join(output, "part-00000"))
+    (manifest, written) = run_checkpointed(schema, num_shards=3)
+    assert written == 1
+    assert os.path.getmtime(os.path.join(output, "part-00000")) == first
+    assert read_parts(output) == expected
+    (_, written) = run_checkpointed(schema, num_shards=3)
+    assert written == 0
+
+
+def test_append_writes_the_records_of_a_larger_run(tmp_path):
+    appended = tmp_path / "appended"
+    run_checkpointed(make_schema(appended, 2000), num_shards=2)
+    (manifest, written) = run_checkpointed(make_schema(appended, 2000), append=1500)
+    assert written == 2
+    assert manifest["rows"] == 3500
+    assert [entry["part"] for entry in manifest["ranges"]] == [0, 1, 2, 3]
+    single = tmp_path / "single"
+    run_checkpointed(make_schema(single, 3500), workers=2, num_shards=3)
+    assert read_parts(appended) == read_parts(single)
+
+
+def test_append_needs_a_checkpointed_run(tmp_path):
+    with pytest.raises(Error, match="wasn't written with --checkpoint"):
+        run_checkpointed(make_schema(tmp_path / "missing", 100), append=10)
+
+
+def test_changed_config_isnt_resumed(tmp_path):
+    output = tmp_path / "changed"
+    run_checkpointed(make_schema(output, 1000))
+    with pytest.raises(Error, match="the config changed"):
+        run_checkpointed(make_schema(output, 1000, seed=22))
+    # the number of records and the location aren't part of the config hash
+    assert config_hash(make_schema(output, 1000)) == config_hash(make_schema(tmp_path / "moved", 5000))
+
+
+def test_default_bounds_are_hashed(tmp_path, monkeypatch):
+    schema = make_schema(tmp_path / "bounds", 100)
+    digest = config_hash(schema)
+    monkeypatch.setattr("datagen.checkpoint.DEFAULT_BOUNDS",
+        {"date": ("2000-01-01", "2025-12-31"), "timestamp": ("2000-01-01 00:00:00", "2025-12-31 23:59:59")})
+    assert config_hash(schema) != digest
+
+
+def test_fixed_cardinality_isnt_appended_to(tmp_path):
+    config = {"name": "set", "tables": [
+        {"name": "parents", "output_format": "parquet", "output_rec_cnt": 100, "source": "fake",
+         "seed": 1, "output_file": str(tmp_path / "parents"), "fields": [{"name": "id", "type": "int"}]},
+        {"name": "children", "output_format": "parquet", "output_rec_cnt": 300, "source": "fake",
+         "seed": 2, "output_file": str(tmp_path / "children"),
+         "fields": [{"name": "parent", "type": "ref", "references": "parents.id",
+                     "cardinality": {"distribution": "fixed"}}]}]}
+    children = config_parser.make_config_object(config).schemas[1]
+    run_checkpointed(children)
+    with pytest.raises(Error, match="fixed cardinality"):
+        run_checkpointed(children, append=100)
@@ -0,0 +1,93 @@
+import numpy as np
+import pyarrow as pa
+import pytest
+
+from datagen import config_parser
+from datagen.counter_rng import CounterRNG, stream_key
+from datagen.plan import compile_schema
+
+FIELDS = [
+    {"name": "id", "type": "int", "unique": True, "min_value": 1, "max_value": 100000},
+    {"name": "amount", "type": "decimal", "min_value": 0, "max_value": 1000},
+    {"name": "score", "type": "double", "distribution": {"type": "normal", "mean": 50, "stddev": 5},
+     "null_ratio": 0.2},
+    {"name": "flag", "type": "boolean"},
+    {"name": "segment", "type": "cat", "values": ["retail", "business", "private"], "weights": [70, 20, 10]},
+    {"name": "code", "type": "str", "format": "??-##-%%"},
+    {"name": "opened_dt", "type": "date"},
+    {"name": "updated_ts", "type": "timestamp"},
+    {"name": "opened_tm", "type": "time"},
+    {"name": "first_name", "type": "first_name"},
+    {"name": "address", "type": "composite_address"},
+    {"name": "label", "type": "expr", "expr": "concat(segment, '-', id)"}
+]
+
+
+def make_plan(engine="batch", num_records=1000, seed=42):
+    return compile_schema(config_parser.make_config_object({
+        "name": "rng", "output_format": "parquet", "output_rec_cnt": num_records,
+        "source": "fake", "seed": seed, "output_file": "rng.parquet", "engine": engine,
+        "fields": FIELDS}))
+
+
+def generate(plan, batch_size, start=0, stop=None):
+    """Values of every column, dictionaries of cat and faker columns differ per batch."""
+    return pa.Table.from_batches(list(plan.iter_batches(batch_size, start, stop))).to_pydict()
+
+
+def execute(plan, start=0, stop=None):
+    return plan.execute(start, stop).to_pydict()
+
+
+def test_draws_are_a_function_of_the_row():
+    rng = CounterRNG(7, stream_key("amount"))
+    rows = np.arange(10000)
+    values = rng.raw(rows)
+    assert np.array_equal(values[1234:5678], rng.raw(rows[1234:5678]))
+    assert np.array_equal(values[::-1], rng.raw(rows[::-1]))
+    assert np.array_equal(values, CounterRNG(7, stream_key("amount")).raw(rows))
+
+
+def test_seed_stream_and_draw_give_independent_values():
+    rows = np.arange(1000)
+    values = CounterRNG(7, 1).raw(rows)
+    for other in (CounterRNG(8, 1).raw(rows), CounterRNG(7, 2).raw(rows), CounterRNG(7, 1).raw(rows, 1)):
+        assert np.count_nonzero(values == other) == 0
+    assert len(np.unique(values)) == len(rows)
+
+
+def test_ranges_of_the_draws():
+    rng = CounterRNG(3)
+    rows = np.arange(100000)
+    random = rng.random(rows)
+    assert random.min() >= 0.0 and random.max() < 1.0
+    assert abs(random.mean() - 0.5) < 0.01
+    integers = rng.integers(rows, -5, 5)
+    assert integers.min() == -5 and integers.max() == 5
+    large = rng.integers(rows, 0, (1 << 62) - 1)
+    assert large.min() >= 0
+    zipf = rng.zipf(rows, 10, 1.2)
+    assert zipf.min() >= 0 and zipf.max() < 10
+    assert np.bincount(zipf)[0] > np.bincount(zipf)[9]
+    with pytest.raises(ValueError):
+        rng.integers(rows, 5, 4)
+
+
+@pytest.mark.parametrize("engine", ["batch", "record"])
+def test_records_dont_depend_on_the_batch_size(engine):
+    plan = make_plan(engine)
+    whole = generate(plan, 1000)
+    assert len(whole["id"]) == 1000
+    assert generate(plan, 97) == whole
+    assert generate(plan, 250, 300, 700) == {name: values[300:700] for name, values in whole.items()}
+
+
+@pytest.mark.parametrize("engine", ["batch", "record"])
+def test_records_depend_on_the_seed(engine):
+    assert execute(make_plan(engine)) == execute(make_plan(engine))
+    assert execute(make_plan(engine)) != execute(make_plan(engine, seed=43))
+
+
+def test_records_dont_depend_on_the_number_of_records():
+    # appended and sharded runs compile the plan with another number of records
+    assert execute(make_plan(num_records=5000), 0, 1000) == execute(make_plan(num_records=1000))
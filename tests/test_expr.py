@@ -0,0 +1,118 @@
+import datetime
+
+import pyarrow as pa
+import pytest
+
+from datagen import config_parser
+from datagen.expr_helper import ExprHelper, evaluate
+from datagen.plan import compile_schema
+
+COLUMNS = {"a": pa.array([-5, 1, 4]),
+           "f": pa.array([1.234, 2.0, -3.5]),
+           "s": pa.array(["ab", "cde", None]),
+           "c": pa.array(["x", "y", "x"]).dictionary_encode(),
+           "d": pa.array([datetime.date(2020, 1, 1)] * 3),
+           "t": pa.array([datetime.datetime(2020, 1, 1)] * 3, pa.timestamp("ms"))}
+
+
+def make_schema(fields):
+    return config_parser.make_config_object({
+        "name": "expr", "output_format": "parquet", "output_rec_cnt": 500, "source": "fake",
+        "seed": 9, "output_file": "expr.parquet", "fields": fields})
+
+
+@pytest.mark.parametrize("expr, expected", [
+    ("a + 1", [-4, 2, 5]),
+    ("a % 3", [1, 1, 1]),
+    ("a // 2", [-3, 0, 2]),
+    ("-7 % 3 + a", [-3, 3, 6]),
+    ("a / 2", [-2.5, 0.5, 2.0]),
+    ("a ** 2", [25, 1, 16]),
+    ("s + 'x'", ["abx", "cdex", None]),
+    ("c + s", ["xab", "ycde", None]),
+    ("concat(s, '-', a)", ["ab--5", "cde-1", None]),
+    ("coalesce(s, 'none')", ["ab", "cde", "none"]),
+    ("d + 3", [datetime.date(2020, 1, 4)] * 3),
+    ("t - 60", [datetime.datetime(2019, 12, 31, 23, 59)] * 3),
+    ("t - t", [0, 0, 0]),
+    ("year(d) * 100 + month(d)", [202001] * 3),
+    ("round(f, 2)", [1.23, 2.0, -3.5]),
+    ("int(f)", [1, 2, -3]),
+    ("substr(s, 1, 2)", ["b", "de", None]),
+    ("upper(col('s'))", ["AB", "CDE", None]),
+    ("length(s)", [2, 3, None]),
+    ("1 < a < 5", [False, False, True]),
+    ("a > 0 and not f > 1.5", [False, False, True]),
+    ("'big' if a > 1 else 'small'", ["small", "small", "big"]),
+    ("if_else(a > 1, a, -a)", [5, -1, 4]),
+    ("max(a, 2)", [2, 2, 4]),
+    ("7", [7, 7, 7]),
+])
+def test_expressions_evaluate_as_in_python(expr, expected):
+    assert evaluate(expr, COLUMNS, 3).to_pylist() == expected
+
+
+def test_expression_type_is_resolved_from_the_column_types():
+    types = {name: column.type for name, column in COLUMNS.items()}
+    assert ExprHelper.compile_expression("a * 2", types)[2] == pa.int64()
+    assert ExprHelper.compile_expression("a / 2", types)[2] == pa.float64()
+    assert ExprHelper.compile_expression("d + 1", types)[2] == pa.date32()
+    assert ExprHelper.compile_expression("str(a) + s", types)[2] == pa.string()
+
+
+@pytest.mark.parametrize("expr, message", [
+    ("a +", "Invalid expression"),
+    ("a.b", "Attribute isn't supported"),
+    ("lambda: 1", "Lambda isn't supported"),
+    ("open('x')", "valid functions are"),
+    ("round(f, ndigits=2)", "without keyword arguments"),
+    ("b'x'", "constants must be"),
+    ("col(a)", "col takes the name of a column"),
+    ("missing + 1", "isn't a field of the table"),
+])
+def test_invalid_expressions_are_rejected(expr, message):
+    fields = [{"name": "a", "type": "int"}, {"name": "f", "type": "float"},
+              {"name": "e", "type": "expr", "expr": expr}]
+    with pytest.raises(config_parser.SchemaParseException, match=message):
+        make_schema(fields)
+
+
+def test_cycles_are_rejected():
+    fields = [{"name": "a", "type": "int"},
+              {"name": "x", "type": "expr", "expr": "y + a"},
+              {"name": "y", "type": "expr", "expr": "z * 2"},
+              {"name": "z", "type": "expr", "expr": "x - 1"}]
+    with pytest.raises(config_parser.SchemaParseException, match="in a cycle"):
+        make_schema(fields)
+    fields[3]["expr"] = "z + 1"
+    with pytest.raises(config_parser.SchemaParseException, match="in a cycle"):
+        make_schema(fields)
+
+
+def test_fields_are_generated_after_their_dependencies_and_written_in_config_order():
+    schema = make_schema([
+        {"name": "total", "type": "expr", "expr": "net + tax"},
+        {"name": "tax", "type": "expr", "expr": "net // 5"},
+        {"name": "net", "type": "int", "min_value": 1, "max_value": 100},
+        {"name": "label", "type": "expr", "expr": "concat(addr_state_abbr, '-', total)"},
+        {"name": "addr", "type": "composite_address"}])
+    plan = compile_schema(schema)
+    table = pa.Table.from_batches(list(plan.iter_batches(128)))
+    assert table.column_names[:3] == ["total", "tax", "net"]
+    rows = table.to_pylist()
+    assert len(rows) == 500
+    for row in rows:
+        assert row["tax"] == row["net"] // 5
+        assert row["total"] == row["net"] + row["tax"]
+        assert row["label"] == "{0}-{1}".format(row["addr_state_abbr"], row["total"])
+
+
+def test_references_to_expr_fields_are_rejected():
+    with pytest.raises(config_parser.SchemaParseException, match="ref or expr field"):
+        config_parser.make_config_object({"name": "set", "tables": [
+            {"name": "parents", "output_format": "csv", "output_rec_cnt": 10, "source": "fake",
+             "seed": 1, "output_file": "parents.csv",
+             "fields": [{"name": "id", "type": "int"}, {"name": "key", "type": "expr", "expr": "id * 2"}]},
+            {"name": "children", "output_format": "csv", "output_rec_cnt": 10, "source": "fake",
+             "seed": 2, "output_file": "children.csv",
+             "fields": [{"name": "parent", "type": "ref", "references": "parents.key"}]}]})
@@ -0,0 +1,198 @@
+import pyarrow as pa
+import pyarrow.csv as pacsv
+import pyarrow.parquet as pq
+import pytest
+
+from datagen import config_parser
+from datagen.io_helper import IOHelper, writer_options
+from datagen.plan import compile_schema
+
+FIELDS = [{"name": "id", "type": "int", "unique": True, "min_value": 1, "max_value": 100000},
+          {"name": "amount", "type": "decimal", "min_value": 0, "max_value": 1000},
+          {"name": "score", "type": "double", "null_ratio": 0.2},
+          {"name": "flag", "type": "boolean"},
+          {"name": "segment", "type": "cat", "values": ["retail", "business", "private"]},
+          {"name": "code", "type": "str", "format": "??-##"},
+          {"name": "first_name", "type": "first_name"},
+          {"name": "opened_dt", "type": "date"},
+          {"name": "updated_ts", "type": "timestamp"}]
+# first bytes of compressed files
+MAGIC = {"gzip": b"\x1f\x8b", "zstd": b"\x28\xb5\x2f\xfd"}
+
+
+def make_schema(output_file, output_format="parquet", rows=2500, **names):
+    config = {"name": "formats", "output_format": output_format, "output_rec_cnt": rows,
+              "source": "fake", "seed": 17, "output_file": str(output_file), "fields": FIELDS}
+    config.update(names)
+    return config_parser.make_config_object(config)
+
+
+def write(schema, batch_size=700):
+    """Writes the records of a schema as its output format, returns the generated table."""
+    batches = list(compile_schema(schema).iter_batches(batch_size))
+    names = schema.names
+    assert IOHelper().write_batches(iter(batches), names.output_file, names.output_format,
+        writer_options(schema))
+    return pa.Table.from_batches(batches)
+
+
+def decoded_schema(table):
+    """Schema of a table with its dictionary columns decoded."""
+    return pa.schema([pa.field(field.name, field.type.value_type
+        if pa.types.is_dictionary(field.type) else field.type) for field in table.schema])
+
+
+def read_csv(location, table, **read_options):
+    return pacsv.read_csv(location, read_options=pacsv.ReadOptions(**read_options),
+        parse_options=pacsv.ParseOptions(delimiter="|"),
+        convert_options=pacsv.ConvertOptions(column_types=decoded_schema(table)))
+
+
+def test_parquet_round_trip(tmp_path):
+    schema = make_schema(tmp_path / "out.parquet", compression="zstd", row_group_size=1000,
+        parquet_version="2.6", int96_timestamps=False)
+    table = write(schema)
+    read = pq.read_table(str(tmp_path / "out.parquet"))
+    assert read.to_pydict() == table.to_pydict()
+    metadata = pq.ParquetFile(str(tmp_path / "out.parquet")).metadata
+    assert [metadata.row_group(index).num_rows for index in range(metadata.num_row_groups)] == [1000, 1000, 500]
+    assert metadata.row_group(0).column(0).compression == "ZSTD"
+
+
+def test_csv_round_trip(tmp_path):
+    table = write(make_schema(tmp_path / "out.csv", "csv"))
+    assert read_csv(str(tmp_path / "out.csv"), table).to_pydict() == table.to_pydict()
+
+
+def test_csv_without_header(tmp_path):
+    table = write(make_schema(tmp_path / "out.csv", "csv", header=False))
+    read = read_csv(str(tmp_path / "out.csv"), table, column_names=table.column_names)
+    assert read.to_pydict() == table.to_pydict()
+
+
+def test_csv_is_unquoted_by_default_as_the_pandas_writer_wrote_it(tmp_path):
+    location = str(tmp_path / "out.csv")
+    table = pa.table({"id": [1, 2, 3], "name": ["ann", "bob", None], "code": ["x-1", "y-2", "z-3"]})
+    IOHelper().write_batches(table.to_batches(), location, "csv")
+    with open(location, encoding="utf-8") as f:
+        assert f.read() == "id|name|code\n1|ann|x-1\n2|bob|y-2\n3||z-3\n"
+
+
+def test_csv_values_holding_the_delimiter_are_quoted(tmp_path):
+    location = str(tmp_path / "out.csv")
+    table = pa.table({"id": [1, 2], "text": ['a|b', 'say "hi"\nbye']})
+    IOHelper().write_batches_as_csv(table.to_batches(), location, threads=1)
+    with open(location, encoding="utf-8") as f:
+        assert f.read() == 'id|text\n1|"a|b"\n2|"say ""hi""\nbye"\n'
+    assert read_csv(location, table).to_pydict() == table.to_pydict()
+
+
+@pytest.mark.parametrize("compression", ["gzip", "zstd"])
+def test_compressed_csv_round_trip(tmp_path, compression):
+    location = str(tmp_path / "out.csv")
+    table = write(make_schema(location, "csv", compression=compression))
+    with open(location, "rb") as f:
+        assert f.read(4).startswith(MAGIC[compression])
+    with pa.CompressedInputStream(pa.OSFile(location), compression) as f:
+        assert read_csv(f, table).to_pydict() == table.to_pydict()
+
+
+def test_csv_threads_dont_change_the_file(tmp_path):
+    table = write(make_schema(tmp_path / "out.csv", "csv"))
+    iohelp = IOHelper()
+    for threads in (1, 3):
+        location = str(tmp_path / "threads-{0}.csv".format(threads))
+        iohelp.write_batches_as_csv(table.to_batches(), location, threads=threads)
+        with open(location, "rb") as f, open(str(tmp_path / "out.csv"), "rb") as expected:
+            assert f.read() == expected.read()
+
+
+def test_arrow_round_trip(tmp_path):
+    table = write(make_schema(tmp_path / "out.arrow", "arrow"))
+    with pa.memory_map(str(tmp_path / "out.arrow")) as source:
+        read = pa.ipc.open_file(source).read_all()
+    assert read.schema == table.schema
+    assert read.to_pydict() == table.to_pydict()
+
+
+def test_orc_round_trip(tmp_path):
+    import pyarrow.orc as orc
+
+    table = write(make_schema(tmp_path / "out.orc", "orc", compression="zstd"))
+    read = orc.read_table(str(tmp_path / "out.orc"))
+    assert read.schema.field("segment").type == pa.string()
+    assert read.to_pydict() == table.to_pydict()
+
+
+def test_ndjson_round_trip(tmp_path):
+    import json
+    from decimal import Decimal
+
+    table = write(make_schema(tmp_path / "out.ndjson", "ndjson"))
+    with open(str(tmp_path / "out.ndjson"), encoding="utf-8") as f:
+        rows = [json.loads(line, parse_float=Decimal) for line in f]
+    assert len(rows) == table.num_rows
+    for (row, expected) in zip(rows, table.to_pylist()):
+        assert list(row) == table.column_names
+        assert row["opened_dt"] == expected["opened_dt"].isoformat()
+        assert row["updated_ts"] == expected["updated_ts"].isoformat(" ", "milliseconds")
+        assert row["amount"] == expected["amount"]
+        assert row["score"] == (None if expected["score"] is None else Decimal(repr(expected["score"])))
+        for name in ("id", "flag", "segment", "code", "first_name"):
+            assert row[name] == expected[name]
+
+
+def test_ndjson_writes_decimals_exactly(tmp_path):
+    from decimal import Decimal
+
+    location = str(tmp_path / "out.ndjson")
+    values = [Decimal("9999999999999999.99"), Decimal("-0.10"), None]
+    table = pa.table({"amount": pa.array(values, pa.decimal128(18, 2))})
+    assert IOHelper().write_batches(table.to_batches(), location, "ndjson")
+    with open(location, encoding="utf-8") as f:
+        assert f.read() == '{"amount":9999999999999999.99}\n{"amount":-0.10}\n{"amount":null}\n'
+
+
+def read_dataset(location, **options):
+    import pyarrow.dataset as ds
+
+    return ds.dataset(location, format="parquet", **options).to_table()
+
+
+def test_partitioned_dataset_round_trip(tmp_path):
+    import os
+
+    location = str(tmp_path / "dataset")
+    table = write(make_schema(location, partition_by=["segment"], max_rows_per_file=400,
+        row_group_size=200))
+    assert sorted(os.listdir(location)) == ["segment=business", "segment=private", "segment=retail"]
+    read = read_dataset(location, partitioning="hive")
+    assert read.num_rows == table.num_rows
+    key = lambda row: row["id"]
+    rows = sorted(table.to_pylist(), key=key)
+    assert sorted(read.select(table.column_names).to_pylist(), key=key) == rows
+    for directory in os.listdir(location):
+        for name in os.listdir(os.path.join(location, directory)):
+            assert pq.ParquetFile(os.path.join(location, directory, name)).metadata.num_rows <= 400
+
+
+def test_dataset_written_again_keeps_no_stale_files(tmp_path):
+    from datagen.cli import persist_batches
+
+    location = str(tmp_path / "dataset")
+    for (rows, max_rows_per_file) in ((2500, 100), (1000, 500)):
+        schema = make_schema(location, rows=rows, max_rows_per_file=max_rows_per_file, row_group_size=100)
+        persist_batches(schema, compile_schema(schema).iter_batches(300))
+    assert read_dataset(location).to_pydict() == compile_schema(schema).execute().to_pydict()
+
+
+def test_sharded_dataset_written_again_keeps_no_stale_files(tmp_path):
+    from datagen.sharding import make_shards, run_shards
+
+    location = str(tmp_path / "dataset")
+    for (rows, shards) in ((2500, 4), (1000, 2)):
+        schema = make_schema(location, rows=rows, max_rows_per_file=200, row_group_size=100)
+        run_shards(compile_schema(schema), make_shards(rows, shards), "parquet", location, 2,
+            writer_options=writer_options(schema))
+    read = read_dataset(location).to_pydict()
+    assert sorted(read["id"]) == sorted(compile_schema(schema).execute().to_pydict()["id"])
@@ -0,0 +1,87 @@
+import importlib.util
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# factor applied to the budgets of benchmarks/import_time.py, slower or busy CI machines
+# can raise it with DATAGEN_IMPORT_TIME_TOLERANCE
+TOLERANCE = float(os.environ.get("DATAGEN_IMPORT_TIME_TOLERANCE", "1.5"))
+
+
+def load_benchmark():
+    spec = importlib.util.spec_from_file_location("import_time",
+        os.path.join(ROOT, "benchmarks", "import_time.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+import_time = load_benchmark()
+
+CONFIG = {
+    "name": "validate",
+    "output_format": "parquet",
+    "output_rec_cnt": 1000,
+    "source": "fake",
+    "seed": 100,
+    "output_file": "validate.parquet",
+    "fields": [
+        {"name": "id", "type": "int", "unique": True, "min_value": 1, "max_value": 100000},
+        {"name": "segment", "type": "cat", "values": ["retail", "business"], "weights": [70, 30]},
+        {"name": "score", "type": "float", "distribution": {"type": "normal", "mean": 50, "stddev": 5},
+         "null_ratio": 0.1},
+        {"name": "code", "type": "str", "format": "??-##"},
+        {"name": "address", "type": "composite_address"},
+        {"name": "opened_dt", "type": "date", "min_value": "2019-01-01"},
+        {"name": "label", "type": "expr", "expr": "concat(segment, '-', id % 7, '-', opened_dt + 1)"}
+    ]
+}
+
+
+def imported(statement, modules, cwd=ROOT):
+    """Runs a statement in a fresh interpreter and returns the modules it imported."""
+    check = "{0}\nimport sys\nprint('imported:' + ','.join(m for m in {1!r} if m in sys.modules))".format(
+        statement, tuple(modules))
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    completed = subprocess.run([sys.executable, "-c", check], capture_output=True, text=True,
+        check=True, cwd=cwd, env=env)
+    names = completed.stdout.strip().splitlines()[-1][len("imported:"):]
+    return [module for module in names.split(",") if module]
+
+
+def test_cli_import_loads_no_heavy_dependency():
+    assert imported("import datagen.cli", ("numpy", "pandas", "pyarrow", "faker", "s3fs")) == []
+
+
+def test_package_import_loads_no_heavy_dependency():
+    assert imported("import datagen", ("numpy", "pandas", "pyarrow", "faker", "s3fs")) == []
+
+
+def test_validate_loads_no_pandas_faker_or_s3fs(tmp_path):
+    # validate compiles the arrow typed plan, pyarrow itself is needed
+    config = tmp_path / "config.json"
+    config.write_text(json.dumps(CONFIG))
+    statement = ("import datagen.cli\n"
+                 "datagen.cli.execute_from_command_line(['datagen', 'validate', {0!r}])".format(str(config)))
+    assert imported(statement, ("pandas", "faker", "s3fs", "pyarrow.dataset"), cwd=str(tmp_path)) == []
+    assert not (tmp_path / "validate.parquet").exists()
+
+
+@pytest.fixture(scope="module")
+def baseline():
+    return import_time.best_of("pass", (), 3)[0]
+
+
+@pytest.mark.parametrize("name, statement, budget, forbidden", import_time.ENTRY_POINTS,
+    ids=[entry[0] for entry in import_time.ENTRY_POINTS])
+def test_import_time_budget(name, statement, budget, forbidden, baseline, monkeypatch):
+    # entry points run from the repository root, validate reads benchmarks/validate.json
+    monkeypatch.chdir(ROOT)
+    (best, imported) = import_time.best_of(statement, forbidden, 3, baseline)
+    assert imported == []
+    assert best <= budget * TOLERANCE, "{0} imports in {1:.1f} ms, budget {2} ms".format(
+        name, best, budget)
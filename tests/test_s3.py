@@ -0,0 +1,81 @@
+import pytest
+
+moto_server = pytest.importorskip("moto.server")
+
+from datagen.io_helper import IOHelper, S3MultipartWriter, get_s3_file_system
+
+BUCKET = "datagen-test"
+# s3 rejects parts smaller than 5MB except the last one
+PART_SIZE = 5 * 1024 * 1024
+
+
+@pytest.fixture(scope="module")
+def endpoint_url():
+    # s3fs talks to s3 through aiobotocore, which the moto decorators don't patch
+    server = moto_server.ThreadedMotoServer(port=0)
+    server.start()
+    (host, port) = server.get_host_and_port()
+    yield "http://{0}:{1}".format(host, port)
+    server.stop()
+
+
+@pytest.fixture
+def filesystem(endpoint_url, monkeypatch):
+    monkeypatch.setenv("AWS_ACCESS_KEY_ID", "testing")
+    monkeypatch.setenv("AWS_SECRET_ACCESS_KEY", "testing")
+    monkeypatch.setenv("AWS_DEFAULT_REGION", "us-east-1")
+    filesystem = get_s3_file_system("default", endpoint_url)
+    if not filesystem.exists(BUCKET):
+        filesystem.mkdir(BUCKET)
+    return filesystem
+
+
+def uploads(filesystem):
+    response = filesystem.call_s3("list_multipart_uploads", Bucket=BUCKET)
+    return response.get("Uploads", [])
+
+
+def test_small_object_is_uploaded_with_a_single_request(filesystem):
+    location = "s3://{0}/small.bin".format(BUCKET)
+    with S3MultipartWriter(filesystem, location, part_size=PART_SIZE) as f:
+        f.write(b"datagen")
+    assert f.upload_id is None
+    assert filesystem.cat_file(location) == b"datagen"
+
+
+def test_parts_are_uploaded_and_completed_in_order(filesystem):
+    location = "s3://{0}/multipart.bin".format(BUCKET)
+    body = bytes(range(256)) * (PART_SIZE * 2 // 256 + 1000)
+    with S3MultipartWriter(filesystem, location, part_size=PART_SIZE, max_in_flight=2) as f:
+        for start in range(0, len(body), 1000003):
+            f.write(body[start:start + 1000003])
+        assert f.tell() == len(body)
+    assert [part["PartNumber"] for part in sorted(f.parts, key=lambda part: part["PartNumber"])] == [1, 2, 3]
+    assert filesystem.cat_file(location) == body
+    assert uploads(filesystem) == []
+
+
+def test_abort_drops_the_uploaded_parts(filesystem):
+    location = "s3://{0}/aborted.bin".format(BUCKET)
+    with pytest.raises(RuntimeError):
+        with S3MultipartWriter(filesystem, location, part_size=PART_SIZE) as f:
+            f.write(b"x" * (PART_SIZE + 1))
+            assert f.upload_id is not None
+            raise RuntimeError("interrupted")
+    filesystem.invalidate_cache()
+    assert not filesystem.exists(location)
+    assert uploads(filesystem) == []
+
+
+def test_csv_round_trip(filesystem, endpoint_url):
+    import pyarrow as pa
+    import pyarrow.csv as pacsv
+
+    location = "s3://{0}/table.csv".format(BUCKET)
+    batch = pa.record_batch({"id": pa.array(range(1000)), "name": pa.array(["n"] * 1000)})
+    iohelp = IOHelper("default", endpoint_url)
+    assert iohelp.write_batches([batch, batch], location, "csv")
+    with filesystem.open(location, "rb") as f:
+        table = pacsv.read_csv(f, parse_options=pacsv.ParseOptions(delimiter="|"))
+    assert table.num_rows == 2000
+    assert table.column("id").to_pylist() == list(range(1000)) * 2
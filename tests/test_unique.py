@@ -0,0 +1,68 @@
+import numpy as np
+import pyarrow as pa
+import pytest
+
+from datagen import config_parser
+from datagen.plan import compile_schema
+from datagen.unique_helper import MAX_DOMAIN, Error, UniqueHelper
+
+
+@pytest.mark.parametrize("domain", [1, 2, 3, 1000, 1024, 1025, 65537])
+def test_permutation_is_a_bijection_of_the_domain(domain):
+    values = UniqueHelper(seed=11).permute(domain, np.arange(domain, dtype=np.uint64))
+    assert np.array_equal(np.sort(values), np.arange(domain, dtype=np.uint64))
+
+
+def test_permutation_depends_on_the_seed_and_not_on_the_rows_asked_for():
+    domain = 100000
+    rows = np.arange(domain, dtype=np.uint64)
+    values = UniqueHelper(seed=11).permute(domain, rows.copy())
+    assert np.array_equal(UniqueHelper(seed=11).permute(domain, rows[500:900].copy()), values[500:900])
+    assert not np.array_equal(UniqueHelper(seed=12).permute(domain, rows.copy()), values)
+    # a keyed permutation doesn't leave the rows in order
+    assert np.count_nonzero(values == rows) < domain // 100
+
+
+def test_large_domains_stay_in_range():
+    domain = (1 << 40) + 7
+    values = UniqueHelper(seed=3).permute(domain, np.arange(100000, dtype=np.uint64))
+    assert values.max() < domain
+    assert len(np.unique(values)) == 100000
+
+
+def test_range_must_hold_every_record():
+    assert UniqueHelper.compile_unique("int", 1000, 1, 1000) == ("_unique_int", (1, 1000))
+    with pytest.raises(Error, match="smaller than the 1001 records"):
+        UniqueHelper.compile_unique("int", 1001, 1, 1000)
+    with pytest.raises(Error, match="must not exceed"):
+        UniqueHelper.compile_unique("int", 10, 0, MAX_DOMAIN)
+    with pytest.raises(Error, match="smaller than"):
+        UniqueHelper.compile_unique("str", 101, format="##")
+    with pytest.raises(Error, match="! and @"):
+        UniqueHelper.compile_unique("str", 10, format="#!")
+    with pytest.raises(Error, match="only int and formatted str"):
+        UniqueHelper.compile_unique("float", 10)
+
+
+def test_unique_columns_are_unique_across_batches():
+    plan = compile_schema(config_parser.make_config_object({
+        "name": "unique", "output_format": "parquet", "output_rec_cnt": 20000, "source": "fake",
+        "seed": 5, "output_file": "unique.parquet",
+        "fields": [{"name": "id", "type": "int", "unique": True, "min_value": -10000, "max_value": 10000},
+                   {"name": "code", "type": "str", "unique": True, "format": "??-###"}]}))
+    table = pa.Table.from_batches(list(plan.iter_batches(3000)))
+    ids = table.column("id").to_numpy()
+    assert len(np.unique(ids)) == 20000
+    assert ids.min() >= -10000 and ids.max() <= 10000
+    codes = table.column("code").to_pylist()
+    assert len(set(codes)) == 20000
+    assert all(len(code) == 6 and code[2] == "-" for code in codes)
+
+
+def test_unique_range_is_checked_when_the_config_is_compiled():
+    schema = config_parser.make_config_object({
+        "name": "unique", "output_format": "parquet", "output_rec_cnt": 2000, "source": "fake",
+        "seed": 5, "output_file": "unique.parquet",
+        "fields": [{"name": "id", "type": "int", "unique": True, "min_value": 1, "max_value": 1000}]})
+    with pytest.raises(Error):
+        compile_schema(schema)